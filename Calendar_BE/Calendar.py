@@ -1,11 +1,25 @@
 import pandas_market_calendars as mcal
+import numpy as np
 import pandas as pd
 from datetime import datetime, date, timedelta
 import warnings
 
+from instrumentation import REGISTRY, timed
+from period_stats import aggregate_trading_days, period_keys
+from schedule_cache import SCHEDULES
+from sessions import MarketSessions, format_hours
+from trading_days import REASONS, TradingDayChecker
+from value_dates import ValueDateEngine
+
 warnings.filterwarnings('ignore')
 
+# 外汇起息日引擎（各货币假日首次使用时加载，此后常驻）
+VALUE_DATES = ValueDateEngine()
+# 批量交易日判定（各市场交易日首次使用时加载，此后常驻）
+TRADING_DAYS = TradingDayChecker()
+
 
+@timed('Calendar.get_market_events')
 def get_market_events(calendar_name='NYSE', start_date=None, end_date=None):
     """
     获取指定市场的重要事件日历 - 修正版
@@ -19,51 +33,42 @@ def get_market_events(calendar_name='NYSE', start_date=None, end_date=None):
 
     try:
         # 获取指定市场的日历
-        calendar = mcal.get_calendar(calendar_name)
+        calendar = SCHEDULES.calendar(calendar_name)
 
         print(f"=== {calendar_name} 市场事件日历 ({start_date} 到 {end_date}) ===")
 
         # 1. 获取交易日程
-        schedule = calendar.schedule(start_date=start_date, end_date=end_date)
+        schedule = SCHEDULES.schedule(calendar_name, start_date, end_date)
         print(f"\n1. 交易日历:")
         print(f"   交易日总数: {len(schedule)}天")
         if len(schedule) > 0:
             print(f"   第一个交易日: {schedule.index[0].date()}")
             print(f"   最后一个交易日: {schedule.index[-1].date()}")
 
-        # 2. 获取市场交易时间
+        # 2. 获取市场交易时间（逐日时段表：午休、提前收市/推迟开市）
         print(f"\n2. 市场交易时间:")
+        sessions = None
         try:
-            # 尝试获取交易时间
-            test_schedule = calendar.schedule(start_date=start_date,
-                                              end_date=start_date)
-            if len(test_schedule) > 0:
-                market_open = test_schedule.iloc[0]['market_open']
-                market_close = test_schedule.iloc[0]['market_close']
-                open_time = market_open.strftime('%H:%M')
-                close_time = market_close.strftime('%H:%M')
-                print(f"   常规交易时间: {open_time} - {close_time}")
-            else:
-                # 使用常见市场的默认值
-                default_hours = {
-                    'NYSE': ('09:30', '16:00'),
-                    'NASDAQ': ('09:30', '16:00'),
-                    'XHKG': ('09:30', '16:00'),
-                    'SSE': ('09:30', '15:00'),
-                    'SZSE': ('09:30', '15:00'),
-                    'JPX': ('09:00', '15:00'),
-                    'LSE': ('08:00', '16:30'),
-                    'TSX': ('09:30', '16:00'),
-                    'ASX': ('10:00', '16:00'),
-                }
-                if calendar_name in default_hours:
-                    open_time, close_time = default_hours[calendar_name]
-                    print(f"   常规交易时间: {open_time} - {close_time}")
-                else:
-                    print(f"   常规交易时间: 09:30 - 16:00 (默认)")
+            sessions = MarketSessions.from_calendar(calendar, start_date, end_date, schedule=schedule)
+            hours = sessions.regular_hours()
+            if hours is None:
+                # 区间内无交易日时使用日历自身的常规时段
+                hours = {'open': calendar.open_time.strftime('%H:%M'),
+                         'close': calendar.close_time.strftime('%H:%M'), 'break': None}
+            print(f"   常规交易时间({calendar.tz}): {format_hours(hours)}")
+            if hours['break']:
+                print(f"   午休: {hours['break'][0]} - {hours['break'][1]}")
+
+            special = sessions.special_days()
+            if len(special):
+                print(f"   特殊交易日:")
+                for day, row in special.head(10).iterrows():
+                    kind = '提前收市' if row['early_close'] else '推迟开市'
+                    print(f"   {day.strftime('%Y-%m-%d')} {kind} {row['market_open']} - {row['market_close']}")
+                if len(special) > 10:
+                    print(f"   ... 共{len(special)}个特殊交易日")
         except Exception as e:
             print(f"   无法获取交易时间: {e}")
-            print(f"   常规交易时间: 09:30 - 16:00 (默认)")
 
         # 3. 获取节假日 - 修正版本
         print(f"\n3. 节假日/休市日:")
@@ -136,6 +141,7 @@ def get_market_events(calendar_name='NYSE', start_date=None, end_date=None):
         return {
             'calendar_name': calendar_name,
             'schedule': schedule,
+            'sessions': sessions.table if sessions is not None else None,
             'trading_days_count': len(schedule),
             'date_range': {'start': start_date, 'end': end_date},
             'total_days': total_days
@@ -148,6 +154,7 @@ def get_market_events(calendar_name='NYSE', start_date=None, end_date=None):
         return None
 
 
+@timed('Calendar.get_holidays_fixed')
 def get_holidays_fixed(calendar, start_date, end_date):
     """
     修正版获取节假日函数
@@ -170,17 +177,14 @@ def get_holidays_fixed(calendar, start_date, end_date):
             # 尝试其他方法
             holidays_list = []
 
-        # 转换为字符串格式
-        holidays_str = []
-        for h in holidays_list:
-            if isinstance(h, (pd.Timestamp, datetime)):
-                holidays_str.append(h.strftime('%Y-%m-%d'))
-            elif isinstance(h, str):
-                holidays_str.append(h)
+        # 先按日期范围过滤再转换为字符串（CustomBusinessDay.holidays 为数千个 numpy 日期，整体向量化处理）
+        strings = [h for h in holidays_list if isinstance(h, str)]
+        dates = pd.DatetimeIndex([h for h in holidays_list
+                                  if isinstance(h, (pd.Timestamp, datetime, np.datetime64))])
+        dates = dates[(dates >= pd.Timestamp(start_date)) & (dates <= pd.Timestamp(end_date))]
 
-        # 过滤日期范围
-        filtered_holidays = [h for h in holidays_str
-                             if start_date <= h <= end_date]
+        filtered_holidays = list(dates.strftime('%Y-%m-%d')) + [h for h in strings
+                                                               if start_date <= h <= end_date]
 
         return filtered_holidays
 
@@ -189,6 +193,7 @@ def get_holidays_fixed(calendar, start_date, end_date):
         return []
 
 
+@timed('Calendar.check_trading_day_simple')
 def check_trading_day_simple(market='NYSE', check_date=None):
     """
     简化版检查交易日
@@ -197,8 +202,8 @@ def check_trading_day_simple(market='NYSE', check_date=None):
         check_date = datetime.now().strftime('%Y-%m-%d')
 
     try:
-        calendar = mcal.get_calendar(market)
-        schedule = calendar.schedule(start_date=check_date, end_date=check_date)
+        calendar = SCHEDULES.calendar(market)
+        schedule = SCHEDULES.schedule(market, check_date, check_date)
 
         check_date_obj = datetime.strptime(check_date, '%Y-%m-%d')
         weekday = check_date_obj.strftime('%A')
@@ -227,6 +232,28 @@ def check_trading_day_simple(market='NYSE', check_date=None):
         return None
 
 
+@timed('Calendar.check_trading_days_bulk')
+def check_trading_days_bulk(market='NYSE', dates=None):
+    """
+    批量检查交易日（dates为日期数组，market为单个市场或等长的市场数组）
+    """
+    if dates is None:
+        dates = pd.date_range(datetime.now(), periods=30).strftime('%Y-%m-%d')
+
+    try:
+        is_trading, reasons = TRADING_DAYS.check(dates, market)
+
+        counts = pd.Series(REASONS[reasons]).value_counts()
+        print(f"\n批量检查 {len(is_trading)} 个日期: " +
+              ", ".join(f"{reason} {count}" for reason, count in counts.items()))
+        return is_trading, reasons
+
+    except Exception as e:
+        print(f"批量检查失败: {e}")
+        return None
+
+
+@timed('Calendar.get_market_calendar_simple')
 def get_market_calendar_simple(market='NYSE', months=1):
     """
     简化版获取市场日历
@@ -238,23 +265,19 @@ def get_market_calendar_simple(market='NYSE', months=1):
     end_str = end_date.strftime('%Y-%m-%d')
 
     try:
-        calendar = mcal.get_calendar(market)
-        schedule = calendar.schedule(start_date=start_str, end_date=end_str)
+        calendar = SCHEDULES.calendar(market)
+        schedule = SCHEDULES.schedule(market, start_str, end_str)
 
         print(f"\n{market} 日历 ({start_str} 到 {end_str})")
         print("-" * 50)
 
-        # 按周分组显示
-        week_data = {}
-        for date_idx in schedule.index:
-            week_num = date_idx.isocalendar()[1]  # 周数
-            if week_num not in week_data:
-                week_data[week_num] = []
-            week_data[week_num].append(date_idx.strftime('%Y-%m-%d %A'))
-
-        for week_num in sorted(week_data.keys()):
-            print(f"\n第 {week_num} 周:")
-            for day in week_data[week_num]:
+        # 按 (ISO年, 周) 分组显示，跨年区间不会合并不同年份的同号周
+        weekly = aggregate_trading_days({market: schedule}, 'W')
+        keys = period_keys(schedule.index, 'W')
+        days = pd.Series(schedule.index.strftime('%Y-%m-%d %A'))
+        for (iso_year, week_num), week_days in days.groupby([keys['iso_year'], keys['week']]):
+            print(f"\n{iso_year} 年第 {week_num} 周:")
+            for day in week_days:
                 print(f"  {day}")
 
         # 节假日
@@ -269,7 +292,8 @@ def get_market_calendar_simple(market='NYSE', months=1):
             'market': market,
             'schedule': schedule,
             'holidays': holidays,
-            'trading_days': len(schedule)
+            'trading_days': len(schedule),
+            'weekly': weekly
         }
 
     except Exception as e:
@@ -277,6 +301,7 @@ def get_market_calendar_simple(market='NYSE', months=1):
         return None
 
 
+@timed('Calendar.get_next_n_trading_days')
 def get_next_n_trading_days(market='NYSE', n=10, start_date=None):
     """
     获取未来N个交易日
@@ -285,7 +310,7 @@ def get_next_n_trading_days(market='NYSE', n=10, start_date=None):
         start_date = datetime.now().strftime('%Y-%m-%d')
 
     try:
-        calendar = mcal.get_calendar(market)
+        calendar = SCHEDULES.calendar(market)
 
         # 搜索未来足够多的天数以确保找到N个交易日
         search_days = n * 3  # 假设大约1/3的日子是交易日
@@ -296,7 +321,7 @@ def get_next_n_trading_days(market='NYSE', n=10, start_date=None):
         end_date = end_obj.strftime('%Y-%m-%d')
 
         # 获取日程
-        schedule = calendar.schedule(start_date=start_date, end_date=end_date)
+        schedule = SCHEDULES.schedule(market, start_date, end_date)
 
         # 获取交易日列表
         trading_days = []
@@ -314,8 +339,7 @@ def get_next_n_trading_days(market='NYSE', n=10, start_date=None):
             print(f"{i:2d}. {day_str}")
 
             # 获取交易时间
-            day_schedule = calendar.schedule(start_date=day.strftime('%Y-%m-%d'),
-                                             end_date=day.strftime('%Y-%m-%d'))
+            day_schedule = SCHEDULES.schedule(market, day, day)
             if not day_schedule.empty:
                 market_open = day_schedule.iloc[0]['market_open']
                 market_close = day_schedule.iloc[0]['market_close']
@@ -328,6 +352,30 @@ def get_next_n_trading_days(market='NYSE', n=10, start_date=None):
         return []
 
 
+@timed('Calendar.get_fx_value_dates')
+def get_fx_value_dates(pair='EURUSD', trade_date=None, tenors=('SPOT', '1W', '1M', '3M', '1Y')):
+    """
+    获取外汇即期/远期起息日（跳过两种货币及美元的假日，修正后续规则）
+    """
+    if trade_date is None:
+        trade_date = datetime.now().strftime('%Y-%m-%d')
+
+    try:
+        values = VALUE_DATES.value_dates(trade_date, pair, list(tenors))
+
+        print(f"\n{pair} 起息日 (交易日 {trade_date}):")
+        print("-" * 30)
+        for tenor, value in zip(tenors, values):
+            value_date = pd.Timestamp(value)
+            print(f"  {tenor:<5s} {value_date.strftime('%Y-%m-%d %A')}")
+
+        return dict(zip(tenors, [pd.Timestamp(v).strftime('%Y-%m-%d') for v in values]))
+
+    except Exception as e:
+        print(f"计算{pair}起息日失败: {e}")
+        return {}
+
+
 # =========== 使用示例 ===========
 
 if __name__ == "__main__":
@@ -363,6 +411,9 @@ if __name__ == "__main__":
     for test_date in test_dates:
         check_trading_day_simple('NYSE', test_date)
 
+    # 批量检查一整年
+    check_trading_days_bulk('NYSE', pd.date_range('2024-01-01', '2024-12-31'))
+
     print("\n" + "=" * 60)
 
     # 示例3: 获取简化版日历
@@ -380,7 +431,7 @@ if __name__ == "__main__":
     # 示例5: 测试多个市场
     print("\n示例5: 测试多个市场")
 
-    markets = ['XHKG', 'LSE', 'JPX', 'SSE']
+    markets = ['XHKG', 'LSE', 'JPX', 'SSE', 'FX']
     for market in markets:
         print(f"\n--- {market} ---")
         try:
@@ -393,4 +444,15 @@ if __name__ == "__main__":
             if result:
                 print(f"✓ 成功获取{market}日历数据")
         except Exception as e:
-            print(f"✗ 获取{market}失败: {e}")
\ No newline at end of file
+            print(f"✗ 获取{market}失败: {e}")
+
+    print("\n" + "=" * 60)
+
+    # 示例6: 外汇起息日
+    print("\n示例6: 外汇即期/远期起息日")
+    for pair in ['EURUSD', 'USDJPY', 'USDCAD']:
+        get_fx_value_dates(pair, trade_date='2024-12-23')
+
+    print("\n" + "=" * 60)
+    print("\n埋点耗时统计:")
+    print(REGISTRY.format_table())
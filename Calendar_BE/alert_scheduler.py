@@ -0,0 +1,402 @@
+import argparse
+import heapq
+import itertools
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from blackout import to_ns
+from event_archive import ARCHIVE_KEY, FEED_URL, normalize_feed
+
+
+# 默认提前提醒分钟数
+DEFAULT_LEAD_MINUTES = 15
+# 数据源刷新间隔（秒），刷新后整体重新规划
+REFRESH_INTERVAL = 600
+# 单次POST最多携带的提醒条数（同一订阅的到期提醒合并发送）
+DELIVERY_BATCH = 50
+# 发送线程数与连接池大小
+DELIVERY_WORKERS = 8
+DELIVERY_TIMEOUT = 5
+# 发送失败的重试：最多尝试次数，第k次重试延迟 RETRY_DELAY * 2**k 秒
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 5
+
+_MINUTE_NS = 60 * 10 ** 9
+
+
+class Subscription:
+    """订阅：webhook地址 + 国家/影响级别筛选（None为不限）+ 提前分钟数"""
+
+    def __init__(self, sub_id, url, countries=None, impacts=('High',), lead_minutes=DEFAULT_LEAD_MINUTES):
+        self.id = str(sub_id)
+        self.url = url
+        self.countries = None if countries is None else [str(c).upper() for c in countries]
+        self.impacts = None if impacts is None else [str(i) for i in impacts]
+        self.lead_minutes = int(lead_minutes)
+        if self.lead_minutes < 0:
+            raise ValueError(f"提前分钟数不能为负: {lead_minutes}")
+
+    @classmethod
+    def from_dict(cls, item):
+        return cls(item['id'], item['url'], item.get('countries'), item.get('impacts', ('High',)),
+                   item.get('lead_minutes', DEFAULT_LEAD_MINUTES))
+
+    def matches(self, countries, impacts):
+        """事件国家/影响级别数组 → 布尔掩码"""
+        mask = np.ones(len(countries), dtype=bool)
+        if self.countries is not None:
+            mask &= np.isin(countries, self.countries)
+        if self.impacts is not None:
+            mask &= np.isin(impacts, self.impacts)
+        return mask
+
+
+def _event_key(ns, country, title):
+    return int(ns), str(country), str(title)
+
+
+class AlertScheduler:
+    """事件提醒调度：(触发时刻, 订阅, 事件) 存于最小堆，插入/弹出 O(log n)
+
+    - plan(events)：数据源刷新后按全部订阅整体重新规划，重建堆（heapify O(n)），已发送的提醒不重复
+    - due(now)：弹出所有到期提醒
+    - deliver(alerts)：按订阅合并为批量POST，经共享连接池并发发送；失败的提醒按指数退避重新入堆
+    """
+
+    def __init__(self, subscriptions=(), workers=DELIVERY_WORKERS, session=None, clock=time.time_ns):
+        self.subscriptions = {}
+        self.clock = clock
+        self._heap = []
+        self._seq = itertools.count()
+        self._events = {}   # 事件键 → 提醒内容
+        self._planned = None  # 最近一次规划的 (时间, 国家, 影响级别, 事件键) 数组
+        self._sent = set()  # 已成功发送的 (订阅, 事件键)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.workers = workers
+        self.session = session or self._pooled_session(workers)
+        self.stats = {'planned': 0, 'delivered': 0, 'posts': 0, 'failed_posts': 0, 'retries': 0, 'dropped': 0}
+        for sub in subscriptions:
+            self.subscriptions[sub.id] = sub
+
+    @staticmethod
+    def _pooled_session(workers):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def __len__(self):
+        return len(self._heap)
+
+    # ---------- 规划 ----------
+
+    def _entries(self, sub, ts, countries, impacts, keys, now):
+        fire = ts - sub.lead_minutes * _MINUTE_NS
+        rows = np.flatnonzero(sub.matches(countries, impacts) & (ts > now))
+        return [(int(fire[i]), next(self._seq), sub.id, keys[i], 0) for i in rows
+                if (sub.id, keys[i]) not in self._sent]
+
+    def plan(self, events, now=None):
+        """以最新事件表（normalize_feed 的结构）重新规划全部提醒，返回待发提醒数
+
+        时间已过的事件不再提醒；提前量已过但事件未发生的（如新增订阅、事件临时插入）立即到期。
+        """
+        now = self.clock() if now is None else now
+        events = events.drop_duplicates(subset=ARCHIVE_KEY, keep='last').reset_index(drop=True)
+        ts = to_ns(events['timestamp']) if len(events) else np.empty(0, dtype=np.int64)
+        countries = events['country'].astype(str).to_numpy()
+        impacts = events['impact'].astype(str).to_numpy()
+        titles = events['title'].astype(str).to_numpy()
+        keys = [_event_key(*k) for k in zip(ts, countries, titles)]
+
+        stamps = pd.to_datetime(ts, unit='ns', utc=True).map(pd.Timestamp.isoformat)
+        texts = {col: [None if pd.isna(v) else str(v) for v in events[col]] if col in events else [None] * len(events)
+                 for col in ('forecast', 'previous')}
+        payloads = {
+            key: {'title': title, 'country': country, 'impact': impact, 'timestamp': stamp,
+                  'forecast': forecast, 'previous': previous}
+            for key, title, country, impact, stamp, forecast, previous in
+            zip(keys, titles, countries, impacts, stamps, texts['forecast'], texts['previous'])
+        }
+
+        with self._lock:
+            heap = []
+            for sub in self.subscriptions.values():
+                heap.extend(self._entries(sub, ts, countries, impacts, keys, now))
+            heapq.heapify(heap)
+            self._heap = heap
+            self._events = payloads
+            self._planned = (ts, countries, impacts, keys)
+            # 已发送记录只保留仍在事件表中的事件
+            self._sent = {item for item in self._sent if item[1] in payloads}
+            self.stats['planned'] = len(heap)
+        return len(heap)
+
+    def add_subscription(self, sub, now=None):
+        """新增（或替换）订阅，按当前事件表为其逐条入堆"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            self.subscriptions[sub.id] = sub
+            if self._planned is None:
+                return 0
+            entries = self._entries(sub, *self._planned, now)
+            for entry in entries:
+                heapq.heappush(self._heap, entry)
+        return len(entries)
+
+    def remove_subscription(self, sub_id):
+        """删除订阅（堆中的条目在弹出时跳过）"""
+        with self._lock:
+            return self.subscriptions.pop(str(sub_id), None) is not None
+
+    # ---------- 出堆与发送 ----------
+
+    def next_fire_time(self):
+        """最早的待发提醒时刻（int64纳秒），无待发提醒时为None"""
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def due(self, now=None):
+        """弹出所有到期的提醒：[(订阅, 事件键, 已尝试次数)]"""
+        now = self.clock() if now is None else now
+        alerts = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, _, sub_id, key, attempt = heapq.heappop(self._heap)
+                if sub_id in self.subscriptions and key in self._events and (sub_id, key) not in self._sent:
+                    alerts.append((sub_id, key, attempt))
+        return alerts
+
+    def _post(self, sub, payloads):
+        body = {'subscription': sub.id, 'lead_minutes': sub.lead_minutes, 'alerts': payloads}
+        try:
+            response = self.session.post(sub.url, json=body, timeout=DELIVERY_TIMEOUT)
+            response.raise_for_status()
+            return True
+        except requests.exceptions.RequestException as e:
+            print(f"提醒发送失败 [{sub.id}]: {e}", file=sys.stderr)
+            return False
+
+    def deliver(self, alerts, now=None):
+        """按订阅分组、每批最多 DELIVERY_BATCH 条并发发送，返回成功发送的提醒数"""
+        now = self.clock() if now is None else now
+        grouped = {}
+        for sub_id, key, attempt in alerts:
+            grouped.setdefault(sub_id, []).append((key, attempt))
+
+        # 提醒内容在锁内取出，发送期间数据源刷新不影响本批
+        batches = []
+        with self._lock:
+            for sub_id, items in grouped.items():
+                sub = self.subscriptions.get(sub_id)
+                items = [(key, attempt) for key, attempt in items if key in self._events]
+                if sub is not None:
+                    batches += [(sub, items[i:i + DELIVERY_BATCH],
+                                 [self._events[key] for key, _ in items[i:i + DELIVERY_BATCH]])
+                                for i in range(0, len(items), DELIVERY_BATCH)]
+        if not batches:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as executor:
+            results = list(executor.map(lambda batch: self._post(batch[0], batch[2]), batches))
+
+        delivered = 0
+        with self._lock:
+            for (sub, items, _), ok in zip(batches, results):
+                self.stats['posts'] += 1
+                if ok:
+                    delivered += len(items)
+                    self._sent.update((sub.id, key) for key, _ in items)
+                    continue
+                self.stats['failed_posts'] += 1
+                for key, attempt in items:
+                    if attempt + 1 < MAX_ATTEMPTS:
+                        retry_at = now + RETRY_DELAY * 2 ** attempt * 10 ** 9
+                        heapq.heappush(self._heap, (retry_at, next(self._seq), sub.id, key, attempt + 1))
+                        self.stats['retries'] += 1
+                    else:
+                        self.stats['dropped'] += 1
+            self.stats['delivered'] += delivered
+        return delivered
+
+    def run_once(self, now=None):
+        """发送当前所有到期提醒"""
+        now = self.clock() if now is None else now
+        return self.deliver(self.due(now), now)
+
+    # ---------- 常驻运行 ----------
+
+    def run_forever(self, fetch=None, refresh_interval=REFRESH_INTERVAL):
+        """常驻循环：每 refresh_interval 秒刷新事件表并重新规划，其余时间睡到下一个提醒时刻"""
+        fetch = fetch or fetch_feed
+        next_refresh = 0
+        while not self._stop.is_set():
+            now = self.clock()
+            if now >= next_refresh:
+                try:
+                    self.plan(fetch(), now)
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    print(f"刷新事件失败: {e}", file=sys.stderr)
+                next_refresh = now + refresh_interval * 10 ** 9
+            self.run_once()
+
+            next_fire = self.next_fire_time()
+            wake = next_refresh if next_fire is None else min(next_fire, next_refresh)
+            self._stop.wait(max(wake - self.clock(), 0) / 1e9)
+
+    def stop(self):
+        self._stop.set()
+
+
+def fetch_feed(url=FEED_URL):
+    """拉取数据源全部事件（统一结构）"""
+    response = requests.get(url, timeout=10)
+    response.raise_for_status()
+    return normalize_feed(response.json())
+
+
+def load_subscriptions(path):
+    """订阅文件（JSON列表，每项含 id、url，可选 countries、impacts、lead_minutes）"""
+    with open(path, encoding='utf-8') as f:
+        return [Subscription.from_dict(item) for item in json.load(f)]
+
+
+class StubReceiver:
+    """本地webhook接收端（测试用）：记录收到的每个POST请求体，可按路径模拟失败"""
+
+    def __init__(self, fail_paths=()):
+        self.received = []
+        self.fail_paths = set(fail_paths)
+        self._lock = threading.Lock()
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                status = 500 if self.path in receiver.fail_paths else 200
+                if status == 200:
+                    with receiver._lock:
+                        receiver.received.append((self.path, json.loads(body)))
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def alerts(self):
+        """已收到的提醒总数"""
+        with self._lock:
+            return sum(len(body['alerts']) for _, body in self.received)
+
+
+def _sample_subscriptions(n, url, seed=0):
+    rng = np.random.default_rng(seed)
+    countries = ['USD', 'EUR', 'GBP', 'JPY', 'CNY', 'AUD', 'CAD', 'CHF', 'NZD']
+    impact_sets = [('High',), ('Medium', 'High'), None]
+    return [Subscription(f's{i}', f"{url}/hook/{i}",
+                         countries=list(rng.choice(countries, rng.integers(1, 4), replace=False)),
+                         impacts=impact_sets[rng.integers(0, len(impact_sets))],
+                         lead_minutes=int(rng.choice([5, 15, 30, 60])))
+            for i in range(n)]
+
+
+def benchmark(n_subscriptions=500, n_events=300, seed=0):
+    """n个订阅 × 一周事件：整体规划、逐条出堆，批量连接池发送 vs 逐条无连接池发送（本地接收端）"""
+    from event_schema import _sample_feed, to_event_frame
+
+    now = pd.Timestamp('2024-06-10', tz='UTC').value
+    offsets = np.random.default_rng(seed).integers(0, 7 * 24 * 60, n_events)
+    events = to_event_frame(_sample_feed(n_events, seed).assign(
+        timestamp=pd.Timestamp(now, tz='UTC') + pd.to_timedelta(offsets, unit='min')))
+
+    with StubReceiver() as receiver:
+        subs = _sample_subscriptions(n_subscriptions, receiver.url, seed)
+        scheduler = AlertScheduler(subs, clock=lambda: now)
+
+        start = time.perf_counter()
+        planned = scheduler.plan(events)
+        plan_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        alerts = scheduler.due(now + 8 * 24 * 3600 * 10 ** 9)
+        pop_s = time.perf_counter() - start
+        assert len(alerts) == planned
+
+        start = time.perf_counter()
+        delivered = scheduler.deliver(alerts)
+        batched_s = time.perf_counter() - start
+        assert delivered == planned == receiver.alerts()
+
+        # 对照：每条提醒单独POST，不复用连接
+        sample = alerts[:500]
+        start = time.perf_counter()
+        for sub_id, key, _ in sample:
+            requests.post(scheduler.subscriptions[sub_id].url,
+                          json={'subscription': sub_id, 'alerts': [scheduler._events[key]]}, timeout=DELIVERY_TIMEOUT)
+        naive_s = (time.perf_counter() - start) * planned / len(sample)
+
+    print(f"{n_subscriptions}个订阅 × {len(events)}个事件 → {planned:,}条提醒")
+    print(f"规划(heapify): {plan_s * 1e3:.0f} ms  |  全部出堆: {pop_s * 1e3:.0f} ms")
+    print(f"发送  批量+连接池: {batched_s:.2f} s ({scheduler.stats['posts']}次POST)  |  "
+          f"逐条无连接池(估算): {naive_s:.2f} s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="经济事件提醒调度（webhook推送）")
+    parser.add_argument('subscriptions', nargs='?', help="订阅文件（JSON）")
+    parser.add_argument('--once', action='store_true', help="拉取一次、发送当前到期提醒后退出")
+    parser.add_argument('--refresh', type=int, default=REFRESH_INTERVAL, help="数据源刷新间隔（秒）")
+    parser.add_argument('--benchmark', action='store_true', help="运行性能对比后退出")
+    args = parser.parse_args(argv)
+    if args.benchmark:
+        benchmark()
+        return 0
+    if not args.subscriptions:
+        parser.error("需要订阅文件")
+
+    try:
+        scheduler = AlertScheduler(load_subscriptions(args.subscriptions))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"读取订阅失败: {e}", file=sys.stderr)
+        return 1
+
+    if args.once:
+        scheduler.plan(fetch_feed())
+        print(f"已发送 {scheduler.run_once()} 条提醒，待发 {len(scheduler)} 条")
+        return 0
+    try:
+        scheduler.run_forever(refresh_interval=args.refresh)
+    except KeyboardInterrupt:
+        scheduler.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
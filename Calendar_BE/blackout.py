@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+
+# 默认禁区：事件前后各15分钟
+DEFAULT_BEFORE = pd.Timedelta(minutes=15)
+DEFAULT_AFTER = pd.Timedelta(minutes=15)
+
+
+def to_ns(timestamps):
+    """时间 → UTC int64纳秒数组（无时区的时间按UTC处理）"""
+    index = pd.DatetimeIndex(timestamps)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return np.asarray(index, dtype='datetime64[ns]').astype(np.int64)
+
+
+def merge_intervals(starts, ends):
+    """合并重叠区间（排序后一次扫描：累计最大右端点 < 下一左端点处断开）"""
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    if len(starts) == 0:
+        return starts, ends
+    order = np.argsort(starts, kind='stable')
+    starts, ends = starts[order], ends[order]
+    running_end = np.maximum.accumulate(ends)
+    new_group = np.concatenate([[True], starts[1:] > running_end[:-1]])
+    group = np.cumsum(new_group) - 1
+    merged_starts = starts[new_group]
+    merged_ends = np.zeros(len(merged_starts), dtype=np.int64)
+    np.maximum.at(merged_ends, group, ends)
+    return merged_starts, merged_ends
+
+
+def intersect_intervals(a_starts, a_ends, b_starts, b_ends):
+    """两组各自不重叠的区间求交集（端点排序扫描，覆盖计数为2的区段即交集）"""
+    if len(a_starts) == 0 or len(b_starts) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    points = np.concatenate([a_starts, a_ends, b_starts, b_ends]).astype(np.int64)
+    delta = np.concatenate([np.ones(len(a_starts)), -np.ones(len(a_ends)),
+                            np.ones(len(b_starts)), -np.ones(len(b_ends))]).astype(np.int8)
+    # 同一时刻先处理结束再处理开始，首尾相接的区间不产生零长度交集
+    order = np.lexsort((delta, points))
+    points, delta = points[order], delta[order]
+    depth = np.cumsum(delta)
+    enter = np.flatnonzero(depth == 2)
+    return points[enter], points[enter + 1]
+
+
+def session_intervals(schedule):
+    """由交易日程（market_open/market_close，可含午休 break_start/break_end）生成交易时段区间"""
+    if schedule is None or len(schedule) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+
+    opens = to_ns(schedule['market_open'])
+    closes = to_ns(schedule['market_close'])
+    if 'break_start' in schedule.columns and 'break_end' in schedule.columns:
+        has_break = schedule['break_start'].notna().to_numpy() & schedule['break_end'].notna().to_numpy()
+        if has_break.any():
+            break_start = to_ns(schedule['break_start'].where(has_break, schedule['market_close']))
+            break_end = to_ns(schedule['break_end'].where(has_break, schedule['market_close']))
+            starts = np.concatenate([opens, break_end[has_break]])
+            ends = np.concatenate([np.where(has_break, break_start, closes), closes[has_break]])
+            return merge_intervals(starts, ends)
+    return merge_intervals(opens, closes)
+
+
+class BlackoutCalendar:
+    """事件风控禁区：有序不重叠区间，任意时刻查询O(log n)"""
+
+    def __init__(self, starts, ends):
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _locate(self, t_ns):
+        idx = np.searchsorted(self.starts, t_ns, side='right') - 1
+        if len(self.starts) == 0:
+            return idx, np.zeros(len(t_ns), dtype=bool)
+        inside = (idx >= 0) & (t_ns < self.ends[np.maximum(idx, 0)])
+        return idx, inside
+
+    def is_blackout(self, when):
+        """单个时刻或时刻数组是否处于禁区"""
+        scalar = np.ndim(when) == 0
+        t_ns = to_ns([when]) if scalar else to_ns(when)
+        _, inside = self._locate(t_ns)
+        return bool(inside[0]) if scalar else inside
+
+    def current_window(self, when):
+        """包含该时刻的禁区 (开始, 结束)，不在禁区时返回None"""
+        t_ns = to_ns([when])
+        idx, inside = self._locate(t_ns)
+        if not inside[0]:
+            return None
+        i = idx[0]
+        return (pd.Timestamp(self.starts[i], tz='UTC'), pd.Timestamp(self.ends[i], tz='UTC'))
+
+    def next_window(self, when):
+        """该时刻之后（含当前）的下一个禁区，没有时返回None"""
+        t_ns = to_ns([when])[0]
+        i = np.searchsorted(self.ends, t_ns, side='right')
+        if i >= len(self.starts):
+            return None
+        return (pd.Timestamp(self.starts[i], tz='UTC'), pd.Timestamp(self.ends[i], tz='UTC'))
+
+    def to_frame(self):
+        """禁区列表（UTC）"""
+        return pd.DataFrame({
+            'start': pd.to_datetime(self.starts, unit='ns', utc=True),
+            'end': pd.to_datetime(self.ends, unit='ns', utc=True),
+        })
+
+
+def build_blackouts(event_times, schedule=None, before=DEFAULT_BEFORE, after=DEFAULT_AFTER):
+    """为每个事件生成 [t-before, t+after] 区间，合并后与市场交易时段求交集
+
+    schedule为None时不限制交易时段（全部事件区间即禁区）。
+    """
+    t_ns = to_ns(event_times)
+    starts, ends = merge_intervals(t_ns - pd.Timedelta(before).value, t_ns + pd.Timedelta(after).value)
+    if schedule is not None:
+        session_starts, session_ends = session_intervals(schedule)
+        starts, ends = intersect_intervals(starts, ends, session_starts, session_ends)
+    return BlackoutCalendar(starts, ends)
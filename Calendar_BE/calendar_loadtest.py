@@ -0,0 +1,116 @@
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+from calendar_service import SERVICE_HOST, SERVICE_PORT
+
+
+# 压测使用的查询组合（路径, 查询串）
+QUERIES = [
+    '/trading_day?market=NYSE&date={day}',
+    '/trading_day?market=XHKG&date={day}&date={day2}',
+    '/sessions?market=NYSE&start={day}&end={day2}',
+    '/sessions?market=XHKG&start={day}&end={day}',
+    '/holidays?market=LSE&start={day}&end={day2}',
+    '/next_trading_days?market=JPX&start={day}&n=5',
+]
+
+
+def _random_paths(n, seed=0):
+    """按查询组合生成n个请求路径（日期在近两年内随机，模拟缓存命中与未命中混合）"""
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(n):
+        day = np.datetime64('2024-01-01') + rng.randint(0, 730)
+        day2 = day + rng.randint(0, 30)
+        paths.append(rng.choice(QUERIES).format(day=day, day2=day2))
+    return paths
+
+
+async def _get(reader, writer, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {SERVICE_HOST}\r\n\r\n".encode())
+    await writer.drain()
+    header = await reader.readuntil(b'\r\n\r\n')
+    status = int(header.split(b' ', 2)[1])
+    length = 0
+    for line in header.split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':', 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def _connection(host, port, paths, interval, start, latencies, statuses):
+    """单个长连接：按计划时刻发送请求，延迟从计划时刻起算（避免协调遗漏低估尾延迟）"""
+    reader, writer = await asyncio.open_connection(host, port)
+    loop = asyncio.get_event_loop()
+    for i, path in enumerate(paths):
+        scheduled = start + i * interval
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        statuses.append(await _get(reader, writer, path))
+        latencies.append(loop.time() - scheduled)
+    writer.close()
+
+
+async def run_load(host, port, rate, duration, connections):
+    """开环压测：总速率rate（请求/秒），持续duration秒，分摊到connections个长连接"""
+    total = int(rate * duration)
+    paths = _random_paths(total)
+    per_conn = [paths[i::connections] for i in range(connections)]
+    interval = connections / rate
+
+    latencies, statuses = [], []
+    loop = asyncio.get_event_loop()
+    start = loop.time() + 0.2
+    began = time.perf_counter()
+    await asyncio.gather(*[
+        _connection(host, port, chunk, interval, start + i * interval / connections, latencies, statuses)
+        for i, chunk in enumerate(per_conn)
+    ])
+    elapsed = time.perf_counter() - began - 0.2
+
+    lat_ms = np.array(latencies) * 1e3
+    errors = sum(1 for s in statuses if s != 200)
+    print(f"目标速率: {rate:,} req/s | 实际: {len(lat_ms) / elapsed:,.0f} req/s | "
+          f"请求数: {len(lat_ms):,} | 错误: {errors}")
+    print(f"延迟(ms)  p50: {np.percentile(lat_ms, 50):.2f}  p95: {np.percentile(lat_ms, 95):.2f}  "
+          f"p99: {np.percentile(lat_ms, 99):.2f}  max: {lat_ms.max():.2f}")
+
+
+def _wait_ready(host, port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://{host}:{port}/health", timeout=1) as resp:
+                return resp.status == 200
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def main(rates=(1000, 2000, 4000), duration=5, connections=32, port=None):
+    """启动服务子进程，逐档压测"""
+    port = port or SERVICE_PORT
+    here = os.path.dirname(os.path.abspath(__file__))
+    server = subprocess.Popen([sys.executable, os.path.join(here, 'calendar_service.py'), str(port)], cwd=here)
+    try:
+        if not _wait_ready(SERVICE_HOST, port):
+            print("服务启动失败")
+            return
+        for rate in rates:
+            asyncio.run(run_load(SERVICE_HOST, port, rate, duration, connections))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main(rates=[int(r) for r in sys.argv[1:]] or (1000, 2000, 4000))
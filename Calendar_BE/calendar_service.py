@@ -0,0 +1,366 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date
+from urllib.parse import parse_qs
+
+import numpy as np
+import pandas as pd
+
+from blackout import to_ns
+from event_archive import EventArchive
+from fx_calendar import get_calendar
+
+
+SERVICE_HOST = os.environ.get('FX_CALENDAR_HOST', '127.0.0.1')
+SERVICE_PORT = int(os.environ.get('FX_CALENDAR_PORT', '8765'))
+
+# 启动时预热的市场
+DEFAULT_MARKETS = ['NYSE', 'NASDAQ', 'LSE', 'JPX', 'XHKG', 'SSE', 'FX']
+# 日历常驻内存的覆盖范围：CALENDAR_START 至今后 CALENDAR_YEARS_AHEAD 年
+CALENDAR_START = '2000-01-01'
+CALENDAR_YEARS_AHEAD = 3
+
+# 响应缓存条数（LRU，缓存已编码的JSON字节）
+RESPONSE_CACHE_SIZE = 65536
+# 单次批量请求的最大子请求数
+MAX_BATCH = 500
+# 单次查询返回的最大记录数
+MAX_ROWS = 5000
+
+
+def _day_ns(values):
+    """'YYYY-MM-DD'（单个或列表）→ 当日0点的int64纳秒；格式错误时抛出ValueError"""
+    return np.array(values, dtype='datetime64[D]').astype('datetime64[ns]').astype(np.int64)
+
+
+def _iso(ns):
+    """int64纳秒数组 → UTC ISO时间字符串列表"""
+    return np.datetime_as_string(np.asarray(ns).astype('datetime64[ns]'), unit='s', timezone='UTC').tolist()
+
+
+def _day_str(ns):
+    """int64纳秒数组 → 'YYYY-MM-DD' 字符串列表"""
+    return np.datetime_as_string(np.asarray(ns).astype('datetime64[ns]'), unit='D').tolist()
+
+
+class MarketCalendar:
+    """单个市场的常驻日历：交易日与交易时段为有序int64数组，查询均为二分查找"""
+
+    def __init__(self, market, start=CALENDAR_START, end=None):
+        end = end or f"{date.today().year + CALENDAR_YEARS_AHEAD}-12-31"
+        schedule = get_calendar(market).schedule(start_date=start, end_date=end)
+
+        self.market = market
+        self.first = int(_day_ns(start))
+        self.last = int(_day_ns(end))
+        self.days = to_ns(schedule.index.normalize())
+        self.opens = to_ns(schedule['market_open'])
+        self.closes = to_ns(schedule['market_close'])
+        if 'break_start' in schedule.columns:
+            has_break = schedule['break_start'].notna().to_numpy()
+            self.break_starts = np.where(has_break, to_ns(schedule['break_start'].fillna(schedule['market_open'])), -1)
+            self.break_ends = np.where(has_break, to_ns(schedule['break_end'].fillna(schedule['market_open'])), -1)
+        else:
+            self.break_starts = self.break_ends = None
+
+    def _check(self, day_ns):
+        if np.any((day_ns < self.first) | (day_ns > self.last)):
+            raise ValueError(f"日期超出{self.market}日历范围 "
+                             f"{_day_str(self.first)} ~ {_day_str(self.last)}")
+
+    def _range(self, start, end):
+        start_ns, end_ns = _day_ns([start, end])
+        self._check(np.array([start_ns, end_ns]))
+        lo = np.searchsorted(self.days, start_ns, side='left')
+        hi = np.searchsorted(self.days, end_ns, side='right')
+        if hi - lo > MAX_ROWS:
+            raise ValueError(f"查询范围过大（最多{MAX_ROWS}个交易日）")
+        return lo, hi
+
+    def is_trading_day(self, dates):
+        """批量判断交易日"""
+        query = _day_ns(dates)
+        self._check(query)
+        pos = np.searchsorted(self.days, query)
+        hit = (pos < len(self.days)) & (self.days[np.minimum(pos, len(self.days) - 1)] == query)
+        return dict(zip(_day_str(query), hit.tolist()))
+
+    def sessions(self, start, end):
+        """区间内各交易日的开收盘（及午休）时间，UTC"""
+        lo, hi = self._range(start, end)
+        rows = [{'date': d, 'open': o, 'close': c} for d, o, c in
+                zip(_day_str(self.days[lo:hi]), _iso(self.opens[lo:hi]), _iso(self.closes[lo:hi]))]
+        if self.break_starts is not None:
+            has_break = self.break_starts[lo:hi] >= 0
+            for row, flag, b_start, b_end in zip(rows, has_break, _iso(self.break_starts[lo:hi]),
+                                                 _iso(self.break_ends[lo:hi])):
+                if flag:
+                    row['break_start'] = b_start
+                    row['break_end'] = b_end
+        return rows
+
+    def holidays(self, start, end):
+        """区间内的工作日休市日"""
+        lo, hi = self._range(start, end)
+        days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+        weekdays = days[np.is_busday(days)].astype('datetime64[ns]').astype(np.int64)
+        return _day_str(weekdays[~np.isin(weekdays, self.days[lo:hi])])
+
+    def next_trading_days(self, start, n):
+        """start（含）之后的n个交易日"""
+        start_ns = _day_ns(start)
+        self._check(start_ns)
+        lo = np.searchsorted(self.days, start_ns, side='left')
+        return _day_str(self.days[lo:lo + min(n, MAX_ROWS)])
+
+
+class CalendarStore:
+    """市场日历常驻内存：首次使用时构建，此后所有查询直接命中"""
+
+    def __init__(self):
+        self._calendars = {}
+        self._lock = threading.Lock()
+
+    def get(self, market):
+        market = market.upper()
+        calendar = self._calendars.get(market)
+        if calendar is None:
+            with self._lock:
+                calendar = self._calendars.get(market)
+                if calendar is None:
+                    try:
+                        calendar = MarketCalendar(market)
+                    except RuntimeError:
+                        raise ValueError(f"未知市场: {market}")
+                    self._calendars[market] = calendar
+        return calendar
+
+    def loaded(self):
+        return sorted(self._calendars)
+
+
+def _param(params, name, default=None, required=False):
+    values = params.get(name)
+    if not values:
+        if required:
+            raise ValueError(f"缺少参数: {name}")
+        return default
+    return values[0]
+
+
+class CalendarService:
+    """交易日、交易时段、节假日和经济事件查询（与传输层无关，返回已编码的JSON字节）"""
+
+    def __init__(self, store=None, archive=None, cache_size=RESPONSE_CACHE_SIZE):
+        self.store = store or CalendarStore()
+        self.archive = archive or EventArchive()
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._events = (None, None)  # (归档文件签名, DataFrame)
+        self.stats = {'requests': 0, 'cache_hits': 0, 'errors': 0}
+        self.routes = {
+            '/trading_day': self.trading_day,
+            '/sessions': self.sessions,
+            '/holidays': self.holidays,
+            '/next_trading_days': self.next_trading_days,
+            '/events': self.events,
+        }
+
+    # ---------- 查询 ----------
+
+    def trading_day(self, params):
+        market = _param(params, 'market', 'NYSE')
+        dates = params.get('date') or [date.today().isoformat()]
+        if len(dates) > MAX_ROWS:
+            raise ValueError(f"单次最多查询{MAX_ROWS}个日期")
+        return {'market': market.upper(), 'results': self.store.get(market).is_trading_day(dates)}
+
+    def sessions(self, params):
+        market = _param(params, 'market', 'NYSE')
+        start = _param(params, 'start', required=True)
+        end = _param(params, 'end', start)
+        return {'market': market.upper(), 'sessions': self.store.get(market).sessions(start, end)}
+
+    def holidays(self, params):
+        market = _param(params, 'market', 'NYSE')
+        start = _param(params, 'start', required=True)
+        end = _param(params, 'end', required=True)
+        return {'market': market.upper(), 'holidays': self.store.get(market).holidays(start, end)}
+
+    def next_trading_days(self, params):
+        market = _param(params, 'market', 'NYSE')
+        start = _param(params, 'start', date.today().isoformat())
+        n = int(_param(params, 'n', 10))
+        return {'market': market.upper(), 'days': self.store.get(market).next_trading_days(start, n)}
+
+    def _archive_signature(self):
+        try:
+            stat = os.stat(self.archive.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _event_frame(self, signature):
+        if self._events[0] != signature or self._events[1] is None:
+            self._events = (signature, self.archive.load())
+        return self._events[1]
+
+    def events(self, params, signature=None):
+        events = self._event_frame(signature)
+        start = _param(params, 'start')
+        end = _param(params, 'end')
+        mask = np.ones(len(events), dtype=bool)
+        if start:
+            mask &= (events['timestamp'] >= pd.Timestamp(start, tz='UTC')).to_numpy()
+        if end:
+            mask &= (events['timestamp'] < pd.Timestamp(end, tz='UTC') + pd.Timedelta(days=1)).to_numpy()
+        for col in ('country', 'impact', 'title'):
+            values = params.get(col)
+            if values:
+                mask &= events[col].isin(values).to_numpy()
+        selected = events[mask].head(MAX_ROWS)
+        records = json.loads(selected.to_json(orient='records', date_format='iso'))
+        return {'count': int(mask.sum()), 'events': records}
+
+    # ---------- 分发与缓存 ----------
+
+    def handle(self, path, params):
+        """执行单个查询，返回 (状态码, JSON字节)；相同查询直接返回缓存的字节"""
+        self.stats['requests'] += 1
+        handler = self.routes.get(path)
+        if handler is None:
+            self.stats['errors'] += 1
+            return 404, _encode({'error': f"未知路径: {path}"})
+
+        # 日历查询结果不变；事件查询随归档文件签名失效
+        signature = self._archive_signature() if path == '/events' else None
+        key = (path, signature, tuple(sorted((k, tuple(v)) for k, v in params.items())))
+        body = self._cache.get(key)
+        if body is not None:
+            self._cache.move_to_end(key)
+            self.stats['cache_hits'] += 1
+            return 200, body
+
+        try:
+            result = handler(params, signature) if path == '/events' else handler(params)
+        except (ValueError, KeyError, TypeError) as e:
+            self.stats['errors'] += 1
+            return 400, _encode({'error': str(e)})
+
+        body = _encode(result)
+        self._cache[key] = body
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return 200, body
+
+    def handle_batch(self, payload):
+        """批量请求：{"requests": [{"path": ..., "params": {...}}, ...]}，逐项返回状态和结果"""
+        requests = payload.get('requests') if isinstance(payload, dict) else None
+        if not isinstance(requests, list):
+            return 400, _encode({'error': "请求体须为 {\"requests\": [...]}"})
+        if len(requests) > MAX_BATCH:
+            return 400, _encode({'error': f"单次批量最多{MAX_BATCH}个请求"})
+
+        parts = []
+        for item in requests:
+            params = (item.get('params') or {}) if isinstance(item, dict) else None
+            if not isinstance(params, dict) or not isinstance(item.get('path', ''), str):
+                # 单项格式错误只影响该项
+                self.stats['requests'] += 1
+                self.stats['errors'] += 1
+                status, body = 400, _encode({'error': "批量请求项须为 {\"path\": 字符串, \"params\": {...}}"})
+            else:
+                params = {k: v if isinstance(v, list) else [str(v)] for k, v in params.items()}
+                status, body = self.handle(item.get('path', ''), params)
+            parts.append(b'{"status":' + str(status).encode() + b',"body":' + body + b'}')
+        return 200, b'{"results":[' + b','.join(parts) + b']}'
+
+    def status(self):
+        return {'markets': self.store.loaded(), 'cache_entries': len(self._cache), **self.stats}
+
+
+def _encode(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class CalendarApp:
+    """ASGI 应用：GET 查询接口 + POST /batch 批量接口"""
+
+    def __init__(self, service=None, warm_markets=None):
+        self.service = service or CalendarService()
+        self.warm_markets = DEFAULT_MARKETS if warm_markets is None else warm_markets
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # 启动时在线程池中预热日历，之后的查询不再构建
+                loop = asyncio.get_event_loop()
+                await asyncio.gather(*[loop.run_in_executor(None, self.service.store.get, m)
+                                       for m in self.warm_markets])
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        path = scope['path'].rstrip('/') or '/'
+        method = scope['method']
+
+        if path == '/health':
+            status, body = 200, _encode(self.service.status())
+        elif path == '/batch' and method == 'POST':
+            raw = await _read_body(receive)
+            try:
+                payload = json.loads(raw or b'{}')
+            except ValueError:
+                status, body = 400, _encode({'error': "请求体不是有效的JSON"})
+            else:
+                status, body = self.service.handle_batch(payload)
+        elif method == 'GET':
+            params = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+            status, body = self.service.handle(path, params)
+        else:
+            status, body = 405, _encode({'error': f"不支持的方法: {method}"})
+
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json; charset=utf-8'),
+                        (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+async def _read_body(receive):
+    chunks = []
+    more = True
+    while more:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        more = message.get('more_body', False)
+    return b''.join(chunks)
+
+
+app = CalendarApp()
+
+
+if __name__ == "__main__":
+    try:
+        import uvicorn
+    except ImportError:
+        print("请先安装 uvicorn: pip install uvicorn")
+        sys.exit(1)
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else SERVICE_PORT
+    uvicorn.run(app, host=SERVICE_HOST, port=port, log_level='warning', access_log=False)
@@ -0,0 +1,67 @@
+import os
+
+import pandas as pd
+
+from event_schema import to_event_frame
+
+
+FEED_URL = "https://nfs.faireconomy.media/ff_calendar_thisweek.json"
+
+DEFAULT_ARCHIVE_PATH = os.environ.get(
+    'FX_EVENT_ARCHIVE',
+    os.path.join(os.path.expanduser('~'), '.fx_miniapps', 'event_archive.csv')
+)
+
+ARCHIVE_COLUMNS = ['timestamp', 'title', 'country', 'impact', 'forecast', 'previous', 'actual']
+ARCHIVE_KEY = ['timestamp', 'country', 'title']
+
+
+def normalize_feed(records):
+    """将数据源原始记录（JSON列表）规范化为统一结构的事件表，时间统一为UTC"""
+    df = pd.DataFrame(records)
+    if df.empty:
+        return to_event_frame(pd.DataFrame(columns=ARCHIVE_COLUMNS))
+
+    for col in ARCHIVE_COLUMNS:
+        if col not in df.columns and col != 'timestamp':
+            df[col] = None
+
+    # 原始时间为带时区偏移的ISO字符串（纽约时间）
+    df['timestamp'] = pd.to_datetime(df['date'], utc=True, errors='coerce')
+    df = df.dropna(subset=['timestamp'])
+    return to_event_frame(df[ARCHIVE_COLUMNS].sort_values('timestamp').reset_index(drop=True))
+
+
+class EventArchive:
+    """经济事件本地归档：每次拉取数据源后追加，按(时间, 国家, 标题)去重"""
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_ARCHIVE_PATH
+        self._loaded = None  # ((修改时间, 文件大小), DataFrame)
+
+    def load(self):
+        """读取全部归档事件（文件未变化时直接返回内存中的副本）"""
+        if not os.path.exists(self.path):
+            return to_event_frame(pd.DataFrame(columns=ARCHIVE_COLUMNS))
+
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if self._loaded is None or self._loaded[0] != signature:
+            df = pd.read_csv(self.path, dtype={'title': 'category', 'country': 'category',
+                                               'forecast': str, 'previous': str, 'actual': str})
+            self._loaded = (signature, to_event_frame(df))
+        return self._loaded[1].copy()
+
+    def append(self, events):
+        """追加事件（同一事件以最新记录为准），返回归档总数"""
+        if events.empty:
+            return len(self.load())
+        merged = pd.concat([self.load(), events[ARCHIVE_COLUMNS]], ignore_index=True)
+        merged = merged.drop_duplicates(subset=ARCHIVE_KEY, keep='last')
+        merged = merged.sort_values('timestamp').reset_index(drop=True)
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        merged.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+        return len(merged)
@@ -0,0 +1,274 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from event_archive import ARCHIVE_KEY
+from event_schema import IMPACT_LEVELS
+
+
+# 默认维度：两个分类维度 + 由时间派生的 星期 × 小时 × 月份
+CUBE_DIMENSIONS = ['country', 'impact', 'weekday', 'hour', 'month']
+# 度量：事件数、含预测值的事件数
+MEASURES = ['events', 'with_forecast']
+
+WEEKDAYS = list(range(7))
+HOURS = list(range(24))
+# 一周按小时分箱：slot = 星期(周一=0) × 24 + 小时
+HOUR_OF_WEEK_SLOTS = len(WEEKDAYS) * len(HOURS)
+
+
+def _month_label(code):
+    return f"{code // 12:04d}-{code % 12 + 1:02d}"
+
+
+class EventCube:
+    """事件统计立方体：分类维度 × 星期 × 小时 × 月份 的稠密计数数组，入库时构建、增量更新
+
+    统计与热力图只对立方体切片求和，耗时与事件数无关（多年归档同样即时）。
+    同一事件（按 key 列去重）重复到达只计一次；出现新的分类取值或月份时数组按需扩展。
+    """
+
+    def __init__(self, tz='UTC', categories=('country', 'impact'), time_col='timestamp', flag_col='forecast',
+                 key=ARCHIVE_KEY, levels=None):
+        self.tz = tz
+        self.categories = list(categories)
+        self.dimensions = self.categories + ['weekday', 'hour', 'month']
+        self.time_col = time_col
+        self.flag_col = flag_col
+        self.key = list(key) if key else None
+        self.levels = {name: [] for name in self.categories}
+        if 'impact' in self.levels:
+            self.levels['impact'] = list(IMPACT_LEVELS)
+        self.levels.update({name: list(values) for name, values in (levels or {}).items()})
+        self.first_month = None
+        self.n_months = 0
+        self._counts = np.zeros((len(MEASURES),) + self._shape(), dtype=np.int64)
+        self._seen = np.empty(0, dtype=np.uint64)
+        self._lock = threading.Lock()
+
+    def _shape(self):
+        return tuple(len(self.levels[name]) for name in self.categories) + (7, 24, self.n_months)
+
+    def __len__(self):
+        return int(self._counts[0].sum())
+
+    # ---------- 写入 ----------
+
+    def _grow(self, new_levels, month_lo, month_hi):
+        """按新的分类取值和月份范围扩展计数数组（已有计数位置不变）"""
+        pad = [(0, 0)]
+        for name in self.categories:
+            pad.append((0, len(new_levels[name]) - len(self.levels[name])))
+        pad += [(0, 0), (0, 0)]
+        if self.first_month is None:
+            first, last = month_lo, month_hi
+        else:
+            first = min(self.first_month, month_lo)
+            last = max(self.first_month + self.n_months - 1, month_hi)
+        left = 0 if self.first_month is None else self.first_month - first
+        pad.append((left, (last - first + 1) - self.n_months - left))
+        if any(p != (0, 0) for p in pad):
+            self._counts = np.pad(self._counts, pad)
+        self.levels = new_levels
+        self.first_month, self.n_months = first, last - first + 1
+
+    def add(self, events):
+        """加入新到达的事件（已计入的事件跳过），返回新增事件数"""
+        events = events.dropna(subset=[self.time_col])
+        if self.key:
+            hashes = pd.util.hash_pandas_object(events[self.key], index=False).to_numpy()
+            hashes, first = np.unique(hashes, return_index=True)
+            events = events.iloc[first]
+        if events.empty:
+            return 0
+
+        local = pd.DatetimeIndex(events[self.time_col])
+        local = local.tz_convert(self.tz) if local.tz is not None else local
+        weekday = local.dayofweek.to_numpy()
+        hour = local.hour.to_numpy()
+        month = (local.year.to_numpy() * 12 + local.month.to_numpy() - 1).astype(np.int64)
+
+        with self._lock:
+            if self.key:
+                # 已计入事件的哈希为有序数组（二分查找）；查重与写入在同一把锁内，并发加入同一事件只计一次
+                pos = np.minimum(np.searchsorted(self._seen, hashes), max(len(self._seen) - 1, 0))
+                fresh = ~(self._seen[pos] == hashes) if len(self._seen) else np.ones(len(hashes), dtype=bool)
+                if not fresh.all():
+                    events, hashes = events[fresh], hashes[fresh]
+                    weekday, hour, month = weekday[fresh], hour[fresh], month[fresh]
+                if events.empty:
+                    return 0
+
+            new_levels = {}
+            codes = []
+            for name in self.categories:
+                values = events[name].astype(str).to_numpy()
+                known = self.levels[name]
+                extra = set(pd.unique(values)) - set(known)
+                new_levels[name] = known + sorted(extra)
+                codes.append(pd.Categorical(values, categories=new_levels[name]).codes.astype(np.int64))
+            self._grow(new_levels, int(month.min()), int(month.max()))
+
+            index = np.ravel_multi_index(codes + [weekday, hour, month - self.first_month], self._shape())
+            size = int(np.prod(self._shape()))
+            flags = self._flags(events)
+            self._counts[0] += np.bincount(index, minlength=size).reshape(self._shape())
+            self._counts[1] += np.bincount(index, weights=flags, minlength=size).astype(np.int64).reshape(self._shape())
+            if self.key:
+                self._seen = np.insert(self._seen, np.searchsorted(self._seen, hashes), hashes)
+        return len(events)
+
+    def _flags(self, events):
+        if self.flag_col not in events.columns:
+            return np.zeros(len(events))
+        values = events[self.flag_col]
+        return (values.notna() & (values.astype(str).str.strip() != '')).to_numpy(dtype=float)
+
+    # ---------- 查询 ----------
+
+    def labels(self, dim):
+        """维度的全部取值（月份为 'YYYY-MM'）"""
+        if dim == 'weekday':
+            return WEEKDAYS
+        if dim == 'hour':
+            return HOURS
+        if dim == 'month':
+            return [] if self.first_month is None else \
+                [_month_label(self.first_month + i) for i in range(self.n_months)]
+        if dim in self.levels:
+            return self.levels[dim]
+        raise ValueError(f"未知维度: {dim}（可选 {', '.join(self.dimensions)}）")
+
+    def _select(self, measure, filters):
+        """按筛选条件（维度=取值或取值列表）切片，返回 (计数数组, 各维度取值标签)"""
+        if measure not in MEASURES:
+            raise ValueError(f"未知度量: {measure}（可选 {', '.join(MEASURES)}）")
+        unknown = set(filters) - set(self.dimensions)
+        if unknown:
+            raise ValueError(f"未知维度: {', '.join(sorted(unknown))}")
+        counts = self._counts[MEASURES.index(measure)]
+        labels = []
+        # 逐维取子集（花式索引不能同时用于多个维度）
+        for axis, dim in enumerate(self.dimensions):
+            dim_labels = self.labels(dim)
+            wanted = filters.get(dim)
+            if wanted is not None:
+                wanted = [wanted] if np.ndim(wanted) == 0 else list(wanted)
+                positions = {label: i for i, label in enumerate(dim_labels)}
+                dim_labels = [w for w in wanted if w in positions]
+                counts = counts.take([positions[w] for w in dim_labels], axis=axis)
+            labels.append(dim_labels)
+        return counts, labels
+
+    def total(self, measure='events', **filters):
+        """满足筛选条件的事件总数，如 total(country='USD', impact='High')"""
+        with self._lock:
+            return int(self._select(measure, filters)[0].sum())
+
+    def marginal(self, dim, measure='events', **filters):
+        """单个维度上的分布（Series，索引为维度取值，包含计数为0的取值）"""
+        with self._lock:
+            counts, labels = self._select(measure, filters)
+            axis = self.dimensions.index(dim)
+            other = tuple(i for i in range(counts.ndim) if i != axis)
+            return pd.Series(counts.sum(axis=other), index=pd.Index(labels[axis], name=dim), name=measure)
+
+    def table(self, rows, columns, measure='events', **filters):
+        """两个维度的交叉表（热力图数据）"""
+        with self._lock:
+            counts, labels = self._select(measure, filters)
+            r, c = self.dimensions.index(rows), self.dimensions.index(columns)
+            other = tuple(i for i in range(counts.ndim) if i not in (r, c))
+            matrix = counts.sum(axis=other)
+            if r > c:
+                matrix = matrix.T
+            return pd.DataFrame(matrix, index=pd.Index(labels[r], name=rows),
+                                columns=pd.Index(labels[c], name=columns))
+
+    def hour_of_week(self, measure='events', **filters):
+        """168个时段的计数数组（slot = 星期 × 24 + 小时），如 hour_of_week(country=['USD', 'EUR'], impact='High')"""
+        with self._lock:
+            counts, _ = self._select(measure, filters)
+            w, h = self.dimensions.index('weekday'), self.dimensions.index('hour')
+            other = tuple(i for i in range(counts.ndim) if i not in (w, h))
+            return counts.sum(axis=other).reshape(HOUR_OF_WEEK_SLOTS)
+
+    def recent_months(self, n):
+        """最近n个月的月份标签（用于按时间范围筛选）"""
+        return self.labels('month')[-n:] if n else []
+
+    def nbytes(self):
+        return int(self._counts.nbytes + self._seen.nbytes)
+
+
+def benchmark(n_rows=500000, batch=2000, seed=0):
+    """多年归档：入库构建 + 每周增量更新，统计查询 vs 每次从原始表重算"""
+    import time
+
+    from event_schema import _sample_feed, to_event_frame
+
+    events = to_event_frame(_sample_feed(n_rows, seed))
+    tz = 'Asia/Shanghai'
+
+    cube = EventCube(tz)
+    start = time.perf_counter()
+    cube.add(events.iloc[:-batch])
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    added = cube.add(events.iloc[-2 * batch:])  # 一半为已计入事件
+    incremental = time.perf_counter() - start
+    assert len(cube) == len(events.drop_duplicates(subset=ARCHIVE_KEY)) and added <= batch
+
+    def from_cube():
+        return (cube.total(country='USD', impact='High'),
+                cube.total('with_forecast', country='USD', impact='High'),
+                cube.marginal('weekday', country='USD', impact='High'),
+                cube.table('weekday', 'hour', impact='High'))
+
+    def from_raw():
+        df = events.drop_duplicates(subset=ARCHIVE_KEY)
+        usd = df[(df['country'] == 'USD') & (df['impact'] == 'High')]
+        local = usd['timestamp'].dt.tz_convert(tz)
+        high = df[df['impact'] == 'High']
+        high_local = high['timestamp'].dt.tz_convert(tz)
+        return (len(usd), int((usd['forecast'].notna() & (usd['forecast'] != '')).sum()),
+                local.dt.dayofweek.value_counts().sort_index(),
+                pd.crosstab(high_local.dt.dayofweek, high_local.dt.hour))
+
+    start = time.perf_counter()
+    cube_result = from_cube()
+    query = time.perf_counter() - start
+    start = time.perf_counter()
+    raw_result = from_raw()
+    raw = time.perf_counter() - start
+
+    assert cube_result[0] == raw_result[0] and cube_result[1] == raw_result[1]
+    assert (cube_result[2].to_numpy() == raw_result[2].reindex(WEEKDAYS, fill_value=0).to_numpy()).all()
+
+    # 一周168时段热力图：近3年、美元/欧元高影响
+    months = cube.recent_months(36)
+    start = time.perf_counter()
+    slots = cube.hour_of_week(country=['USD', 'EUR'], impact='High', month=months)
+    heatmap = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df = events.drop_duplicates(subset=ARCHIVE_KEY)
+    local = pd.DatetimeIndex(df['timestamp']).tz_convert(tz)
+    month_codes = local.year * 12 + local.month - 1
+    first = int(months[0][:4]) * 12 + int(months[0][5:]) - 1
+    keep = (df['country'].isin(['USD', 'EUR']).to_numpy() & (df['impact'] == 'High').to_numpy() &
+            (month_codes >= first))
+    raw_slots = np.bincount((local.dayofweek * 24 + local.hour)[keep], minlength=HOUR_OF_WEEK_SLOTS)
+    heatmap_raw = time.perf_counter() - start
+    assert (slots == raw_slots).all()
+
+    print(f"{len(cube):,}个事件  立方体 {cube.nbytes() / 1e6:.1f} MB  |  构建: {build:.2f} s  |  "
+          f"增量({2 * batch}条): {incremental * 1e3:.0f} ms")
+    print(f"统计查询  立方体: {query * 1e3:.1f} ms  |  原始表重算: {raw * 1e3:.0f} ms")
+    print(f"168时段热力图  立方体: {heatmap * 1e3:.1f} ms  |  原始时间戳重新分箱: {heatmap_raw * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
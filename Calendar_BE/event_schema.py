@@ -0,0 +1,133 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+# 文本列优先使用Arrow字符串（列式存储，无逐元素Python对象）
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = pd.StringDtype('pyarrow')
+except ImportError:
+    STRING_DTYPE = pd.StringDtype()
+
+
+# 数据源影响级别（由低到高）
+IMPACT_LEVELS = ['Non-Economic', 'Holiday', 'Low', 'Medium', 'High']
+# 内置事件重要性（由低到高）
+IMPORTANCE_LEVELS = ['low', 'medium', 'high', 'very_high']
+
+# 事件归档（数据源）统一结构：时间为UTC原生时间戳，低基数文本为分类，数值字符串保留原文
+EVENT_CATEGORICALS = ['title', 'country']
+EVENT_STRINGS = ['forecast', 'previous', 'actual']
+
+# 内置日历事件统一结构（MiniApp）
+CALENDAR_CATEGORICALS = ['category']
+CALENDAR_STRINGS = ['event', 'description']
+
+
+def ordered_category(values, levels):
+    """有序分类：已知级别按给定顺序，数据中出现的未知取值追加在最后（不丢弃）"""
+    values = pd.Series(values)
+    extra = sorted(set(values.dropna().unique()) - set(levels))
+    return values.astype(pd.CategoricalDtype(list(levels) + extra, ordered=True))
+
+
+def _cast(df, categoricals, strings):
+    for col in categoricals:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col in strings:
+        if col in df.columns:
+            df[col] = df[col].astype(STRING_DTYPE)
+    return df
+
+
+def to_event_frame(df):
+    """数据源/归档事件表 → 统一结构（timestamp为UTC时间戳，title/country/impact为分类）"""
+    df = df.copy()
+    if 'timestamp' in df.columns:
+        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+    if 'impact' in df.columns:
+        df['impact'] = ordered_category(df['impact'], IMPACT_LEVELS)
+    return _cast(df, EVENT_CATEGORICALS, EVENT_STRINGS)
+
+
+def to_calendar_frame(df):
+    """内置日历事件表 → 统一结构（date为时间戳，importance为有序分类）"""
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['date'])
+    if 'importance' in df.columns:
+        df['importance'] = ordered_category(df['importance'], IMPORTANCE_LEVELS)
+    return _cast(df, CALENDAR_CATEGORICALS, CALENDAR_STRINGS)
+
+
+def day_bounds(day, tz):
+    """某地日历日 [当日0点, 次日0点) 对应的UTC时间"""
+    start = pd.Timestamp(day).tz_localize(tz)
+    end = (pd.Timestamp(day) + pd.Timedelta(days=1)).tz_localize(tz)
+    return start.tz_convert('UTC'), end.tz_convert('UTC')
+
+
+def on_day(timestamps, day, tz):
+    """时间戳是否落在某地的某个日历日内（时间戳整数比较，不格式化字符串）"""
+    start, end = day_bounds(day, tz)
+    return (timestamps >= start) & (timestamps < end)
+
+
+def _sample_feed(n_rows, seed=0):
+    """模拟多年归档（数据源原始字符串结构）"""
+    rng = np.random.default_rng(seed)
+    titles = np.array([f'Indicator {i}' for i in range(400)], dtype=object)
+    countries = np.array(['USD', 'EUR', 'GBP', 'JPY', 'CNY', 'AUD', 'CAD', 'CHF', 'NZD'], dtype=object)
+    values = np.array(['0.1%', '0.2%', '-0.3%', '215K', '3.8%', '52.1', ''], dtype=object)
+    stamps = pd.Timestamp('2010-01-01', tz='UTC') + pd.to_timedelta(rng.integers(0, 16 * 365 * 48, n_rows) * 30,
+                                                                    unit='min')
+    return pd.DataFrame({
+        'timestamp': stamps,
+        'title': titles[rng.integers(0, len(titles), n_rows)],
+        'country': countries[rng.integers(0, len(countries), n_rows)],
+        'impact': np.array(IMPACT_LEVELS, dtype=object)[rng.integers(0, len(IMPACT_LEVELS), n_rows)],
+        'forecast': values[rng.integers(0, len(values), n_rows)],
+        'previous': values[rng.integers(0, len(values), n_rows)],
+        'actual': values[rng.integers(0, len(values), n_rows)],
+    })
+
+
+def benchmark(n_rows=500000, repeat=5):
+    """对比 object 字符串结构与统一结构的内存占用和常用筛选耗时"""
+    raw = _sample_feed(n_rows)
+    # 旧结构：时间提前格式化为北京时间字符串
+    local = raw['timestamp'].dt.tz_convert('Asia/Shanghai')
+    legacy = raw.drop(columns='timestamp').assign(date_only=local.dt.strftime('%Y-%m-%d'),
+                                                  time_only=local.dt.strftime('%H:%M'))
+    legacy = legacy.astype({c: object for c in legacy.columns})
+    canonical = to_event_frame(raw)
+
+    day = local.iloc[len(local) // 2].strftime('%Y-%m-%d')
+
+    def legacy_filter():
+        return legacy[(legacy['country'] == 'USD') & (legacy['impact'] == 'High') & (legacy['date_only'] == day)]
+
+    def canonical_filter():
+        mask = (canonical['country'] == 'USD') & (canonical['impact'] == 'High')
+        return canonical[mask & on_day(canonical['timestamp'], day, 'Asia/Shanghai')]
+
+    assert len(legacy_filter()) == len(canonical_filter())
+    legacy_mb = legacy.memory_usage(deep=True).sum() / 1e6
+    canonical_mb = canonical.memory_usage(deep=True).sum() / 1e6
+    legacy_s = min(_timed(legacy_filter) for _ in range(repeat))
+    canonical_s = min(_timed(canonical_filter) for _ in range(repeat))
+    print(f"行数: {n_rows:,}")
+    print(f"内存  object字符串: {legacy_mb:.1f} MB | 统一结构: {canonical_mb:.1f} MB ({legacy_mb / canonical_mb:.1f}x)")
+    print(f"筛选  object字符串: {legacy_s * 1e3:.1f} ms | 统一结构: {canonical_s * 1e3:.1f} ms "
+          f"({legacy_s / canonical_s:.1f}x)")
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    benchmark()
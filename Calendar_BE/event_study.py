@@ -0,0 +1,210 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from event_archive import EventArchive
+
+
+DEFAULT_PRICE_DIR = os.environ.get(
+    'FX_PRICE_DIR',
+    os.path.join(os.path.expanduser('~'), '.fx_miniapps', 'prices')
+)
+DEFAULT_CACHE_DIR = os.environ.get(
+    'FX_EVENT_STUDY_CACHE_DIR',
+    os.path.join(tempfile.gettempdir(), 'fx_event_study_cache')
+)
+
+# 事后观察窗口（分钟）
+DEFAULT_WINDOWS = {'5m': 5, '15m': 15, '60m': 60}
+# 事前窗口（分钟）
+PRE_WINDOW = 30
+# as-of 匹配容忍度（分钟）：超过该时长没有报价则视为缺失
+TOLERANCE = 5
+
+# 常用简称 → 数据源事件标题
+EVENT_TYPE_ALIASES = {
+    'NFP': 'Non-Farm Employment Change',
+    'CPI': 'CPI m/m',
+    'CORE_CPI': 'Core CPI m/m',
+    'FOMC': 'Federal Funds Rate',
+    'GDP': 'Advance GDP q/q',
+    'RETAIL_SALES': 'Retail Sales m/m',
+}
+
+
+def _to_ns(timestamps):
+    """UTC时间 → int64纳秒（与pandas版本及时间精度无关）"""
+    index = pd.DatetimeIndex(timestamps)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return np.asarray(index, dtype='datetime64[ns]').astype(np.int64)
+
+
+def load_price_series(pair, price_dir=None):
+    """读取本地日内报价（<pair>.csv，列: timestamp + price 或 bid/ask），返回UTC索引的价格序列"""
+    path = os.path.join(price_dir or DEFAULT_PRICE_DIR, f"{pair.upper()}.csv")
+    df = pd.read_csv(path)
+    if 'price' not in df.columns:
+        df['price'] = (df['bid'] + df['ask']) / 2
+    ts = pd.to_datetime(df['timestamp'], utc=True)
+    series = pd.Series(df['price'].to_numpy(dtype=float), index=ts, name=pair.upper())
+    series = series[~series.index.duplicated(keep='last')].sort_index()
+    return series
+
+
+def event_reactions(events, prices, windows=None, pre_window=PRE_WINDOW, tolerance=TOLERANCE):
+    """批量计算事件前后收益与已实现波动率（全部事件一次向量化完成）
+
+    events: 含UTC 'timestamp' 列的事件表
+    prices: UTC DatetimeIndex 的价格序列
+    收益与波动率单位均为基点(bps)。
+    """
+    windows = windows or DEFAULT_WINDOWS
+    events = events.sort_values('timestamp').reset_index(drop=True)
+    prices = prices.sort_index()
+    if prices.empty:
+        # 没有报价：返回列结构相同的空表
+        columns = ['price_t0', 'pre_ret_bps', 'pre_rv_bps'] + \
+            [f'{kind}_{name}_bps' for name in windows for kind in ('ret', 'rv')]
+        return events.iloc[:0].assign(**{col: np.empty(0) for col in columns})
+
+    ts_ns = _to_ns(prices.index)
+    px = prices.to_numpy(dtype=float)
+    tol_ns = int(tolerance * 60e9)
+
+    # 事件时刻报价：as-of 合并（取事件时刻及之前最近的报价）
+    quotes = pd.DataFrame({'quote_time': prices.index, 'pos': np.arange(len(px))})
+    base = pd.merge_asof(events, quotes, left_on='timestamp', right_on='quote_time',
+                         direction='backward', tolerance=pd.Timedelta(minutes=tolerance))
+    pos0 = base['pos'].to_numpy(dtype=float)
+    valid0 = ~np.isnan(pos0)
+    pos0 = np.where(valid0, pos0, 0).astype(np.int64)
+
+    # 所有窗口端点一次性 as-of 查找：(事件数, 窗口数) 的查询时间矩阵
+    offsets = np.array([-pre_window] + list(windows.values()), dtype=np.int64) * 60 * 10 ** 9
+    event_ns = _to_ns(events['timestamp'])
+    query = event_ns[:, None] + offsets[None, :]
+    pos = np.searchsorted(ts_ns, query, side='right') - 1
+    clipped = np.clip(pos, 0, len(ts_ns) - 1)
+    valid = (pos >= 0) & (query - ts_ns[clipped] <= tol_ns) & valid0[:, None]
+
+    # 已实现波动率：对数收益平方的累积和，区间波动率 = sqrt(差分)
+    log_px = np.log(px)
+    sq_cum = np.concatenate([[0.0], np.cumsum(np.diff(log_px) ** 2)])
+
+    p0 = log_px[pos0]
+    out = base[events.columns.tolist()].copy()
+    out['price_t0'] = np.where(valid0, px[pos0], np.nan)
+
+    pre_pos = clipped[:, 0]
+    out['pre_ret_bps'] = np.where(valid[:, 0], (p0 - log_px[pre_pos]) * 1e4, np.nan)
+    out['pre_rv_bps'] = np.where(valid[:, 0],
+                                 np.sqrt(np.maximum(sq_cum[pos0] - sq_cum[pre_pos], 0)) * 1e4, np.nan)
+
+    for j, name in enumerate(windows, start=1):
+        end = clipped[:, j]
+        out[f'ret_{name}_bps'] = np.where(valid[:, j], (log_px[end] - p0) * 1e4, np.nan)
+        out[f'rv_{name}_bps'] = np.where(valid[:, j],
+                                         np.sqrt(np.maximum(sq_cum[end] - sq_cum[pos0], 0)) * 1e4,
+                                         np.nan)
+    return out
+
+
+def summarize_reactions(reactions, by='title'):
+    """按事件类型汇总典型反应：样本数、平均/中位收益、平均绝对波动、平均已实现波动率"""
+    ret_cols = [c for c in reactions.columns if c.startswith('ret_')]
+    rv_cols = [c for c in reactions.columns if c.startswith('rv_')]
+    grouped = reactions.groupby(by, observed=True)
+
+    summary = grouped[ret_cols].agg(['count', 'mean', 'median'])
+    summary.columns = [f'{col}_{stat}' for col, stat in summary.columns]
+    abs_moves = reactions[ret_cols].abs().groupby(reactions[by], observed=True).mean()
+    abs_moves.columns = [f'{col}_abs_mean' for col in abs_moves.columns]
+    rv = grouped[rv_cols + ['pre_rv_bps']].mean()
+    return summary.join(abs_moves).join(rv)
+
+
+def resolve_event_type(event_type):
+    """简称转换为数据源事件标题"""
+    return EVENT_TYPE_ALIASES.get(event_type.upper(), event_type)
+
+
+class EventStudyCache:
+    """按(事件类型, 货币对)缓存事件研究结果：内存 + 磁盘两级"""
+
+    def __init__(self, cache_dir=None, archive=None, price_dir=None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.archive = archive or EventArchive()
+        self.price_dir = price_dir
+        self._memory = {}
+        self._prices = {}
+
+    def _fingerprint(self, events, prices, windows):
+        """数据指纹：事件或报价有新增、修订时自动失效（按内容哈希）"""
+        parts = [len(events), int(pd.util.hash_pandas_object(events, index=False).sum()),
+                 len(prices), int(pd.util.hash_pandas_object(prices, index=True).sum()),
+                 sorted(windows.items())]
+        return hashlib.sha256(pickle.dumps(parts)).hexdigest()[:16]
+
+    def _load_prices(self, pair):
+        if pair not in self._prices:
+            self._prices[pair] = load_price_series(pair, self.price_dir)
+        return self._prices[pair]
+
+    def study(self, event_type, pair, windows=None, impact='High'):
+        """单个(事件类型, 货币对)的逐事件反应表与汇总"""
+        windows = windows or DEFAULT_WINDOWS
+        title = resolve_event_type(event_type)
+        pair = pair.upper()
+
+        events = self.archive.load()
+        events = events[events['title'] == title]
+        if impact:
+            events = events[events['impact'] == impact]
+        prices = self._load_prices(pair)
+
+        key = (title, pair, self._fingerprint(events, prices, windows))
+        if key in self._memory:
+            return self._memory[key]
+
+        safe_title = ''.join(ch if ch.isalnum() else '_' for ch in title)
+        path = os.path.join(self.cache_dir, f"{safe_title}-{pair}-{key[2]}.pkl")
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+        else:
+            reactions = event_reactions(events, prices, windows)
+            result = {
+                'event_type': title,
+                'pair': pair,
+                'reactions': reactions,
+                'summary': summarize_reactions(reactions) if len(reactions) else pd.DataFrame(),
+            }
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path, 'wb') as f:
+                pickle.dump(result, f, protocol=4)
+
+        self._memory[key] = result
+        return result
+
+    def typical_move(self, event_type, pair, window='15m'):
+        """某类事件在某货币对上的典型波动（平均绝对收益、中位收益，单位bps）"""
+        result = self.study(event_type, pair)
+        reactions = result['reactions']
+        col = f'ret_{window}_bps'
+        if reactions.empty or col not in reactions or reactions[col].notna().sum() == 0:
+            return None
+        moves = reactions[col].dropna()
+        return {
+            'event_type': result['event_type'],
+            'pair': result['pair'],
+            'window': window,
+            'samples': int(len(moves)),
+            'abs_mean_bps': float(moves.abs().mean()),
+            'median_bps': float(moves.median()),
+            'rv_mean_bps': float(reactions[f'rv_{window}_bps'].mean()),
+        }
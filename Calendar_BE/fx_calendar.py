@@ -0,0 +1,143 @@
+from datetime import date, time
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import EasterMonday, GoodFriday
+
+from blackout import to_ns
+
+
+FX_CALENDAR_NAME = 'FX'
+FX_TZ = 'America/New_York'
+
+# 24×5：交易日D的时段为纽约时间 D-1 17:00 至 D 17:00（周一时段自周日17:00开始）
+FX_ROLL_TIME = time(17, 0)
+# 全球休市日（该交易日无时段）与提前收市日（纽约时间13:00收市）
+FX_CLOSED_DAYS = [(1, 1), (12, 25)]
+FX_EARLY_CLOSE_DAYS = [(12, 24), (12, 31)]
+FX_EARLY_CLOSE_TIME = time(13, 0)
+
+# 预计算范围：FX_PRECOMPUTE_START 至今后 FX_PRECOMPUTE_YEARS_AHEAD 年，范围外的查询现算
+FX_PRECOMPUTE_START = '2000-01-01'
+FX_PRECOMPUTE_YEARS_AHEAD = 10
+
+
+def _month_day_mask(days, month_days):
+    months = days.astype('datetime64[M]').astype(int) % 12 + 1
+    day_of_month = (days - days.astype('datetime64[M]')).astype(int) + 1
+    mask = np.zeros(len(days), dtype=bool)
+    for month, day in month_days:
+        mask |= (months == month) & (day_of_month == day)
+    return mask
+
+
+def _ny_instants(days, at):
+    """纽约当地日期 + 时刻 → UTC int64纳秒（夏令时由时区规则处理）"""
+    local = pd.DatetimeIndex(days.astype('datetime64[ns]')) + pd.Timedelta(hours=at.hour, minutes=at.minute)
+    return to_ns(local.tz_localize(FX_TZ))
+
+
+def build_fx_sessions(start, end):
+    """区间内FX交易日的时段数组：(交易日datetime64[D], 开盘ns, 收盘ns, 提前收市, 流动性稀薄)"""
+    days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+    days = days[np.is_busday(days) & ~_month_day_mask(days, FX_CLOSED_DAYS)]
+
+    early = _month_day_mask(days, FX_EARLY_CLOSE_DAYS)
+    opens = _ny_instants(days - 1, FX_ROLL_TIME)
+    closes = np.where(early, _ny_instants(days, FX_EARLY_CLOSE_TIME), _ny_instants(days, FX_ROLL_TIME))
+
+    # 主要金融中心普遍休假的交易日（耶稣受难日、复活节周一、节礼日）及提前收市日：报价稀疏、点差扩大
+    easter = np.concatenate([rule.dates(str(start), str(end)).values.astype('datetime64[D]')
+                             for rule in (GoodFriday, EasterMonday)])
+    thin = early | np.isin(days, easter) | _month_day_mask(days, [(12, 26)])
+    return days, opens, closes, early, thin
+
+
+class FXCalendar:
+    """外汇24×5交易日历：与交易所日历（pandas_market_calendars）相同的接口，时段预先计算为有序数组
+
+    schedule()/early_closes()/late_opens()/holidays() 可直接替换 mcal 日历对象使用，
+    交易日判断、未来N个交易日、时段重叠和风控禁区等逻辑无需区分外汇与交易所。
+    """
+
+    name = FX_CALENDAR_NAME
+    tz = FX_TZ
+    open_time = FX_ROLL_TIME
+    close_time = FX_ROLL_TIME
+
+    def __init__(self, start=FX_PRECOMPUTE_START, end=None):
+        self.start = np.datetime64(start, 'D')
+        self.end = np.datetime64(end or f"{date.today().year + FX_PRECOMPUTE_YEARS_AHEAD}-12-31", 'D')
+        self.days, self.opens, self.closes, self.early, self.thin = build_fx_sessions(self.start, self.end)
+
+    def _arrays(self, start_date, end_date):
+        start, end = np.datetime64(str(start_date)[:10], 'D'), np.datetime64(str(end_date)[:10], 'D')
+        if start < self.start or end > self.end:
+            return build_fx_sessions(start, end)
+        lo = np.searchsorted(self.days, start, side='left')
+        hi = np.searchsorted(self.days, end, side='right')
+        return self.days[lo:hi], self.opens[lo:hi], self.closes[lo:hi], self.early[lo:hi], self.thin[lo:hi]
+
+    def schedule(self, start_date, end_date, **kwargs):
+        """交易日程：索引为交易日，market_open/market_close为UTC时间（与mcal一致）"""
+        days, opens, closes, early, thin = self._arrays(start_date, end_date)
+        return pd.DataFrame({
+            'market_open': pd.to_datetime(opens, unit='ns', utc=True),
+            'market_close': pd.to_datetime(closes, unit='ns', utc=True),
+        }, index=pd.DatetimeIndex(days.astype('datetime64[ns]')))
+
+    def early_closes(self, schedule):
+        return schedule[np.isin(schedule.index.values.astype('datetime64[D]'), self.days[self.early])]
+
+    def late_opens(self, schedule):
+        return schedule.iloc[:0]
+
+    def thin_liquidity(self, schedule):
+        """流动性稀薄的交易日"""
+        return schedule[np.isin(schedule.index.values.astype('datetime64[D]'), self.days[self.thin])]
+
+    def holidays(self):
+        """全球休市的工作日（预计算范围内），返回类型与mcal一致（.holidays 为日期元组）"""
+        weekdays = np.arange(self.start, self.end + 1)
+        weekdays = weekdays[np.is_busday(weekdays)]
+        return pd.offsets.CustomBusinessDay(holidays=weekdays[_month_day_mask(weekdays, FX_CLOSED_DAYS)])
+
+    def is_open(self, when):
+        """单个时刻或时刻数组是否处于外汇交易时段（预计算范围内O(log n)，范围外与 schedule 一样现算）"""
+        scalar = np.ndim(when) == 0
+        t_ns = to_ns([when]) if scalar else to_ns(when)
+        opens, closes = self.opens, self.closes
+        if len(t_ns) and (t_ns.min() < opens[0] or t_ns.max() >= closes[-1]):
+            # 时刻t属于纽约日期为t当日或次日的交易日，按UTC日期前后各放宽一天
+            first = np.datetime64(int(t_ns.min()), 'ns').astype('datetime64[D]') - 1
+            last = np.datetime64(int(t_ns.max()), 'ns').astype('datetime64[D]') + 2
+            _, opens, closes, _, _ = self._arrays(first, last)
+        if not len(opens):
+            inside = np.zeros(len(t_ns), dtype=bool)
+        else:
+            idx = np.searchsorted(opens, t_ns, side='right') - 1
+            inside = (idx >= 0) & (t_ns < closes[np.maximum(idx, 0)])
+        return bool(inside[0]) if scalar else inside
+
+    def next_sessions(self, start_date, n):
+        """start_date（含）起的n个交易日（超出预计算范围时现算，始终返回n个）"""
+        start = np.datetime64(str(start_date)[:10], 'D')
+        # 每周至少4个交易日，2n+7个自然日足以覆盖n个交易日
+        days = self._arrays(start, start + np.timedelta64(2 * n + 7, 'D'))[0]
+        return pd.DatetimeIndex(days[:n].astype('datetime64[ns]'))
+
+
+_FX_CALENDAR = None
+
+
+def get_calendar(name):
+    """按名称获取日历：'FX' 为外汇24×5日历（进程内共享），其余交给 pandas_market_calendars"""
+    global _FX_CALENDAR
+    if str(name).upper() == FX_CALENDAR_NAME:
+        if _FX_CALENDAR is None:
+            _FX_CALENDAR = FXCalendar()
+        return _FX_CALENDAR
+
+    import pandas_market_calendars as mcal
+
+    return mcal.get_calendar(name)
@@ -0,0 +1,130 @@
+import functools
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+# 每个指标保留的最近样本数（环形缓冲区）
+RING_SIZE = 1024
+# 汇总输出的分位数
+QUANTILES = (0.5, 0.95, 0.99)
+# Prometheus 文本格式的指标名
+PROMETHEUS_METRIC = 'fx_apps_latency_seconds'
+PROMETHEUS_ERRORS = 'fx_apps_errors_total'
+
+
+class _Metric:
+    """单个埋点：最近RING_SIZE次耗时 + 累计调用数/总耗时/错误数"""
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+
+
+class Registry:
+    """耗时埋点注册表（线程安全，进程内共享）"""
+
+    def __init__(self, size=RING_SIZE):
+        self.size = size
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, error=False):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = _Metric(self.size)
+            metric.samples.append(seconds)
+            metric.count += 1
+            metric.total += seconds
+            metric.errors += int(error)
+
+    def timer(self, name):
+        """上下文管理器：with registry.timer('name'): ..."""
+        return _Timer(self, name)
+
+    def timed(self, name=None):
+        """装饰器：记录函数每次调用的耗时（抛出异常时计为错误）"""
+        def decorator(func):
+            metric_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with _Timer(self, metric_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def summary(self):
+        """各埋点汇总：调用数、错误数、均值与分位数（毫秒，基于环形缓冲区内的最近样本）"""
+        with self._lock:
+            snapshot = {name: (np.array(m.samples), m.count, m.total, m.errors)
+                        for name, m in self._metrics.items()}
+        result = {}
+        for name, (samples, count, total, errors) in sorted(snapshot.items()):
+            row = {'count': count, 'errors': errors, 'mean_ms': total / count * 1e3 if count else 0.0}
+            values = np.percentile(samples, [q * 100 for q in QUANTILES]) * 1e3 if len(samples) else [0.0] * 3
+            for q, value in zip(QUANTILES, values):
+                row[f'p{int(q * 100)}_ms'] = float(value)
+            row['max_ms'] = float(samples.max() * 1e3) if len(samples) else 0.0
+            result[name] = row
+        return result
+
+    def to_json(self):
+        return json.dumps(self.summary(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        """Prometheus 文本格式：耗时 summary 与错误数 counter 两个指标族，每族的样本连续输出"""
+        summary = self.summary()
+        labels = {name: name.replace('\\', '\\\\').replace('"', '\\"') for name in summary}
+        lines = [f"# HELP {PROMETHEUS_METRIC} Latency of instrumented hot paths.",
+                 f"# TYPE {PROMETHEUS_METRIC} summary"]
+        for name, row in summary.items():
+            label = labels[name]
+            for q in QUANTILES:
+                value = row[f'p{int(q * 100)}_ms'] / 1e3
+                lines.append(f'{PROMETHEUS_METRIC}{{name="{label}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{PROMETHEUS_METRIC}_sum{{name="{label}"}} {row["mean_ms"] * row["count"] / 1e3:.6f}')
+            lines.append(f'{PROMETHEUS_METRIC}_count{{name="{label}"}} {row["count"]}')
+        lines += [f"# HELP {PROMETHEUS_ERRORS} Exceptions raised in instrumented hot paths.",
+                  f"# TYPE {PROMETHEUS_ERRORS} counter"]
+        for name, row in summary.items():
+            lines.append(f'{PROMETHEUS_ERRORS}{{name="{labels[name]}"}} {row["errors"]}')
+        return '\n'.join(lines) + '\n'
+
+    def format_table(self):
+        """文本表格（命令行输出用）"""
+        rows = [f"{'埋点':<44s}{'次数':>8s}{'p50(ms)':>10s}{'p95(ms)':>10s}{'p99(ms)':>10s}"]
+        for name, row in self.summary().items():
+            rows.append(f"{name:<44s}{row['count']:>8d}{row['p50_ms']:>10.2f}"
+                        f"{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}")
+        return '\n'.join(rows)
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+
+class _Timer:
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.record(self.name, time.perf_counter() - self.start, error=exc_type is not None)
+        return False
+
+
+# 进程级默认注册表
+REGISTRY = Registry()
+timer = REGISTRY.timer
+timed = REGISTRY.timed
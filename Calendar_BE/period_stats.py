@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from schedule_cache import SCHEDULES
+
+
+# 聚合周期：键列（ISO周用ISO年，月/季用日历年，跨年区间不会把不同年份的同号周期合并）
+PERIODS = {
+    'W': ['iso_year', 'week'],
+    'M': ['year', 'month'],
+    'Q': ['year', 'quarter'],
+}
+
+SUMMARY_COLUMNS = ['trading_days', 'first_day', 'last_day']
+
+
+def period_keys(days, freq='W'):
+    """交易日 → 周期键列（DataFrame，行与days一一对应）"""
+    if freq not in PERIODS:
+        raise ValueError(f"不支持的周期: {freq}（可选 {', '.join(PERIODS)}）")
+    days = pd.DatetimeIndex(days)
+    if freq == 'W':
+        iso = days.isocalendar()
+        return pd.DataFrame({'iso_year': iso['year'].to_numpy(np.int32),
+                             'week': iso['week'].to_numpy(np.int8)})
+    sub = days.month if freq == 'M' else days.quarter
+    return pd.DataFrame({'year': days.year.to_numpy(np.int32), PERIODS[freq][1]: sub.to_numpy(np.int8)})
+
+
+def aggregate_trading_days(schedules, freq='W'):
+    """按市场、周期汇总交易日：交易日数、首个/最后一个交易日
+
+    schedules为 {市场: 日程}（日程索引为交易日），所有市场拼接后一次groupby完成。
+    """
+    if freq not in PERIODS:
+        raise ValueError(f"不支持的周期: {freq}（可选 {', '.join(PERIODS)}）")
+    markets = list(schedules)
+    days = [pd.DatetimeIndex(schedules[m].index) for m in markets]
+    sizes = [len(d) for d in days]
+    columns = ['market'] + PERIODS[freq] + SUMMARY_COLUMNS
+    if not sum(sizes):
+        return pd.DataFrame(columns=columns)
+
+    days = days[0].append(days[1:]) if len(days) > 1 else days[0]
+    frame = period_keys(days, freq)
+    frame.insert(0, 'market', pd.Categorical(np.repeat(markets, sizes), categories=markets))
+    frame['day'] = days.tz_localize(None) if days.tz is not None else days
+
+    result = frame.groupby(['market'] + PERIODS[freq], observed=True, sort=True)['day'].agg(
+        trading_days='size', first_day='min', last_day='max')
+    result = result.reset_index()
+    result['market'] = result['market'].astype(str)
+    return result[columns]
+
+
+def trading_day_summary(markets, start_date, end_date, freq='W'):
+    """多个市场在区间内的周期汇总（日程经区间缓存获取）"""
+    if isinstance(markets, str):
+        markets = [markets]
+    return aggregate_trading_days({m: SCHEDULES.schedule(m, start_date, end_date) for m in markets}, freq)
+
+
+def benchmark(start='2005-01-01', end='2024-12-31'):
+    """多市场20年周/月/季汇总：一次groupby vs 按周数的字典循环"""
+    import time
+
+    markets = ['NYSE', 'LSE', 'JPX', 'XHKG', 'FX']
+    schedules = {m: SCHEDULES.schedule(m, start, end) for m in markets}
+
+    start_t = time.perf_counter()
+    summaries = {freq: aggregate_trading_days(schedules, freq) for freq in PERIODS}
+    vectorized = time.perf_counter() - start_t
+
+    # 对照：get_market_calendar_simple 原有写法（按 (ISO年, 周) 修正键后逐日循环）
+    start_t = time.perf_counter()
+    loop = {}
+    for market, schedule in schedules.items():
+        for day in schedule.index:
+            iso_year, week, _ = day.isocalendar()
+            loop.setdefault((market, iso_year, week), []).append(day)
+    looped = time.perf_counter() - start_t
+
+    weekly = summaries['W']
+    assert len(weekly) == len(loop) and weekly['trading_days'].sum() == sum(map(len, loop.values()))
+    rows = sum(len(s) for s in schedules.values())
+    print(f"{len(markets)}个市场 {rows:,}个交易日  周/月/季汇总: {vectorized * 1e3:.0f} ms  |  "
+          f"逐日字典循环(仅周): {looped * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
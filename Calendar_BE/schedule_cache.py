@@ -0,0 +1,128 @@
+import threading
+
+import pandas as pd
+
+from fx_calendar import get_calendar
+
+
+# 查询与已覆盖区间相距不超过该天数时补齐间隙并合并，更远的查询单独计算为新区间
+MERGE_GAP = pd.Timedelta(days=31)
+
+
+class _Covered:
+    """单个市场已计算的一段连续日期区间及其日程"""
+
+    def __init__(self, start, end, frame):
+        self.start = start
+        self.end = end
+        self.frame = frame
+
+
+class ScheduleCache:
+    """按市场缓存交易日程的已覆盖区间：区间内的查询直接切片，相邻查询只计算缺失部分并合并
+
+    每个市场保存若干互不相交的已覆盖区间。最近30天、未来90天、单日等相互重叠的查询共享同一份日程；
+    与已覆盖区间相距较远的查询（如十几年后的两天）单独计算为新区间，不会计算中间的整段间隙。
+    返回已缓存日程的切片（Copy-on-Write 视图，调用方修改时才复制）。
+    """
+
+    def __init__(self):
+        self._calendars = {}
+        self._covered = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'extensions': 0, 'misses': 0, 'computed_days': 0}
+
+    def calendar(self, market):
+        """日历对象（按市场缓存）"""
+        calendar = self._calendars.get(market)
+        if calendar is None:
+            calendar = self._calendars[market] = get_calendar(market)
+        return calendar
+
+    def _compute(self, market, start, end):
+        self.stats['computed_days'] += (end - start).days + 1
+        return self.calendar(market).schedule(start_date=start.strftime('%Y-%m-%d'),
+                                              end_date=end.strftime('%Y-%m-%d'))
+
+    def _merge(self, market, start, end, nearby):
+        """用查询区间和邻近的已覆盖区间合并出一个新区间，只计算其中未覆盖的部分"""
+        first = min([start] + [seg.start for seg in nearby])
+        last = max([end] + [seg.end for seg in nearby])
+        parts = []
+        cursor = first
+        for seg in nearby:
+            if seg.start > cursor:
+                parts.append(self._compute(market, cursor, seg.start - pd.Timedelta(days=1)))
+            parts.append(seg.frame)
+            cursor = seg.end + pd.Timedelta(days=1)
+        if cursor <= last:
+            parts.append(self._compute(market, cursor, last))
+        frames = [part for part in parts if len(part)] or parts[:1]
+        return _Covered(first, last, pd.concat(frames) if len(frames) > 1 else frames[0])
+
+    def schedule(self, market, start_date, end_date):
+        """与 calendar.schedule(start_date, end_date) 相同的结果（两端均含）"""
+        start = pd.Timestamp(start_date).normalize()
+        end = pd.Timestamp(end_date).normalize()
+        if start > end:
+            raise ValueError("start_date must be before or equal to end_date.")
+
+        with self._lock:
+            segments = self._covered.setdefault(market, [])
+            covering = next((seg for seg in segments if seg.start <= start and end <= seg.end), None)
+            if covering is not None:
+                self.stats['hits'] += 1
+            else:
+                nearby = [seg for seg in segments
+                          if seg.end >= start - MERGE_GAP and seg.start <= end + MERGE_GAP]
+                self.stats['extensions' if nearby else 'misses'] += 1
+                covering = self._merge(market, start, end, nearby)
+                segments[:] = sorted([seg for seg in segments if seg not in nearby] + [covering],
+                                     key=lambda seg: seg.start)
+            frame = covering.frame
+
+        return frame.loc[start:end]
+
+    def clear(self):
+        with self._lock:
+            self._covered.clear()
+
+
+# 进程级共享缓存
+SCHEDULES = ScheduleCache()
+
+
+def benchmark(market='NYSE', repeat=200):
+    """典型查询序列（近30天、未来90天、逐日检查、未来N个交易日）：区间缓存 vs 每次调用 calendar.schedule"""
+    import time
+
+    today = pd.Timestamp('2024-06-14')
+    queries = [(today - pd.Timedelta(days=30), today), (today, today + pd.Timedelta(days=90))]
+    queries += [(day, day) for day in pd.date_range(today - pd.Timedelta(days=20), periods=40)]
+    queries = queries * (repeat // len(queries) + 1)
+
+    calendar = get_calendar(market)
+    start = time.perf_counter()
+    direct = [calendar.schedule(start_date=s.strftime('%Y-%m-%d'), end_date=e.strftime('%Y-%m-%d'))
+              for s, e in queries[:repeat]]
+    uncached = time.perf_counter() - start
+
+    cache = ScheduleCache()
+    cache._calendars[market] = calendar  # 共用已初始化的日历对象，只比较日程计算
+    start = time.perf_counter()
+    cached = [cache.schedule(market, s, e) for s, e in queries[:repeat]]
+    elapsed = time.perf_counter() - start
+
+    for a, b in zip(direct, cached):
+        assert a.index.equals(b.index) and (a.empty or (a.values == b.values).all())
+
+    # 远期查询单独成段，只计算查询本身的天数
+    computed = cache.stats['computed_days']
+    far = today + pd.DateOffset(years=14)
+    cache.schedule(market, far, far + pd.Timedelta(days=2))
+    assert cache.stats['computed_days'] - computed == 3
+    print(f"{repeat}次查询  直接计算: {uncached * 1e3:.0f} ms  |  区间缓存: {elapsed * 1e3:.0f} ms  |  {cache.stats}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+from blackout import session_intervals, to_ns
+
+
+SESSION_COLUMNS = ['market_open', 'break_start', 'break_end', 'market_close']
+
+
+def session_table(schedule, calendar):
+    """逐日交易时段表（UTC）：开收盘、午休起止，及提前收市/推迟开市标记
+
+    schedule为 calendar.schedule(...) 的结果，整段日期一次向量化生成；
+    无午休的市场或当日（如半日市）break_start/break_end 为NaT。
+    """
+    table = pd.DataFrame(index=schedule.index)
+    for col in SESSION_COLUMNS:
+        values = schedule[col] if col in schedule.columns else pd.NaT
+        table[col] = pd.Series(values, index=schedule.index, dtype='datetime64[ns, UTC]')
+
+    has_break = (table['break_start'] < table['break_end']).to_numpy()
+    table.loc[~has_break, ['break_start', 'break_end']] = pd.NaT
+    table['has_break'] = has_break
+
+    # 提前收市/推迟开市由日历的特殊时段规则判定（与常规时段随年份的变化无关）
+    if len(schedule):
+        table['early_close'] = table.index.isin(calendar.early_closes(schedule).index)
+        table['late_open'] = table.index.isin(calendar.late_opens(schedule).index)
+    else:
+        table['early_close'] = table['late_open'] = False
+
+    open_minutes = (table['market_close'] - table['market_open']).dt.total_seconds() / 60
+    break_minutes = (table['break_end'] - table['break_start']).dt.total_seconds().fillna(0) / 60
+    table['trading_minutes'] = (open_minutes - break_minutes).astype(int)
+    return table
+
+
+class MarketSessions:
+    """市场逐日交易时段：展开为有序不重叠区间，任意时刻（可批量）是否开市查询O(log n)"""
+
+    def __init__(self, table, tz='UTC'):
+        self.table = table
+        self.tz = tz
+        self.starts, self.ends = session_intervals(table)
+
+    @classmethod
+    def from_calendar(cls, calendar, start_date, end_date, schedule=None):
+        if schedule is None:
+            schedule = calendar.schedule(start_date=start_date, end_date=end_date)
+        return cls(session_table(schedule, calendar), tz=str(calendar.tz))
+
+    def __len__(self):
+        return len(self.table)
+
+    def is_open(self, when):
+        """单个时刻或时刻数组（可达数百万个）是否处于交易时段（午休、提前收市后均为休市）"""
+        scalar = np.ndim(when) == 0
+        t_ns = to_ns([when]) if scalar else to_ns(when)
+        idx = np.searchsorted(self.starts, t_ns, side='right') - 1
+        if len(self.starts) == 0:
+            inside = np.zeros(len(t_ns), dtype=bool)
+        else:
+            inside = (idx >= 0) & (t_ns < self.ends[np.maximum(idx, 0)])
+        return bool(inside[0]) if scalar else inside
+
+    def local_times(self):
+        """各交易日开收盘/午休的当地时间（HH:MM字符串，无午休为None）"""
+        local = pd.DataFrame(index=self.table.index)
+        for col in SESSION_COLUMNS:
+            times = self.table[col].dt.tz_convert(self.tz).dt.strftime('%H:%M')
+            local[col] = times.where(self.table[col].notna(), None)
+        return local
+
+    def regular_hours(self):
+        """常规交易时间（正常交易日中最常见的当地开收盘与午休时间），无交易日时返回None"""
+        if self.table.empty:
+            return None
+        regular = ~(self.table['early_close'] | self.table['late_open'])
+        if not regular.any():
+            regular[:] = True
+
+        local = self.local_times()[regular.to_numpy()]
+        hours = {'open': local['market_open'].mode()[0], 'close': local['market_close'].mode()[0],
+                 'break': None}
+        breaks = local['break_start'].dropna()
+        if len(breaks):
+            hours['break'] = (breaks.mode()[0], local['break_end'].dropna().mode()[0])
+        return hours
+
+    def special_days(self):
+        """提前收市/推迟开市的交易日（当地开收盘时间）"""
+        special = (self.table['early_close'] | self.table['late_open']).to_numpy()
+        local = self.local_times()[special]
+        local['early_close'] = self.table['early_close'][special]
+        local['late_open'] = self.table['late_open'][special]
+        return local[['market_open', 'market_close', 'early_close', 'late_open']]
+
+
+def format_hours(hours):
+    """常规交易时间显示文本，如 '09:30-12:00, 13:00-16:00'"""
+    if hours is None:
+        return "无交易日"
+    # 开盘时刻不早于收盘时刻即跨日时段（如外汇前一日17:00开盘）
+    open_time = hours['open'] if hours['open'] < hours['close'] else f"{hours['open']}(前一日)"
+    if hours['break']:
+        return f"{open_time}-{hours['break'][0]}, {hours['break'][1]}-{hours['close']}"
+    return f"{open_time}-{hours['close']}"
+
+
+def benchmark(market='XHKG', n=5_000_000, seed=0):
+    """二十余年交易时段上批量查询n个随机时刻（is_open vs 逐个在日程中查找）"""
+    import time
+
+    import pandas_market_calendars as mcal
+
+    calendar = mcal.get_calendar(market)
+    start = time.perf_counter()
+    sessions = MarketSessions.from_calendar(calendar, '2000-01-01', '2024-12-31')
+    build = time.perf_counter() - start
+
+    rng = np.random.default_rng(seed)
+    lo, hi = to_ns(['2000-01-01', '2025-01-01'])
+    queries = pd.to_datetime(rng.integers(lo, hi, n), utc=True)
+
+    start = time.perf_counter()
+    hits = sessions.is_open(queries)
+    vectorized = time.perf_counter() - start
+
+    # 对照：逐个时刻按日期查日程行再比较（取前1万个估算）
+    sample = queries[:10_000]
+    table = sessions.table
+    start = time.perf_counter()
+    slow = []
+    for t in sample:
+        day = t.tz_convert(sessions.tz).normalize().tz_localize(None)
+        if day not in table.index:
+            slow.append(False)
+            continue
+        row = table.loc[day]
+        in_break = row['has_break'] and row['break_start'] <= t < row['break_end']
+        slow.append(bool(row['market_open'] <= t < row['market_close'] and not in_break))
+    loop = (time.perf_counter() - start) * n / len(sample)
+
+    assert slow == hits[:len(sample)].tolist()
+    print(f"{market}: {len(sessions):,}个交易日，{len(sessions.starts):,}个时段，构建 {build * 1e3:.0f} ms")
+    print(f"{n:,}个时刻  is_open: {vectorized * 1e3:.0f} ms  |  逐个查找(估算): {loop:.0f} s  |  "
+          f"开市占比 {hits.mean():.1%}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,149 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+# 数值后缀 → 倍数（百分号保留原数值，单位另列）
+SUFFIX_SCALE = {'': 1.0, '%': 1.0, 'K': 1e3, 'M': 1e6, 'B': 1e9, 'T': 1e12}
+VALUE_PATTERN = r'^\s*[<>]?\s*([-+]?\d*\.?\d+)\s*([KMBT%]?)\s*$'
+
+# 标准化意外值的滚动窗口（按同类事件的发布次数）
+ZSCORE_WINDOW = 20
+ZSCORE_MIN_PERIODS = 5
+# 国家意外指数的指数衰减系数（每次发布）
+INDEX_ALPHA = 0.1
+
+EVENT_KEY = ['country', 'title']
+
+
+def parse_values(values):
+    """将 "3.2%"、"215K"、"-0.5%"、"<0.1%" 等字符串批量转换为浮点数
+
+    返回 (数值Series, 单位Series)；无法解析的值为NaN。
+    历史数据中取值高度重复，只对去重后的字符串做正则解析，再按编码回填。
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    s = pd.Series(uniques, dtype=object).astype('string').str.replace(',', '', regex=False)
+    parts = s.str.upper().str.extract(VALUE_PATTERN)
+    number = pd.to_numeric(parts[0], errors='coerce').to_numpy(dtype=float)
+    unit = parts[1].fillna('').to_numpy(dtype=object)
+    scale = np.array([SUFFIX_SCALE[u] for u in unit], dtype=float)
+
+    parsed = np.append(number * scale, np.nan)  # 末位对应缺失值（编码-1）
+    units = np.append(unit, '')
+    return pd.Series(parsed[codes]), pd.Series(units[codes], dtype=object)
+
+
+def compute_surprises(events, window=ZSCORE_WINDOW, min_periods=ZSCORE_MIN_PERIODS):
+    """在事件归档上批量计算意外值与标准化意外（z值）
+
+    实际值缺失时，用同类事件下一次发布的前值回填（数据源本周文件不含实际值）。
+    z值只使用该事件之前的历史意外值，不含未来信息。
+    """
+    df = events.sort_values('timestamp').reset_index(drop=True).copy()
+    df['forecast_value'], df['unit'] = parse_values(df['forecast'])
+    df['previous_value'], _ = parse_values(df['previous'])
+    actual_col = df['actual'] if 'actual' in df.columns else pd.Series(np.nan, index=df.index)
+    df['actual_value'], _ = parse_values(actual_col)
+
+    grouped = df.groupby(EVENT_KEY, sort=False, observed=True)
+    next_previous = grouped['previous_value'].shift(-1)
+    df['actual_value'] = df['actual_value'].fillna(next_previous)
+
+    df['surprise'] = df['actual_value'] - df['forecast_value']
+    df['expected_change'] = df['forecast_value'] - df['previous_value']
+
+    # 仅在有意外值的发布序列上滚动，与 SurpriseIndex 的增量口径一致
+    valid = df.loc[df['surprise'].notna(), EVENT_KEY + ['surprise']]
+    group_id = valid.groupby(EVENT_KEY, sort=False, observed=True).ngroup()
+    past = valid['surprise'].groupby(group_id).shift(1)
+    rolling = past.groupby(group_id).rolling(window, min_periods=min_periods)
+    mean = rolling.mean().droplevel(0)
+    std = rolling.std().droplevel(0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (valid['surprise'] - mean) / std
+    df['surprise_z'] = z.replace([np.inf, -np.inf], np.nan).reindex(df.index)
+    return df
+
+
+class _RunningStats:
+    """最近N个值的滑动均值/标准差
+
+    窗口很小（N=20），每次直接由窗口内的值计算（O(N)），不维护累计和与平方和：
+    后者在长序列上相消误差累积，与批量 rolling().std() 的结果会逐渐偏离。
+    """
+
+    def __init__(self, window):
+        self.values = deque(maxlen=window)
+
+    def push(self, value):
+        self.values.append(value)
+
+    def zscore(self, value, min_periods):
+        n = len(self.values)
+        if n < max(min_periods, 2):
+            return np.nan
+        window = np.fromiter(self.values, dtype=float, count=n)
+        if window.min() == window.max():  # 标准差为0，与批量口径一致返回NaN
+            return np.nan
+        return (value - window.mean()) / window.std(ddof=1)
+
+
+class SurpriseIndex:
+    """增量意外指数：新数据发布时O(1)更新同类事件的z值和国家意外指数"""
+
+    def __init__(self, window=ZSCORE_WINDOW, min_periods=ZSCORE_MIN_PERIODS, alpha=INDEX_ALPHA):
+        self.window = window
+        self.min_periods = min_periods
+        self.alpha = alpha
+        self.stats = {}
+        self.country_index = {}
+        self.latest = {}
+
+    @classmethod
+    def from_archive(cls, events, **kwargs):
+        """用历史归档预热：批量计算后直接装载每类事件最近window个意外值和国家指数"""
+        index = cls(**kwargs)
+        df = compute_surprises(events, index.window, index.min_periods)
+        df = df.dropna(subset=['surprise'])
+
+        for (country, title), tail in df.groupby(EVENT_KEY, sort=False, observed=True).tail(index.window) \
+                .groupby(EVENT_KEY, sort=False, observed=True):
+            stats = index.stats[(country, title)] = _RunningStats(index.window)
+            for value in tail['surprise']:
+                stats.push(value)
+            last = tail.iloc[-1]
+            index.latest[(country, title)] = {'surprise': last['surprise'],
+                                              'surprise_z': last['surprise_z']}
+
+        # 国家指数 = Σ α(1-α)^k · z（k为距最新一次发布的次数），与逐条递推等价
+        scored = df.dropna(subset=['surprise_z'])
+        lag = scored.groupby('country', observed=True).cumcount(ascending=False)
+        weighted = index.alpha * (1 - index.alpha) ** lag * scored['surprise_z']
+        index.country_index = weighted.groupby(scored['country'], observed=True).sum().to_dict()
+        return index
+
+    def _apply(self, country, title, surprise, z):
+        key = (country, title)
+        self.stats.setdefault(key, _RunningStats(self.window)).push(surprise)
+        if not np.isnan(z):
+            prev = self.country_index.get(country, 0.0)
+            self.country_index[country] = (1 - self.alpha) * prev + self.alpha * z
+        self.latest[key] = {'surprise': surprise, 'surprise_z': z}
+
+    def update(self, country, title, actual, forecast):
+        """新发布一条数据（实际值/预测值可为原始字符串），返回其标准化意外值"""
+        values, _ = parse_values([actual, forecast])
+        surprise = values.iloc[0] - values.iloc[1]
+        if np.isnan(surprise):
+            return np.nan
+        stats = self.stats.get((country, title))
+        z = stats.zscore(surprise, self.min_periods) if stats else np.nan
+        self._apply(country, title, surprise, z)
+        return z
+
+    def snapshot(self):
+        """各事件最新意外值表"""
+        rows = [{'country': k[0], 'title': k[1], **v} for k, v in self.latest.items()]
+        return pd.DataFrame(rows, columns=['country', 'title', 'surprise', 'surprise_z'])
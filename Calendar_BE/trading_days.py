@@ -0,0 +1,147 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from calendar_service import CalendarStore
+
+
+# 判定原因代码（int8）
+TRADING, WEEKEND, HOLIDAY, OUT_OF_RANGE, INVALID = range(5)
+REASONS = np.array(['trading', 'weekend', 'holiday', 'out_of_range', 'invalid'])
+
+# 流式模式每批处理的行数
+STREAM_CHUNK = 100_000
+
+_DAY_NS = 86_400 * 10 ** 9
+
+
+def parse_dates(values):
+    """日期字符串/日期数组 → int64纳秒（当日0点），无法解析的日期为int64最小值（NaT）"""
+    values = np.asarray(values)
+    if values.dtype.kind != 'M':
+        try:
+            values = values.astype('datetime64[D]')
+        except ValueError:
+            values = pd.to_datetime(pd.Series(values), errors='coerce').to_numpy()
+    return values.astype('datetime64[D]').astype('datetime64[ns]').astype(np.int64)
+
+
+class TradingDayChecker:
+    """批量交易日判定：各市场交易日为常驻内存的有序数组，一次二分查找完成整批分类"""
+
+    def __init__(self, store=None):
+        self.store = store or CalendarStore()
+
+    def _classify(self, calendar, day_ns):
+        reasons = np.full(len(day_ns), HOLIDAY, dtype=np.int8)
+        pos = np.searchsorted(calendar.days, day_ns)
+        hit = (pos < len(calendar.days)) & (calendar.days[np.minimum(pos, len(calendar.days) - 1)] == day_ns)
+        reasons[hit] = TRADING
+
+        # 1970-01-01为周四：(天数 + 3) % 7 得到周一=0 … 周日=6
+        weekday = (day_ns // _DAY_NS + 3) % 7
+        reasons[~hit & (weekday >= 5)] = WEEKEND
+        reasons[(day_ns < calendar.first) | (day_ns > calendar.last)] = OUT_OF_RANGE
+        reasons[day_ns == np.iinfo(np.int64).min] = INVALID
+        return reasons
+
+    def check(self, dates, markets='NYSE'):
+        """dates为日期数组，markets为单个市场或等长的市场数组；返回 (是否交易日, 原因代码)"""
+        day_ns = parse_dates(np.atleast_1d(dates))
+        if np.ndim(markets) == 0:
+            reasons = self._classify(self.store.get(str(markets)), day_ns)
+        else:
+            market_codes, market_values = pd.factorize(np.asarray(markets))
+            if len(market_codes) != len(day_ns):
+                raise ValueError("markets 与 dates 长度不一致")
+            reasons = np.empty(len(day_ns), dtype=np.int8)
+            for code, market in enumerate(market_values):
+                rows = market_codes == code
+                reasons[rows] = self._classify(self.store.get(str(market)), day_ns[rows])
+        return reasons == TRADING, reasons
+
+    def check_frame(self, dates, markets='NYSE'):
+        """check() 的结果表（date, market, is_trading, reason）"""
+        is_trading, reasons = self.check(dates, markets)
+        return pd.DataFrame({
+            'date': np.atleast_1d(dates),
+            'market': markets if np.ndim(markets) else np.full(len(reasons), markets),
+            'is_trading': is_trading,
+            'reason': REASONS[reasons],
+        })
+
+    def stream(self, source, market=None, chunk_size=STREAM_CHUNK):
+        """逐批判定文本（文件路径或文件对象，每行 '日期' 或 '市场,日期'），每批产出一个结果表，内存占用与输入规模无关
+
+        market不为None时每行只有日期；空行跳过。
+        """
+        names = ['date'] if market is not None else ['market', 'date']
+        reader = pd.read_csv(source, header=None, names=names, dtype=str, chunksize=chunk_size,
+                             skipinitialspace=True)
+        for chunk in reader:
+            dates = chunk['date'].fillna('').to_numpy()
+            markets = market if market is not None else chunk['market'].to_numpy()
+            yield self.check_frame(dates, markets)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量交易日判定（流式读取，CSV输出到标准输出）")
+    parser.add_argument('path', nargs='?', default='-', help="输入文件，每行 '日期' 或 '市场,日期'；'-'为标准输入")
+    parser.add_argument('--market', help="所有行使用同一市场（此时每行只有日期）")
+    parser.add_argument('--chunk', type=int, default=STREAM_CHUNK, help="每批行数")
+    parser.add_argument('--benchmark', action='store_true', help="运行性能对比后退出")
+    args = parser.parse_args(argv)
+    if args.benchmark:
+        benchmark()
+        return 0
+
+    source = sys.stdin if args.path == '-' else args.path
+    checker = TradingDayChecker()
+    try:
+        for i, frame in enumerate(checker.stream(source, market=args.market, chunk_size=args.chunk)):
+            frame.to_csv(sys.stdout, index=False, header=(i == 0))
+    except (OSError, ValueError) as e:
+        print(f"判定失败: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def benchmark(n=5_000_000, seed=0):
+    """n个(市场, 日期)批量判定 vs 逐个构建日程判定"""
+    import time
+
+    from fx_calendar import get_calendar
+
+    markets = ['NYSE', 'LSE', 'JPX', 'XHKG', 'FX']
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64('2005-01-01') + rng.integers(0, 365 * 20, n)
+    market_col = np.array(markets)[rng.integers(0, len(markets), n)]
+
+    checker = TradingDayChecker()
+    start = time.perf_counter()
+    for market in markets:
+        checker.store.get(market)
+    warmup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    is_trading, reasons = checker.check(dates, market_col)
+    vectorized = time.perf_counter() - start
+
+    # 对照：check_trading_day_simple 的做法（每个日期构建一次日程），取前200个估算
+    sample = 200
+    start = time.perf_counter()
+    slow = [not get_calendar(m).schedule(start_date=str(d), end_date=str(d)).empty
+            for d, m in zip(dates[:sample], market_col[:sample])]
+    loop = (time.perf_counter() - start) * n / sample
+
+    assert slow == is_trading[:sample].tolist()
+    counts = pd.Series(REASONS[reasons]).value_counts().to_dict()
+    print(f"日历预热（{len(markets)}个市场）: {warmup:.2f} s")
+    print(f"{n:,}个(市场, 日期)  批量: {vectorized * 1e3:.0f} ms  |  逐个(估算): {loop / 3600:.1f} h")
+    print(f"分类: {counts}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
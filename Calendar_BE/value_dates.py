@@ -0,0 +1,198 @@
+import re
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from calendar_service import CALENDAR_START, CALENDAR_YEARS_AHEAD
+
+
+# 各货币结算假日所参照的交易所日历（以当地主要市场休市日近似清算假日）
+CURRENCY_CALENDARS = {
+    'USD': 'SIFMAUS',
+    'EUR': 'EUREX',
+    'GBP': 'LSE',
+    'JPY': 'JPX',
+    'CHF': 'SIX',
+    'CAD': 'TSX',
+    'AUD': 'ASX',
+    'NZD': 'XNZE',
+    'HKD': 'XHKG',
+    'CNY': 'SSE',
+    'SGD': 'XSES',
+}
+
+# 即期交割天数：默认T+2，美元/加元为T+1
+DEFAULT_SPOT_LAG = 2
+SPOT_LAGS = {'USDCAD': 1}
+
+TENOR_PATTERN = re.compile(r'^(\d+)([DWMY])$')
+
+
+def _pair(pair):
+    """'EUR/USD'、'eurusd' → 'EURUSD'"""
+    pair = str(pair).replace('/', '').upper()
+    if len(pair) != 6:
+        raise ValueError(f"无效货币对: {pair}")
+    return pair
+
+
+def parse_tenor(tenor):
+    """期限 → (月数, 天数)：SPOT=(0, 0)，1W=(0, 7)，3M=(3, 0)，1Y=(12, 0)"""
+    tenor = str(tenor).upper()
+    if tenor in ('SPOT', 'SP'):
+        return 0, 0
+    match = TENOR_PATTERN.match(tenor)
+    if match is None:
+        raise ValueError(f"无效期限: {tenor}")
+    n, unit = int(match.group(1)), match.group(2)
+    return {'D': (0, n), 'W': (0, 7 * n), 'M': (n, 0), 'Y': (12 * n, 0)}[unit]
+
+
+def add_months(days, months):
+    """datetime64[D] 数组加月数（目标月无对应日时取月末，如1月31日+1M → 2月末）"""
+    month = days.astype('datetime64[M]')
+    day_of_month = days - month.astype('datetime64[D]')
+    target = month + months
+    month_length = (target + 1).astype('datetime64[D]') - target.astype('datetime64[D]')
+    return target.astype('datetime64[D]') + np.minimum(day_of_month, month_length - 1)
+
+
+class ValueDateEngine:
+    """外汇起息日计算：即期T+2（或T+1）与远期期限，跳过两种货币及美元的假日
+
+    - 即期：在非美元货币的假日日历上数交割天数，结果再顺延至所有相关货币（含美元）的营业日
+    - 远期：即期日加期限后按修正后续（modified following）调整；即期为月末最后营业日时远期也取月末最后营业日
+    每个货币对的合并假日只构建一次（np.busdaycalendar），批量计算按货币对分组整体向量化。
+    """
+
+    def __init__(self, start=CALENDAR_START, end=None):
+        self.start = np.datetime64(start, 'D')
+        self.end = np.datetime64(end or f"{date.today().year + CALENDAR_YEARS_AHEAD}-12-31", 'D')
+        self._holidays = {}
+        self._busdaycals = {}
+        self._lock = threading.Lock()
+
+    def holidays(self, currency):
+        """单个货币在日历范围内的工作日假日（datetime64[D]）"""
+        currency = currency.upper()
+        holidays = self._holidays.get(currency)
+        if holidays is None:
+            if currency not in CURRENCY_CALENDARS:
+                raise ValueError(f"不支持的货币: {currency}")
+            import pandas_market_calendars as mcal
+
+            schedule = mcal.get_calendar(CURRENCY_CALENDARS[currency]).schedule(
+                start_date=str(self.start), end_date=str(self.end))
+            sessions = schedule.index.values.astype('datetime64[D]')
+            days = np.arange(self.start, self.end + 1)
+            weekdays = days[np.is_busday(days)]
+            holidays = weekdays[~np.isin(weekdays, sessions)]
+            self._holidays[currency] = holidays
+        return holidays
+
+    def busdaycalendar(self, currencies):
+        """多个货币合并假日的营业日历（按货币组合缓存）"""
+        key = tuple(sorted(set(currencies)))
+        calendar = self._busdaycals.get(key)
+        if calendar is None:
+            with self._lock:
+                calendar = self._busdaycals.get(key)
+                if calendar is None:
+                    merged = np.unique(np.concatenate([self.holidays(c) for c in key]))
+                    calendar = self._busdaycals[key] = np.busdaycalendar(holidays=merged)
+        return calendar
+
+    def _pair_calendars(self, pair):
+        """(数交割天数用的日历, 起息日须满足的结算日历)"""
+        base, quote = pair[:3], pair[3:]
+        lag_currencies = [c for c in (base, quote) if c != 'USD'] or ['USD']
+        return self.busdaycalendar(lag_currencies), self.busdaycalendar([base, quote, 'USD'])
+
+    def _check(self, days):
+        if len(days) and (days.min() < self.start or days.max() > self.end):
+            raise ValueError(f"日期超出假日日历范围 {self.start} ~ {self.end}")
+
+    def spot_dates(self, trade_dates, pairs):
+        """批量即期起息日"""
+        return self.value_dates(trade_dates, pairs, 'SPOT')
+
+    def value_dates(self, trade_dates, pairs, tenors):
+        """批量起息日：trade_dates/pairs/tenors 为等长数组或标量（自动广播），返回datetime64[D]数组"""
+        trade_dates = np.atleast_1d(trade_dates)
+        if trade_dates.dtype.kind != 'M':
+            trade_dates = pd.DatetimeIndex(trade_dates).values
+        trade_dates = trade_dates.astype('datetime64[D]')
+        trade_dates, pairs, tenors = np.broadcast_arrays(trade_dates, np.atleast_1d(pairs), np.atleast_1d(tenors))
+        self._check(trade_dates)
+
+        # 期限只解析去重后的取值
+        tenor_codes, tenor_values = pd.factorize(tenors.ravel())
+        parsed = np.array([parse_tenor(t) for t in tenor_values], dtype=np.int64).reshape(-1, 2)
+        months, extra_days = parsed[tenor_codes, 0], parsed[tenor_codes, 1]
+
+        pair_codes, pair_values = pd.factorize(pairs.ravel())
+        result = np.empty(len(trade_dates), dtype='datetime64[D]')
+        for code, pair in enumerate(pair_values):
+            pair = _pair(pair)
+            rows = pair_codes == code
+            lag_cal, settle_cal = self._pair_calendars(pair)
+            lag = SPOT_LAGS.get(pair, DEFAULT_SPOT_LAG)
+
+            spot = np.busday_offset(trade_dates[rows], lag, roll='forward', busdaycal=lag_cal)
+            spot = np.busday_offset(spot, 0, roll='forward', busdaycal=settle_cal)
+
+            m, d = months[rows], extra_days[rows]
+            target = add_months(spot, m) + d
+            value = np.busday_offset(target, 0, roll='modifiedfollowing', busdaycal=settle_cal)
+
+            # 月末规则：即期为当月最后营业日时，按月的期限取目标月最后营业日
+            spot_month = spot.astype('datetime64[M]')
+            end_of_month = (m > 0) & (np.busday_offset(spot, 1, busdaycal=settle_cal).astype('datetime64[M]')
+                                      != spot_month)
+            if end_of_month.any():
+                next_month = (spot_month[end_of_month] + m[end_of_month] + 1).astype('datetime64[D]')
+                value[end_of_month] = np.busday_offset(next_month - 1, 0, roll='backward', busdaycal=settle_cal)
+
+            result[rows] = value
+
+        self._check(result)
+        return result
+
+
+def benchmark(n=2_000_000, seed=0):
+    """n行(交易日, 货币对, 期限)批量计算 vs 逐行计算"""
+    import time
+
+    engine = ValueDateEngine()
+    pairs = ['EURUSD', 'USDJPY', 'GBPUSD', 'USDCAD', 'AUDUSD', 'EURGBP', 'EURJPY', 'USDCNY', 'USDHKD']
+    tenors = ['SPOT', '1W', '1M', '3M', '1Y']
+    rng = np.random.default_rng(seed)
+    trade_dates = np.datetime64('2005-01-01') + rng.integers(0, 365 * 20, n)
+    pair_col = np.array(pairs)[rng.integers(0, len(pairs), n)]
+    tenor_col = np.array(tenors)[rng.integers(0, len(tenors), n)]
+
+    start = time.perf_counter()
+    for pair in pairs:
+        engine._pair_calendars(pair)
+    warmup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    values = engine.value_dates(trade_dates, pair_col, tenor_col)
+    vectorized = time.perf_counter() - start
+
+    # 对照：逐行调用（取前2万行估算）
+    sample = 20_000
+    start = time.perf_counter()
+    slow = [engine.value_dates(t, p, k)[0] for t, p, k in
+            zip(trade_dates[:sample], pair_col[:sample], tenor_col[:sample])]
+    loop = (time.perf_counter() - start) * n / sample
+
+    assert np.array_equal(np.array(slow), values[:sample])
+    print(f"假日日历构建（{len(engine._holidays)}种货币）: {warmup:.2f} s")
+    print(f"{n:,}行  批量: {vectorized * 1e3:.0f} ms  |  逐行(估算): {loop:.0f} s")
+
+
+if __name__ == "__main__":
+    benchmark()
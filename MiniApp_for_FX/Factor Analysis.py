@@ -1,21 +1,131 @@
-import requests
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-from scipy import stats
+import os
+import sys
 import warnings
+from functools import partial
+
+# 后端模块位于 Calendar_BE 目录
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Calendar_BE'))
+
+from instrumentation import REGISTRY
+from chart_rendering import figure_data, render_factor_report
+from factor_pipeline import ReportPipeline
+from factor_scenarios import ScenarioEngine, fit_factor_model
+from technical_indicators import StreamingIndicators, compute_indicators
 
 warnings.filterwarnings('ignore')
 
+# 数据获取阶段的缓存有效期（秒），与MiniApp的数据缓存保持一致
+FETCH_TTL = 600
+
+# 基本面因子类别（各自对应一个数据获取阶段）
+FACTOR_CATEGORIES = ('macro', 'monetary', 'sentiment', 'political')
+
+# 情景模拟参数：路径数、模拟期限（交易日）、随机种子（None为非复现模式）
+SCENARIO_PATHS = 20000
+SCENARIO_HORIZON = 63
+SCENARIO_SEED = 42
+
 
 class USDCNYFactorAnalyzer:
     """美元人民币影响因子深度挖掘系统"""
 
-    def __init__(self):
+    def __init__(self, cache_dir=None, use_cache=True, max_workers=4, price_series=None,
+                 window=None, lag=0, factors=None):
+        self.window = window  # 参与分析的最近期数（None为全部历史）
+        self.lag = lag  # 因子相对USDCNY的领先期数
+        self.factor_subset = tuple(factors) if factors else None
         self.factors_data = {}
+        self.price_series = price_series
+        self.streaming = None
         self.correlation_matrix = None
         self.importance_ranking = None
+        self.factor_panel = None
+        self.factor_model = None
+        self.stage_timings = []
+        self.pipeline = self._build_pipeline(cache_dir, use_cache, max_workers)
+
+    def _build_pipeline(self, cache_dir, use_cache, max_workers):
+        """构建报告依赖图：获取 → 面板 → 相关性/模型 → 状态 → 情景
+
+        每个阶段读取的上游结果均声明为依赖，并以参数形式传入（缓存键覆盖全部输入）；
+        on_result 只负责把结果发布到分析器属性，供报告和图表读取。
+        """
+        pipeline = ReportPipeline(cache_dir=cache_dir, max_workers=max_workers,
+                                  use_cache=use_cache, on_timing=self._emit_stage_timing)
+
+        # 五类数据获取互不依赖，并行执行
+        pipeline.add_stage('macro', self.fetch_macro_economic_data, ttl=FETCH_TTL,
+                           on_result=partial(self._store_factors, 'macro'))
+        pipeline.add_stage('monetary', self.fetch_monetary_policy_data, ttl=FETCH_TTL,
+                           on_result=partial(self._store_factors, 'monetary'))
+        pipeline.add_stage('sentiment', self.fetch_market_sentiment_data, ttl=FETCH_TTL,
+                           on_result=partial(self._store_factors, 'sentiment'))
+        pipeline.add_stage('political', self.fetch_political_geopolitical_data, ttl=FETCH_TTL,
+                           on_result=partial(self._store_factors, 'political'))
+        # 价格序列可能由调用方传入或随tick更新，不做缓存；其内容哈希决定技术因子是否重算
+        pipeline.add_stage('prices', self.fetch_price_series, cache=False,
+                           on_result=self._store_prices)
+        pipeline.add_stage('technical', self.fetch_technical_factors, deps=('prices',),
+                           on_result=partial(self._store_factors, 'technical'))
+
+        # 分析阶段
+        pipeline.add_stage('panel', self.build_factor_panel,
+                           on_result=partial(setattr, self, 'factor_panel'))
+        pipeline.add_stage('correlations', self.calculate_factor_correlations,
+                           deps=('panel',),
+                           params={'window': self.window, 'lag': self.lag,
+                                   'factors': self.factor_subset},
+                           on_result=partial(setattr, self, 'correlation_matrix'))
+        pipeline.add_stage('model', self.fit_factor_model, deps=('panel',),
+                           params={'window': self.window, 'factors': self.factor_subset},
+                           on_result=partial(setattr, self, 'factor_model'))
+        pipeline.add_stage('causality', self.perform_granger_causality_test)
+        pipeline.add_stage('importance', self.calculate_factor_importance,
+                           on_result=partial(setattr, self, 'importance_ranking'))
+        pipeline.add_stage('regimes', self.perform_regime_analysis, deps=('monetary', 'sentiment'))
+        pipeline.add_stage('interactions', self.generate_interaction_effects)
+        pipeline.add_stage('scenarios', self._create_scenarios,
+                           deps=('model', 'technical') + FACTOR_CATEGORIES,
+                           params={'n_paths': SCENARIO_PATHS, 'horizon': SCENARIO_HORIZON,
+                                   'seed': SCENARIO_SEED})
+        return pipeline
+
+    @property
+    def price_series(self):
+        """当前价格序列（含逐笔追加的tick；为缓冲区视图），未设置时为None"""
+        return None if self._prices is None else self._prices[:self._n_prices]
+
+    @price_series.setter
+    def price_series(self, prices):
+        if prices is None:
+            self._prices, self._n_prices = None, 0
+        else:
+            self._prices = np.array(prices, dtype=float)
+            self._n_prices = len(self._prices)
+
+    def _store_prices(self, prices):
+        """价格阶段结果回写：只在尚无价格序列时保存（不覆盖期间到达的tick）"""
+        if self.price_series is None:
+            self.price_series = prices
+
+    def _store_factors(self, category, factors):
+        """阶段结果回写（缓存命中时同样需要恢复状态）"""
+        self.factors_data[category] = factors
+
+    def _emit_stage_timing(self, timing):
+        """输出单个阶段耗时"""
+        self.stage_timings.append(timing)
+        suffix = '.cached' if timing['cached'] else ''
+        REGISTRY.record(f"FactorAnalysis.stage.{timing['stage']}{suffix}", timing['seconds'])
+        flag = '（缓存命中）' if timing['cached'] else ''
+        print(f"   ⏱️ {timing['stage']}: {timing['seconds'] * 1000:.1f} ms{flag}")
+
+    def run_stages(self, targets=None):
+        """执行指定阶段及其上游，返回各阶段结果"""
+        return self.pipeline.run(targets)
 
     def fetch_macro_economic_data(self):
         """获取宏观经济因子数据"""
@@ -32,7 +142,6 @@ class USDCNYFactorAnalyzer:
             'trade_balance': {'current': -682, 'prev': -655, 'trend': '赤字扩大'},  # 中美贸易差额
         }
 
-        self.factors_data['macro'] = macro_factors
         return macro_factors
 
     def fetch_monetary_policy_data(self):
@@ -49,7 +158,6 @@ class USDCNYFactorAnalyzer:
             'pboc_reserve_ratio': {'current': 7.4, 'prev': 7.4, 'trend': '稳定'},  # 中国存款准备金率
         }
 
-        self.factors_data['monetary'] = monetary_factors
         return monetary_factors
 
     def fetch_market_sentiment_data(self):
@@ -65,7 +173,6 @@ class USDCNYFactorAnalyzer:
             'capital_flows': {'current': 'outflow_cn', 'prev': 'inflow', 'trend': '流出'},  # 资本流动
         }
 
-        self.factors_data['sentiment'] = sentiment_factors
         return sentiment_factors
 
     def fetch_political_geopolitical_data(self):
@@ -80,43 +187,68 @@ class USDCNYFactorAnalyzer:
             'global_alliances': {'us_strength': 'strong', 'cn_outreach': 'expanding', 'impact': 'complex'},  # 全球联盟
         }
 
-        self.factors_data['political'] = political_factors
         return political_factors
 
-    def fetch_technical_factors(self):
-        """获取技术分析因子"""
+    def fetch_price_series(self):
+        """获取USDCNY价格序列"""
+        if self.price_series is not None:
+            return self.price_series.copy()
+
+        print("💹 获取USDCNY价格序列...")
+
+        # 这里模拟一年日线数据（终点对齐当前价7.1850），实际应用中需要连接行情API
+        rng = np.random.default_rng(9)
+        log_path = np.cumsum(rng.normal(0.0001, 0.002, 250))
+        prices = 7.1850 * np.exp(log_path - log_path[-1])
+        return prices
+
+    def fetch_technical_factors(self, prices=None):
+        """获取技术分析因子（由价格序列计算）"""
         print("📉 获取技术分析因子数据...")
 
-        technical_factors = {
-            'usdcny_price': {'current': 7.1850, 'ma20': 7.1650, 'ma50': 7.1500, 'trend': 'uptrend'},
-            'rsi_14': {'value': 62, 'signal': 'neutral_bullish', 'overbought': False},
-            'macd': {'value': 0.0025, 'signal': 0.0018, 'histogram': 0.0007, 'trend': 'bullish'},
-            'bollinger_bands': {'upper': 7.2100, 'middle': 7.1750, 'lower': 7.1400, 'width': 'expanding'},
-            'support_levels': [7.1500, 7.1200, 7.0800],
-            'resistance_levels': [7.2000, 7.2300, 7.2500],
-            'volume_trend': {'current': 'increasing', 'avg_ratio': 1.2},
-        }
+        if prices is None:
+            prices = self.fetch_price_series()
 
+        return compute_indicators(prices)
+
+    def on_tick(self, price, volume=None):
+        """逐笔更新技术因子（每个tick均摊O(1)），返回最新技术因子
+
+        tick同时追加到价格缓冲区（容量不足时翻倍），下次报告时 prices 阶段哈希变化，technical 阶段随之重算。
+        """
+        if self.streaming is None:
+            if self.price_series is None:
+                self.price_series = self.fetch_price_series()
+            self.streaming = StreamingIndicators.from_history(self.price_series)
+
+        self.streaming.update(price, volume)
+        if self._n_prices == len(self._prices):
+            grown = np.empty(max(2 * len(self._prices), 1))
+            grown[:self._n_prices] = self._prices
+            self._prices = grown
+        self._prices[self._n_prices] = price
+        self._n_prices += 1
+        technical_factors = self.streaming.snapshot()
         self.factors_data['technical'] = technical_factors
         return technical_factors
 
-    def calculate_factor_correlations(self):
-        """计算因子相关性矩阵"""
-        print("\n🔗 计算因子相关性...")
+    def build_factor_panel(self):
+        """构建因子历史面板"""
+        print("\n🗂️ 构建因子历史面板...")
 
-        # 创建模拟历史数据（实际应用应从数据库获取）
-        np.random.seed(42)
+        # 创建模拟历史数据（实际应用应从数据库获取）；独立随机数生成器，不改动全局随机状态
+        rng = np.random.default_rng(42)
         n_periods = 100
 
         # 模拟各因子对USDCNY的影响
         factors = {
-            'interest_rate_diff': np.random.normal(2.5, 0.3, n_periods),  # 中美利差
-            'inflation_diff': np.random.normal(3.0, 0.5, n_periods),  # 通胀差
-            'trade_balance': np.random.normal(-600, 100, n_periods),  # 贸易差额
-            'dxy_index': np.random.normal(104, 2, n_periods),  # 美元指数
-            'risk_appetite': np.random.uniform(0.3, 0.8, n_periods),  # 风险偏好
-            'capital_flows': np.random.normal(-10, 5, n_periods),  # 资本流动
-            'political_tension': np.random.uniform(0, 1, n_periods),  # 政治紧张度
+            'interest_rate_diff': rng.normal(2.5, 0.3, n_periods),  # 中美利差
+            'inflation_diff': rng.normal(3.0, 0.5, n_periods),  # 通胀差
+            'trade_balance': rng.normal(-600, 100, n_periods),  # 贸易差额
+            'dxy_index': rng.normal(104, 2, n_periods),  # 美元指数
+            'risk_appetite': rng.uniform(0.3, 0.8, n_periods),  # 风险偏好
+            'capital_flows': rng.normal(-10, 5, n_periods),  # 资本流动
+            'political_tension': rng.uniform(0, 1, n_periods),  # 政治紧张度
         }
 
         # 模拟USDCNY汇率（基于因子线性组合加上噪声）
@@ -129,18 +261,65 @@ class USDCNYFactorAnalyzer:
                 -0.1 * factors['risk_appetite'] +
                 -0.005 * factors['capital_flows'] +
                 0.05 * factors['political_tension'] +
-                np.random.normal(0, 0.01, n_periods)
+                rng.normal(0, 0.01, n_periods)
         )
 
         # 创建DataFrame
         df = pd.DataFrame(factors)
         df['usdcny'] = usdcny
+        return df
+
+    def _select_panel(self, panel=None, window=None, factors=None):
+        """按因子子集和最近期数截取面板（未传入面板时使用分析器当前面板）"""
+        if panel is None:
+            if self.factor_panel is None:
+                self.factor_panel = self.build_factor_panel()
+            panel = self.factor_panel
+
+        if factors:
+            panel = panel[list(factors) + ['usdcny']]
+        if window:
+            panel = panel.tail(window)
+        return panel
+
+    def calculate_factor_correlations(self, window=None, lag=0, factors=None, panel=None):
+        """计算因子相关性矩阵（lag>0时为因子领先USDCNY lag期的相关性）"""
+        print("\n🔗 计算因子相关性...")
 
-        # 计算相关系数
-        correlation_matrix = df.corr()
-        self.correlation_matrix = correlation_matrix
+        panel = self._select_panel(panel, window, factors)
+        if lag:
+            factor_cols = [c for c in panel.columns if c != 'usdcny']
+            panel = panel[factor_cols].shift(lag).join(panel['usdcny']).dropna()
 
-        return correlation_matrix
+        # 计算相关系数
+        return panel.corr()
+
+    def fit_factor_model(self, window=None, factors=None, panel=None):
+        """拟合USDCNY线性因子模型（供情景模拟使用）"""
+        print("\n📐 拟合因子模型...")
+
+        panel = self._select_panel(panel, window, factors)
+        return fit_factor_model(panel, target='usdcny')
+
+    @staticmethod
+    def _current_factor_values(macro, monetary, sentiment, political):
+        """从获取的各类因子数据中提取模型因子的当前值"""
+        current = {}
+        if 'interest_rate_diff' in monetary:
+            current['interest_rate_diff'] = monetary['interest_rate_diff']['current']
+        if 'us_inflation' in macro and 'cn_inflation' in macro:
+            current['inflation_diff'] = macro['us_inflation']['current'] - macro['cn_inflation']['current']
+        if 'trade_balance' in macro:
+            current['trade_balance'] = macro['trade_balance']['current']
+        if 'dxy_index' in sentiment:
+            current['dxy_index'] = sentiment['dxy_index']['current']
+        if 'risk_appetite' in sentiment:
+            current['risk_appetite'] = sentiment['risk_appetite']['current']
+        if 'us_china_tensions' in political:
+            tension_levels = {'low': 0.2, 'medium': 0.5, 'high': 0.8}
+            current['political_tension'] = tension_levels.get(political['us_china_tensions']['level'])
+        # capital_flows 目前只有定性描述，使用历史均值
+        return current
 
     def perform_granger_causality_test(self):
         """执行格兰杰因果关系检验（简化的模拟版本）"""
@@ -176,13 +355,9 @@ class USDCNYFactorAnalyzer:
         }
 
         # 排序
-        sorted_importance = dict(sorted(importance_scores.items(),
-                                        key=lambda x: x[1], reverse=True))
+        return dict(sorted(importance_scores.items(), key=lambda x: x[1], reverse=True))
 
-        self.importance_ranking = sorted_importance
-        return sorted_importance
-
-    def perform_regime_analysis(self):
+    def perform_regime_analysis(self, monetary=None, sentiment=None):
         """执行状态识别分析（不同市场环境下的因子表现）"""
         print("\n🔄 市场状态识别分析...")
 
@@ -214,19 +389,24 @@ class USDCNYFactorAnalyzer:
         }
 
         # 判断当前市场状态
-        current_regime = self._identify_current_regime()
+        if monetary is None or sentiment is None:
+            fetched = self.run_stages(['monetary', 'sentiment'])
+            monetary, sentiment = fetched['monetary'], fetched['sentiment']
+        current_regime = self._identify_current_regime(monetary, sentiment)
         regimes['current_regime'] = current_regime
 
         return regimes
 
-    def _identify_current_regime(self):
+    @staticmethod
+    def _identify_current_regime(monetary, sentiment):
         """识别当前市场状态"""
         # 基于多个指标的综合判断
+        dxy = sentiment['dxy_index']
         indicators = {
-            'volatility_index': 15.2,  # 低波动
-            'risk_appetite': 0.65,  # 中等风险偏好
-            'interest_rate_diff': 2.68,  # 利差扩大
-            'dxy_trend': 'rising',  # 美元走强
+            'volatility_index': sentiment['volatility_index']['current'],  # 波动率
+            'risk_appetite': sentiment['risk_appetite']['current'],  # 风险偏好
+            'interest_rate_diff': monetary['interest_rate_diff']['current'],  # 中美利差
+            'dxy_trend': 'rising' if dxy['current'] > dxy['prev'] else 'falling',  # 美元指数方向
         }
 
         if indicators['interest_rate_diff'] > 2.5 and indicators['dxy_trend'] == 'rising':
@@ -275,19 +455,13 @@ class USDCNYFactorAnalyzer:
         print("美元人民币(USD/CNY)深度影响因子分析报告")
         print("=" * 80)
 
-        # 收集所有数据
-        self.fetch_macro_economic_data()
-        self.fetch_monetary_policy_data()
-        self.fetch_market_sentiment_data()
-        self.fetch_political_geopolitical_data()
-        self.fetch_technical_factors()
+        # 按依赖图收集数据并执行分析（未变化的阶段直接读取缓存）
+        results = self.run_stages()
+        importance = results['importance']
+        regimes = results['regimes']
 
-        # 执行分析
-        correlations = self.calculate_factor_correlations()
-        causality = self.perform_granger_causality_test()
-        importance = self.calculate_factor_importance()
-        regimes = self.perform_regime_analysis()
-        interactions = self.generate_interaction_effects()
+        print("\n⏱️ 阶段耗时汇总:")
+        print(self.pipeline.format_timings())
 
         # 生成报告
         report = {
@@ -295,7 +469,7 @@ class USDCNYFactorAnalyzer:
             'key_drivers': importance,
             'current_regime': regimes.get('current_regime'),
             'risk_assessment': self._assess_risks(),
-            'forecast_scenarios': self._create_scenarios(),
+            'forecast_scenarios': results['scenarios'],
             'monitoring_priority': self._set_monitoring_priority(importance),
         }
 
@@ -339,28 +513,44 @@ class USDCNYFactorAnalyzer:
         }
         return risks
 
-    def _create_scenarios(self):
-        """创建情景分析"""
+    def _create_scenarios(self, n_paths=SCENARIO_PATHS, horizon=SCENARIO_HORIZON,
+                          seed=SCENARIO_SEED, n_workers=1, model=None, technical=None,
+                          macro=None, monetary=None, sentiment=None, political=None):
+        """创建情景分析（蒙特卡洛模拟估计概率与目标区间）
+
+        流水线传入模型、技术因子和各类基本面因子；直接调用时缺少的输入由流水线补齐。
+        """
         scenarios = {
             'bullish_usd_scenario': {
-                'probability': 40,
                 'triggers': ['fed_hikes_again', 'cn_economy_struggles'],
-                'usdcny_target': '7.30-7.40',
                 'timeframe': '3-6_months',
             },
             'range_bound_scenario': {
-                'probability': 50,
                 'triggers': ['policy_stability', 'managed_float'],
-                'usdcny_target': '7.10-7.25',
                 'timeframe': '3_months',
             },
             'bearish_usd_scenario': {
-                'probability': 10,
                 'triggers': ['fed_cuts_early', 'cn_stimulus_works'],
-                'usdcny_target': '7.00-7.10',
                 'timeframe': '6_months',
             },
         }
+
+        inputs = {'model': model, 'technical': technical, 'macro': macro, 'monetary': monetary,
+                  'sentiment': sentiment, 'political': political}
+        missing = [name for name, value in inputs.items() if value is None]
+        if missing:
+            fetched = self.run_stages(missing)
+            inputs.update({name: fetched[name] for name in missing})
+
+        engine = ScenarioEngine(inputs['model'], inputs['technical']['usdcny_price']['current'],
+                                current_factors=self._current_factor_values(
+                                    *(inputs[category] for category in FACTOR_CATEGORIES)),
+                                horizon=horizon, seed=seed)
+        simulated = engine.run(n_paths=n_paths, n_workers=n_workers)
+
+        for name, scenario in scenarios.items():
+            scenario.update(simulated[name])
+            scenario['n_paths'] = n_paths
         return scenarios
 
     def _set_monitoring_priority(self, importance):
@@ -381,64 +571,13 @@ class USDCNYFactorAnalyzer:
         }
         return priorities
 
-    def visualize_factor_analysis(self):
-        """可视化分析结果"""
-        if self.importance_ranking is None:
-            self.calculate_factor_importance()
-
-        # 创建图表
-        fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-
-        # 1. 因子重要性条形图
-        factors = list(self.importance_ranking.keys())
-        scores = list(self.importance_ranking.values())
-
-        axes[0, 0].barh(factors, scores, color='steelblue')
-        axes[0, 0].set_xlabel('重要性得分')
-        axes[0, 0].set_title('USD/CNY影响因子重要性排序')
-        axes[0, 0].invert_yaxis()
-
-        # 2. 相关性热力图（模拟）
-        if self.correlation_matrix is not None:
-            im = axes[0, 1].imshow(self.correlation_matrix.values, cmap='coolwarm',
-                                   vmin=-1, vmax=1)
-            axes[0, 1].set_title('因子相关性热力图')
-            axes[0, 1].set_xticks(range(len(self.correlation_matrix.columns)))
-            axes[0, 1].set_xticklabels(self.correlation_matrix.columns, rotation=45)
-            axes[0, 1].set_yticks(range(len(self.correlation_matrix.index)))
-            axes[0, 1].set_yticklabels(self.correlation_matrix.index)
-            plt.colorbar(im, ax=axes[0, 1])
-
-        # 3. 情景分析饼图
-        scenarios = self._create_scenarios()
-        labels = [k.replace('_scenario', '').replace('_', ' ').title()
-                  for k in scenarios.keys()]
-        sizes = [s['probability'] for s in scenarios.values()]
-        colors = ['#ff9999', '#66b3ff', '#99ff99']
-
-        axes[1, 0].pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%',
-                       startangle=90)
-        axes[1, 0].set_title('USD/CNY情景分析概率分布')
-
-        # 4. 风险矩阵
-        risks = ['货币政策风险', '经济数据风险', '地缘政治风险', '市场情绪风险']
-        impact = [8, 6, 9, 5]
-        probability = [7, 8, 4, 6]
-
-        scatter = axes[1, 1].scatter(probability, impact, s=200, alpha=0.6,
-                                     c=range(len(risks)), cmap='viridis')
-        axes[1, 1].set_xlabel('发生概率 (1-10)')
-        axes[1, 1].set_ylabel('影响程度 (1-10)')
-        axes[1, 1].set_title('风险矩阵分析')
-        axes[1, 1].grid(True, alpha=0.3)
-
-        # 添加风险标签
-        for i, risk in enumerate(risks):
-            axes[1, 1].annotate(risk, (probability[i], impact[i]),
-                                xytext=(5, 5), textcoords='offset points')
-
-        plt.tight_layout()
-        plt.show()
+    def visualize_factor_analysis(self, fmt='png', cache_dir=None):
+        """可视化分析结果（Agg后端渲染为图片文件，无需图形界面），返回图片路径"""
+        if self.importance_ranking is None or self.correlation_matrix is None:
+            self.run_stages(['importance', 'correlations'])
+
+        data = figure_data(self)
+        return render_factor_report(data, fmt=fmt, cache_dir=cache_dir)
 
 
 def main():
@@ -486,7 +625,11 @@ def main():
 
     # 可视化
     print("\n📈 正在生成可视化图表...")
-    analyzer.visualize_factor_analysis()
+    chart_path = analyzer.visualize_factor_analysis()
+    print(f"图表已保存: {chart_path}")
+
+    print("\n⏱️ 埋点耗时统计:")
+    print(REGISTRY.format_table())
 
     print("\n" + "=" * 80)
     print("分析完成！建议结合实时数据更新分析。")
@@ -0,0 +1,201 @@
+import importlib.util
+import os
+import sys
+
+import streamlit as st
+import pandas as pd
+
+# 后端模块位于 Calendar_BE 目录
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Calendar_BE'))
+
+from chart_rendering import build_figure_data, figure_bytes
+from debug_panel import render_timing_panel
+
+# 设置页面
+st.set_page_config(
+    page_title="美元人民币影响因子分析",
+    page_icon="💱",
+    layout="wide"
+)
+
+FACTOR_NAMES = {
+    'interest_rate_diff': '中美利差',
+    'inflation_diff': '通胀差',
+    'trade_balance': '贸易差额',
+    'dxy_index': '美元指数',
+    'risk_appetite': '风险偏好',
+    'capital_flows': '资本流动',
+    'political_tension': '政治紧张度',
+}
+
+SCENARIO_NAMES = {
+    'bullish_usd_scenario': '美元走强',
+    'range_bound_scenario': '区间震荡',
+    'bearish_usd_scenario': '美元走弱',
+}
+
+
+# =========== 计算阶段（各阶段独立缓存，控件只触发受影响的阶段） ===========
+
+@st.cache_resource
+def get_analyzer():
+    """加载分析器（文件名含空格，通过路径导入）；进程内所有会话共享"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Factor Analysis.py')
+    spec = importlib.util.spec_from_file_location('factor_analysis', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    analyzer = module.USDCNYFactorAnalyzer()
+    analyzer.run_stages(['macro', 'monetary', 'sentiment', 'political', 'technical', 'panel'])
+    return analyzer
+
+
+@st.cache_data(ttl=600)
+def get_stage(name):
+    """不受控件影响的阶段（数据获取、重要性、状态、因果、交互效应）
+
+    各会话共用同一分析器：流水线执行由锁串行化，结果取自本次执行返回的字典，而不是分析器属性。
+    """
+    return get_analyzer().run_stages([name])[name]
+
+
+@st.cache_data(ttl=600)
+def get_technical():
+    return get_stage('technical')
+
+
+# 以下阶段只返回结果、不回写分析器（分析器由所有会话共享）
+@st.cache_data(ttl=600)
+def get_correlations(window, lag, factors):
+    return get_analyzer().calculate_factor_correlations(window=window, lag=lag, factors=factors)
+
+
+@st.cache_data(ttl=600)
+def get_model(window, factors):
+    return get_analyzer().fit_factor_model(window=window, factors=factors)
+
+
+@st.cache_data(ttl=600)
+def get_scenarios(window, factors, n_paths, seed):
+    inputs = {category: get_stage(category) for category in ('macro', 'monetary', 'sentiment', 'political')}
+    return get_analyzer()._create_scenarios(n_paths=n_paths, seed=seed, model=get_model(window, factors),
+                                            technical=get_technical(), **inputs)
+
+
+@st.cache_data(ttl=600)
+def get_chart(window, lag, factors, n_paths, seed):
+    """图表字节：同一组参数只读取一次磁盘缓存产物"""
+    data = build_figure_data(get_stage('importance'), get_correlations(window, lag, factors),
+                             get_scenarios(window, factors, n_paths, seed))
+    return figure_bytes(data)
+
+
+# =========== 页面 ===========
+
+st.title("💱 美元人民币(USD/CNY)影响因子分析")
+st.markdown("基于因子面板、技术指标和蒙特卡洛模拟的**USD/CNY驱动因素**分析面板。")
+
+analyzer = get_analyzer()
+all_factors = [c for c in analyzer.factor_panel.columns if c != 'usdcny']
+
+with st.sidebar:
+    st.header("⚙️ 参数")
+
+    window = st.slider("分析窗口（期数）", 20, len(analyzer.factor_panel), len(analyzer.factor_panel))
+    lag = st.slider("因子领先期数（滞后）", 0, 10, 0)
+    selected = st.multiselect(
+        "因子子集",
+        all_factors,
+        default=all_factors,
+        format_func=lambda f: FACTOR_NAMES.get(f, f)
+    )
+    factors = tuple(selected) if selected else tuple(all_factors)
+
+    st.markdown("---")
+    st.subheader("🎲 情景模拟")
+    n_paths = st.select_slider("模拟路径数", options=[5000, 10000, 20000, 50000, 100000], value=20000)
+    seed = st.number_input("随机种子", min_value=0, value=42, step=1)
+
+    st.markdown("---")
+    if st.button("🔄 清除缓存并重新计算"):
+        st.cache_data.clear()
+        st.rerun()
+
+# 概览
+technical = get_technical()
+regimes = get_stage('regimes')
+importance = get_stage('importance')
+
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.metric("USD/CNY", f"{technical['usdcny_price']['current']:.4f}",
+              f"{technical['usdcny_price']['current'] - technical['usdcny_price']['ma20']:+.4f} vs MA20")
+with col2:
+    st.metric("RSI(14)", technical['rsi_14']['value'])
+with col3:
+    st.metric("当前市场状态", regimes.get('current_regime'))
+with col4:
+    model = get_model(window, factors)
+    st.metric("模型R²", f"{model['r2']:.3f}")
+
+tabs = st.tabs(["📊 因子", "🔗 相关性", "🎲 情景", "📉 技术面", "🖼️ 报告图表"])
+
+with tabs[0]:
+    st.markdown("#### 因子重要性")
+    st.bar_chart(pd.Series(importance, name='重要性'))
+
+    st.markdown("#### 因子模型系数")
+    coef_df = pd.DataFrame({
+        '因子': [FACTOR_NAMES.get(f, f) for f in model['factors']],
+        '系数': model['beta'],
+    })
+    st.dataframe(coef_df, use_container_width=True, hide_index=True)
+
+    with st.expander("格兰杰因果关系"):
+        causality = get_stage('causality')
+        st.dataframe(pd.DataFrame(causality).T, use_container_width=True)
+
+with tabs[1]:
+    corr = get_correlations(window, lag, factors)
+    st.markdown(f"#### 因子相关性（最近{window}期，因子领先{lag}期）")
+    st.dataframe(corr.style.background_gradient(cmap='coolwarm', vmin=-1, vmax=1).format('{:.2f}'),
+                 use_container_width=True)
+
+with tabs[2]:
+    scenarios = get_scenarios(window, factors, n_paths, seed)
+    rows = []
+    for name, scenario in scenarios.items():
+        dist = scenario['target_distribution']
+        rows.append({
+            '情景': SCENARIO_NAMES.get(name, name),
+            '概率(%)': scenario['probability'],
+            '目标区间': scenario['usdcny_target'],
+            'P5': dist['p5'],
+            'P50': dist['p50'],
+            'P95': dist['p95'],
+            '时间框架': scenario['timeframe'],
+        })
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    st.caption(f"基于 {n_paths:,} 条模拟路径（随机种子 {seed}）")
+
+with tabs[3]:
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**均线与布林带**")
+        st.json({'价格': technical['usdcny_price'], '布林带': technical['bollinger_bands']})
+    with col2:
+        st.markdown("**动量与关键价位**")
+        st.json({'RSI': technical['rsi_14'], 'MACD': technical['macd'],
+                 '支撑位': technical['support_levels'], '阻力位': technical['resistance_levels']})
+
+with tabs[4]:
+    png = get_chart(window, lag, factors, n_paths, seed)
+    st.image(png, use_container_width=True)
+    st.download_button("📥 下载PNG", data=png, file_name="usdcny_factor_report.png", mime="image/png")
+
+# 调试面板（侧边栏）：包含分析器各阶段耗时
+render_timing_panel()
+
+# 页脚
+st.markdown("---")
+st.caption("提示: 因子数据为模拟数据，分析结果仅供参考。")
@@ -3,10 +3,25 @@
 
 import streamlit as st
 import pandas as pd
-import pandas_market_calendars as mcal
 from datetime import datetime, date, timedelta
+import importlib.util
+import re
 import warnings
 import sys
+import os
+
+# 后端模块位于 Calendar_BE 目录
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Calendar_BE'))
+
+from blackout import build_blackouts
+from event_cube import EventCube
+from event_schema import IMPORTANCE_LEVELS, to_calendar_frame
+from event_table import CATEGORY_ICONS, build_event_table, page_slice
+from instrumentation import timed, timer
+from schedule_cache import SCHEDULES
+from sessions import MarketSessions, format_hours
+from debug_panel import render_timing_panel
+from table_view import paginated_dataframe
 
 # 检查Python版本
 python_version = sys.version_info
@@ -35,8 +50,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# 自定义CSS样式
-st.markdown("""
+# 自定义CSS样式（导入时压缩一次，每次重跑只发送压缩后的样式）
+APP_CSS = re.sub(r'\s+', ' ', """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -108,7 +123,9 @@ st.markdown("""
         text-align: center;
     }
 </style>
-""", unsafe_allow_html=True)
+""").strip()
+
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # 市场配置 - 简化为几个主要市场
 MARKETS = {
@@ -118,6 +135,16 @@ MARKETS = {
     "东京证券交易所 (JPX)": "JPX",
     "香港交易所 (XHKG)": "XHKG",
     "上海证券交易所 (SSE)": "SSE",
+    "外汇市场 (FX 24×5)": "FX",
+}
+
+
+# 各类事件的常规发布时间（纽约时间），用于生成风控禁区
+CATEGORY_RELEASE_TIMES = {
+    'fed': '14:00',
+    'nfp': '08:30',
+    'cpi': '08:30',
+    'earnings': '16:05',
 }
 
 
@@ -203,6 +230,7 @@ class EconomicCalendar:
             {"date": "2024-10-24", "event": "亚马逊(AMZN)财报", "importance": "high", "category": "earnings"},
         ]
 
+    @timed('MiniApp.get_all_economic_events')
     def get_all_economic_events(self, start_date=None, end_date=None):
         """获取所有经济事件"""
         if start_date is None:
@@ -217,9 +245,8 @@ class EconomicCalendar:
         all_events.extend(self.get_cpi_schedule_2024())
         all_events.extend(self.get_earnings_season_2024())
 
-        # 转换为DataFrame
-        df = pd.DataFrame(all_events)
-        df['date'] = pd.to_datetime(df['date'])
+        # 转换为统一结构（原生时间戳 + 分类列）
+        df = to_calendar_frame(pd.DataFrame(all_events))
 
         # 过滤日期范围
         start_dt = pd.Timestamp(start_date)
@@ -234,22 +261,29 @@ class EconomicCalendar:
 def get_market_info(market_code):
     """获取市场基本信息"""
     market_info = {
-        "NYSE": {"name": "纽约证券交易所", "country": "美国", "currency": "USD", "open": "09:30", "close": "16:00"},
-        "NASDAQ": {"name": "纳斯达克", "country": "美国", "currency": "USD", "open": "09:30", "close": "16:00"},
-        "LSE": {"name": "伦敦证券交易所", "country": "英国", "currency": "GBP", "open": "08:00", "close": "16:30"},
-        "JPX": {"name": "东京证券交易所", "country": "日本", "currency": "JPY", "open": "09:00", "close": "15:00"},
-        "XHKG": {"name": "香港交易所", "country": "中国香港", "currency": "HKD", "open": "09:30", "close": "16:00"},
-        "SSE": {"name": "上海证券交易所", "country": "中国", "currency": "CNY", "open": "09:30", "close": "15:00"},
+        "NYSE": {"name": "纽约证券交易所", "country": "美国", "currency": "USD"},
+        "NASDAQ": {"name": "纳斯达克", "country": "美国", "currency": "USD"},
+        "LSE": {"name": "伦敦证券交易所", "country": "英国", "currency": "GBP"},
+        "JPX": {"name": "东京证券交易所", "country": "日本", "currency": "JPY"},
+        "XHKG": {"name": "香港交易所", "country": "中国香港", "currency": "HKD"},
+        "SSE": {"name": "上海证券交易所", "country": "中国", "currency": "CNY"},
+        "FX": {"name": "外汇市场（24×5）", "country": "全球", "currency": "多币种"},
     }
-    return market_info.get(market_code,
-                           {"name": market_code, "country": "未知", "currency": "未知", "open": "09:30", "close": "16:00"})
+    return market_info.get(market_code, {"name": market_code, "country": "未知", "currency": "未知"})
 
 
+@timed('MiniApp.get_market_calendar')
+@st.cache_data(ttl=600, show_spinner=False)
 def get_market_calendar(market_code, start_date, end_date):
     """获取市场日历数据 - 安全版本"""
     try:
-        calendar = mcal.get_calendar(market_code)
-        schedule = calendar.schedule(start_date=start_date, end_date=end_date)
+        # 日历对象内部延迟导入 pandas_market_calendars（导入耗时较长，页面框架先渲染）；
+        # 日程按市场区间缓存，调整日期范围时只计算新增的两端
+        calendar = SCHEDULES.calendar(market_code)
+        with timer('MiniApp.mcal_schedule'):
+            schedule = SCHEDULES.schedule(market_code, start_date, end_date)
+        # 逐日交易时段（午休、提前收市），交易时间取自日历而非固定值
+        sessions = MarketSessions.from_calendar(calendar, start_date, end_date, schedule=schedule)
 
         # 计算总天数
         start_dt = pd.Timestamp(start_date)
@@ -259,6 +293,9 @@ def get_market_calendar(market_code, start_date, end_date):
         return {
             'success': True,
             'schedule': schedule,
+            'sessions': sessions.table,
+            'hours': format_hours(sessions.regular_hours()),
+            'special_days': sessions.special_days(),
             'trading_days': len(schedule),
             'total_days': total_days,
             'market_code': market_code
@@ -269,12 +306,30 @@ def get_market_calendar(market_code, start_date, end_date):
             'success': False,
             'error': str(e),
             'schedule': pd.DataFrame(),
+            'hours': "N/A",
             'trading_days': 0,
             'total_days': 0,
             'market_code': market_code
         }
 
 
+def display_market_card(slot, market_info, hours, special_days=None):
+    """市场信息卡片：当地常规交易时间（含午休），区间内有提前收市/推迟开市时一并提示"""
+    special = ""
+    if special_days is not None and len(special_days):
+        days = "、".join(f"{d.strftime('%Y-%m-%d')} {row['market_open']}-{row['market_close']}"
+                        for d, row in special_days.head(5).iterrows())
+        more = f" 等{len(special_days)}天" if len(special_days) > 5 else ""
+        special = f"<p>⏰ 特殊交易时段: {days}{more}</p>"
+    slot.markdown(f"""
+    <div class="market-card">
+        <h3>🏛️ {market_info['name']}</h3>
+        <p>📍 {market_info['country']} | 💰 {market_info['currency']} | 🕐 {hours}</p>
+        {special}
+    </div>
+    """, unsafe_allow_html=True)
+
+
 def display_market_summary(market_info, market_data, events_count):
     """显示市场概要信息"""
     col1, col2, col3, col4 = st.columns(4)
@@ -307,116 +362,113 @@ def display_market_summary(market_info, market_data, events_count):
         st.markdown('</div>', unsafe_allow_html=True)
 
 
-def display_economic_events(events_df, market_schedule):
-    """显示经济事件"""
-    if events_df.empty:
-        st.info("📭 该时间段内无经济事件")
-        return
-
-    st.markdown('<div class="sub-header">📅 经济事件日历</div>', unsafe_allow_html=True)
+# 即将发生事件每页卡片数
+UPCOMING_PAGE_SIZE = 10
 
-    # 创建显示数据
-    display_data = []
 
-    for idx, event in events_df.iterrows():
-        date_str = event['date'].strftime('%Y-%m-%d')
-        weekday = event['date'].strftime('%A')
+@st.cache_data(ttl=600)
+def get_event_table(_events_df, _market_schedule, data_key):
+    """显示表按(市场, 日期范围)缓存，翻页/筛选不再重建"""
+    return build_event_table(_events_df, _market_schedule)
 
-        # 检查是否是交易日
-        is_trading = False
-        if hasattr(market_schedule, 'index'):
-            is_trading = event['date'] in market_schedule.index
 
-        # 重要性图标
-        importance_icons = {
-            'very_high': '🔴',
-            'high': '🟠',
-            'medium': '🟡',
-            'low': '🟢'
-        }
-
-        importance_icon = importance_icons.get(event.get('importance', 'medium'), '⚪')
-
-        # 事件类型图标
-        category_icons = {
-            'fed': '🏛️',
-            'nfp': '📊',
-            'cpi': '📈',
-            'earnings': '💰'
-        }
-
-        category_icon = category_icons.get(event.get('category', ''), '📅')
+@timed('MiniApp.display_economic_events')
+def display_economic_events(events_df, market_schedule, data_key=None):
+    """显示经济事件（服务端分页，只发送当前页）"""
+    if events_df.empty:
+        st.info("📭 该时间段内无经济事件")
+        return
 
-        display_data.append({
-            '日期': date_str,
-            '星期': weekday,
-            '事件': f"{category_icon} {event['event']}",
-            '重要性': f"{importance_icon} {event.get('importance', 'medium')}",
-            '交易日': '✅' if is_trading else '❌',
-            '描述': event.get('description', '')
-        })
+    st.markdown('<div class="sub-header">📅 经济事件日历</div>', unsafe_allow_html=True)
 
-    # 创建DataFrame并显示
-    display_df = pd.DataFrame(display_data)
+    # 整列向量化构建显示数据
+    if data_key is None:
+        display_df = build_event_table(events_df, market_schedule)
+    else:
+        display_df = get_event_table(events_df, market_schedule, data_key)
 
-    # 使用Streamlit的数据框显示
-    st.dataframe(
+    paginated_dataframe(
         display_df,
+        key='economic_events',
+        data_key=data_key,
+        search_cols=('事件', '描述'),
         column_config={
             "日期": st.column_config.TextColumn("日期", width="small"),
             "星期": st.column_config.TextColumn("星期", width="small"),
             "事件": st.column_config.TextColumn("事件"),
             "重要性": st.column_config.TextColumn("重要性", width="small"),
             "交易日": st.column_config.TextColumn("交易日", width="small"),
-        },
-        hide_index=True,
-        use_container_width=True,
-        height=400
+        }
     )
 
     return display_df
 
 
-def display_event_statistics(events_df):
-    """显示事件统计"""
+# 事件类别/重要性的中文名称
+CATEGORY_NAMES = {
+    'fed': '美联储会议',
+    'nfp': '非农数据',
+    'cpi': 'CPI数据',
+    'earnings': '财报季'
+}
+IMPORTANCE_NAMES = {
+    'very_high': '极高',
+    'high': '高',
+    'medium': '中',
+    'low': '低'
+}
+
+
+def build_event_cube(events_df):
+    """内置事件的统计立方体（类别 × 重要性 × 星期 × 小时 × 月份）"""
+    categories = [c for c in ('category', 'importance') if c in events_df.columns]
+    cube = EventCube(categories=categories, time_col='date', flag_col=None, key=['date', 'event'],
+                     levels={'importance': IMPORTANCE_LEVELS} if 'importance' in categories else None)
+    cube.add(events_df)
+    return cube
+
+
+@st.cache_resource(max_entries=16)
+def get_event_cube(_events_df, data_key):
+    """统计立方体按日期范围构建一次，重跑时直接复用"""
+    return build_event_cube(_events_df)
+
+
+def display_event_statistics(events_df, data_key=None):
+    """显示事件统计（分布取自统计立方体，重跑时不再扫描事件表）"""
     if events_df.empty:
         return
 
     st.markdown('<div class="sub-header">📊 事件统计</div>', unsafe_allow_html=True)
 
+    if data_key is None:
+        cube = build_event_cube(events_df)
+    else:
+        cube = get_event_cube(events_df, data_key)
+
     col1, col2 = st.columns(2)
 
     with col1:
         # 按类别统计
-        if 'category' in events_df.columns:
-            category_counts = events_df['category'].value_counts()
+        if 'category' in cube.dimensions:
+            category_counts = cube.marginal('category')
+            category_counts = category_counts[category_counts > 0].sort_values(ascending=False, kind='stable')
 
             # 简单文本显示
             st.write("**事件类别分布:**")
             for category, count in category_counts.items():
-                category_names = {
-                    'fed': '美联储会议',
-                    'nfp': '非农数据',
-                    'cpi': 'CPI数据',
-                    'earnings': '财报季'
-                }
-                category_name = category_names.get(category, category)
+                category_name = CATEGORY_NAMES.get(category, category)
                 st.write(f"• {category_name}: {count}个")
 
     with col2:
         # 按重要性统计
-        if 'importance' in events_df.columns:
-            importance_counts = events_df['importance'].value_counts()
+        if 'importance' in cube.dimensions:
+            importance_counts = cube.marginal('importance')
+            importance_counts = importance_counts[importance_counts > 0].sort_values(ascending=False, kind='stable')
 
             st.write("**重要性分布:**")
             for importance, count in importance_counts.items():
-                importance_names = {
-                    'very_high': '极高',
-                    'high': '高',
-                    'medium': '中',
-                    'low': '低'
-                }
-                importance_name = importance_names.get(importance, importance)
+                importance_name = IMPORTANCE_NAMES.get(importance, importance)
                 st.write(f"• {importance_name}: {count}个")
 
 
@@ -430,7 +482,15 @@ def display_upcoming_events(events_df, days=7):
     if not upcoming.empty:
         st.markdown(f'<div class="sub-header">🔔 未来{days}天重要事件</div>', unsafe_allow_html=True)
 
-        for idx, event in upcoming.iterrows():
+        # 只渲染当前页的卡片，控件数量不随事件总数增长
+        page = 1
+        if len(upcoming) > UPCOMING_PAGE_SIZE:
+            n_pages = -(-len(upcoming) // UPCOMING_PAGE_SIZE)
+            page = st.number_input(f"页码（共 {n_pages} 页，{len(upcoming)} 个事件）",
+                                   min_value=1, max_value=n_pages, value=1, step=1, key='upcoming_page')
+        visible, _, _ = page_slice(upcoming, page, UPCOMING_PAGE_SIZE)
+
+        for idx, event in visible.iterrows():
             days_to_event = (event['date'].date() - date.today()).days
 
             # 创建卡片
@@ -439,13 +499,7 @@ def display_upcoming_events(events_df, days=7):
 
                 with col1:
                     # 事件图标
-                    category_icons = {
-                        'fed': '🏛️',
-                        'nfp': '📊',
-                        'cpi': '📈',
-                        'earnings': '💰'
-                    }
-                    icon = category_icons.get(event.get('category', ''), '📅')
+                    icon = CATEGORY_ICONS.get(event.get('category', ''), '📅')
                     st.markdown(f"<h2>{icon}</h2>", unsafe_allow_html=True)
 
                 with col2:
@@ -459,6 +513,50 @@ def display_upcoming_events(events_df, days=7):
                 st.markdown("---")
 
 
+def event_timestamps(events_df):
+    """事件日期 + 类别常规发布时间（纽约时间）→ UTC时间"""
+    times = events_df['category'].astype(str).map(CATEGORY_RELEASE_TIMES).fillna('09:30')
+    local = pd.to_datetime(events_df['date'].dt.strftime('%Y-%m-%d') + ' ' + times)
+    return local.dt.tz_localize('America/New_York').dt.tz_convert('UTC')
+
+
+@timed('MiniApp.display_blackout_windows')
+def display_blackout_windows(events_df, market_schedule, minutes):
+    """显示事件风控禁区（事件前后窗口与所选市场交易时段的交集）"""
+    if events_df.empty:
+        return
+
+    st.markdown('<div class="sub-header">⛔ 事件风控禁区</div>', unsafe_allow_html=True)
+
+    schedule = market_schedule if len(market_schedule) > 0 else None
+    window = pd.Timedelta(minutes=minutes)
+    blackouts = build_blackouts(event_timestamps(events_df), schedule, before=window, after=window)
+
+    now = pd.Timestamp.now(tz='UTC')
+    current = blackouts.current_window(now)
+    if current:
+        st.error(f"🚫 当前处于禁区，至 {current[1].tz_convert('Asia/Shanghai').strftime('%m-%d %H:%M')}（北京时间）结束")
+    else:
+        upcoming = blackouts.next_window(now)
+        if upcoming:
+            st.success(f"✅ 当前不在禁区，下一禁区: "
+                       f"{upcoming[0].tz_convert('Asia/Shanghai').strftime('%Y-%m-%d %H:%M')}（北京时间）")
+        else:
+            st.success("✅ 当前不在禁区，所选范围内无后续禁区")
+
+    if len(blackouts) == 0:
+        st.caption("所选范围内的事件均不在交易时段内。")
+        return
+
+    frame = blackouts.to_frame()
+    display_df = pd.DataFrame({
+        '开始(北京)': frame['start'].dt.tz_convert('Asia/Shanghai').dt.strftime('%Y-%m-%d %H:%M'),
+        '结束(北京)': frame['end'].dt.tz_convert('Asia/Shanghai').dt.strftime('%Y-%m-%d %H:%M'),
+        '时长(分钟)': ((frame['end'] - frame['start']).dt.total_seconds() / 60).astype(int),
+    })
+    st.dataframe(display_df, hide_index=True, use_container_width=True, height=240)
+
+
 def display_trading_tips():
     """显示交易提示"""
     st.markdown('<div class="sub-header">💡 交易提示</div>', unsafe_allow_html=True)
@@ -535,6 +633,7 @@ def main():
         show_upcoming = st.checkbox("显示即将发生的事件", value=True)
         show_tips = st.checkbox("显示交易提示", value=True)
         days_ahead = st.slider("显示未来几天", 1, 30, 7)
+        blackout_minutes = st.slider("事件禁区前后分钟数", 5, 60, 15, step=5)
 
         st.markdown("---")
         st.markdown("### 📖 关于")
@@ -546,39 +645,46 @@ def main():
         - 支持Python 3.7+
         """)
 
-    # 主内容区域
-    st.markdown(f"""
-    <div class="market-card">
-        <h3>🏛️ {market_info['name']}</h3>
-        <p>📍 {market_info['country']} | 💰 {market_info['currency']} | 🕐 {market_info['open']}-{market_info['close']}</p>
-    </div>
-    """, unsafe_allow_html=True)
+    # 主内容区域（交易时间取自交易日历，加载完成后更新）
+    market_card = st.empty()
+    display_market_card(market_card, market_info, "加载中...")
 
-    # 获取数据
+    # 获取数据（内置事件，无需交易日历）
     econ_calendar = EconomicCalendar()
     events_df = econ_calendar.get_all_economic_events(
         start_date.strftime('%Y-%m-%d'),
         end_date.strftime('%Y-%m-%d')
     )
 
-    market_data = get_market_calendar(
-        market_code,
-        start_date.strftime('%Y-%m-%d'),
-        end_date.strftime('%Y-%m-%d')
-    )
-
-    # 显示市场概要
-    display_market_summary(market_info, market_data, len(events_df))
+    # 市场概要依赖交易日历，先占位，日历加载完成后再填充
+    summary_slot = st.container()
 
     # 显示即将发生的事件
     if show_upcoming:
         display_upcoming_events(events_df, days_ahead)
 
+    with st.spinner("正在加载交易日历..."):
+        market_data = get_market_calendar(
+            market_code,
+            start_date.strftime('%Y-%m-%d'),
+            end_date.strftime('%Y-%m-%d')
+        )
+
+    display_market_card(market_card, market_info, market_data['hours'], market_data.get('special_days'))
+
+    # 显示市场概要
+    with summary_slot:
+        display_market_summary(market_info, market_data, len(events_df))
+
     # 显示经济事件
-    display_economic_events(events_df, market_data.get('schedule', pd.DataFrame()))
+    display_economic_events(events_df, market_data.get('schedule', pd.DataFrame()),
+                            data_key=(market_code, str(start_date), str(end_date)))
 
     # 显示事件统计
-    display_event_statistics(events_df)
+    display_event_statistics(events_df, data_key=(str(start_date), str(end_date)))
+
+    # 显示事件风控禁区
+    display_blackout_windows(events_df, market_data.get('schedule', pd.DataFrame()), blackout_minutes)
 
     # 显示交易提示
     if show_tips:
@@ -611,6 +717,9 @@ def main():
                 mime="application/json"
             )
 
+    # 调试面板（侧边栏）
+    render_timing_panel()
+
     # 底部信息
     st.markdown("---")
     st.markdown(f"""
@@ -624,8 +733,9 @@ def main():
 # 简化版本，不需要plotly和yfinance
 if __name__ == "__main__":
     try:
-        # 检查依赖
-        import pandas_market_calendars
+        # 检查依赖（只查找不导入，日历库在首次使用时才加载）
+        if importlib.util.find_spec('pandas_market_calendars') is None:
+            raise ImportError("No module named 'pandas_market_calendars'")
 
         st.success("✅ 系统准备就绪")
         main()
@@ -1,9 +1,25 @@
+import os
+import sys
+
 import streamlit as st
 import pandas as pd
 import requests
 from datetime import datetime, timedelta
 import pytz
 
+# 后端模块位于 Calendar_BE 目录
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Calendar_BE'))
+
+from event_archive import EventArchive, normalize_feed
+from event_cube import HOUR_OF_WEEK_SLOTS, EventCube
+from event_schema import on_day
+from event_study import EventStudyCache
+from instrumentation import timed, timer
+from shared_feed import SharedFeed
+from surprise_index import SurpriseIndex
+from table_view import paginated_dataframe
+from debug_panel import render_timing_panel
+
 # 设置页面
 st.set_page_config(
     page_title="美国高影响经济事件日历",
@@ -38,82 +54,117 @@ with st.sidebar:
     st.caption(f"最后更新: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
 
+BEIJING_TZ = 'Asia/Shanghai'
+
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+# 发布时段热力图的时间范围（最近月数，None为全部归档）
+HEATMAP_SPANS = {'全部归档': None, '近5年': 60, '近3年': 36, '近1年': 12}
+
+
 # 获取并处理数据
-@st.cache_data(ttl=600)  # 缓存10分钟
+@timed('MiniApp2.fetch_and_filter_events')
+@st.cache_resource(ttl=600)  # 缓存10分钟，所有会话共享同一份只读数据（不逐会话复制）
 def fetch_and_filter_events():
+    """返回 (SharedFeed, 提示信息)：统一结构的美国高影响事件及预先生成的北京时间显示列"""
     url = "https://nfs.faireconomy.media/ff_calendar_thisweek.json"
     try:
-        response = requests.get(url, timeout=10)
+        with timer('MiniApp2.requests_get'):
+            response = requests.get(url, timeout=10)
         response.raise_for_status()
         data = response.json()
 
-        # 转换为DataFrame
-        df = pd.DataFrame(data)
+        # 原始时间为带时区偏移的ISO字符串（纽约时间），统一转换为UTC时间戳
+        events = normalize_feed(data)
+
+        # 归档全部事件（所有国家、所有影响级别），供事件研究等历史分析使用；归档统计立方体增量更新
+        try:
+            EventArchive().append(events)
+        except (OSError, ValueError) as e:
+            st.warning(f"写入事件归档失败: {e}")
+        get_archive_cube().add(events)
 
         # 筛选美国高影响事件
-        us_high_impact = df[(df['country'] == 'USD') & (df['impact'] == 'High')].copy()
-
-        if us_high_impact.empty:
-            return pd.DataFrame(), "找到 0 个美国高影响事件。"
-
-        # 转换时间格式
-        ny_tz = pytz.timezone('America/New_York')
-        beijing_tz = pytz.timezone('Asia/Shanghai')
-
-        def convert_time(ts):
-            try:
-                dt_ny = datetime.fromisoformat(ts.replace('Z', '+00:00'))
-                if dt_ny.tzinfo is None:
-                    dt_ny = ny_tz.localize(dt_ny)
-                dt_beijing = dt_ny.astimezone(beijing_tz)
-                return dt_beijing
-            except:
-                return None
-
-        # 应用时间转换
-        us_high_impact['date_beijing'] = us_high_impact['date'].apply(convert_time)
-        us_high_impact['date_original'] = pd.to_datetime(us_high_impact['date'])
-
-        # 提取日期和时间
-        us_high_impact['date_only'] = us_high_impact['date_beijing'].apply(
-            lambda x: x.strftime('%Y-%m-%d') if x else ''
-        )
-        us_high_impact['time_only'] = us_high_impact['date_beijing'].apply(
-            lambda x: x.strftime('%H:%M') if x else ''
-        )
-        us_high_impact['weekday'] = us_high_impact['date_beijing'].apply(
-            lambda x: x.strftime('%A') if x else ''
-        )
+        us_high_impact = events[(events['country'] == 'USD') & (events['impact'] == 'High')]
+        with timer('MiniApp2.build_shared_feed'):
+            feed = SharedFeed(us_high_impact, BEIJING_TZ)
+
+        return feed, f"找到 {len(feed)} 个美国高影响事件。"
 
-        # 按时间排序
-        us_high_impact = us_high_impact.sort_values('date_original')
+    except requests.exceptions.RequestException as e:
+        return SharedFeed(normalize_feed([]), BEIJING_TZ), f"网络错误: {e}"
+    except Exception as e:
+        return SharedFeed(normalize_feed([]), BEIJING_TZ), f"数据处理错误: {e}"
 
-        # 选择显示的列
-        display_cols = ['date_only', 'weekday', 'time_only', 'title', 'forecast', 'previous']
-        result_df = us_high_impact[display_cols].copy()
 
-        # 重命名列
-        result_df.columns = ['日期', '星期', '时间(北京)', '事件', '预测值', '前值']
+@st.cache_resource
+def get_archive_cube():
+    """事件归档的统计立方体（国家 × 影响 × 星期 × 小时 × 月份，北京时间）：首次读取归档构建，之后随数据源增量更新"""
+    cube = EventCube(BEIJING_TZ)
+    try:
+        cube.add(EventArchive().load())
+    except (OSError, ValueError) as e:
+        st.warning(f"读取事件归档失败: {e}")
+    return cube
+
+
+def hour_of_week_chart(slots):
+    """168时段计数 → 星期 × 小时热力图（altair 只在绘图时导入）"""
+    import altair as alt
+
+    slot = pd.RangeIndex(HOUR_OF_WEEK_SLOTS)
+    data = pd.DataFrame({
+        '星期': [WEEKDAY_NAMES[d] for d in slot // 24],
+        '小时': slot % 24,
+        '事件数': slots,
+    })
+    return alt.Chart(data).mark_rect().encode(
+        x=alt.X('小时:O', title='小时（北京时间）'),
+        y=alt.Y('星期:O', sort=WEEKDAY_NAMES, title=None),
+        color=alt.Color('事件数:Q', scale=alt.Scale(scheme='orangered')),
+        tooltip=['星期', '小时', '事件数'],
+    ).properties(height=260)
+
+
+@st.cache_resource
+def get_event_study():
+    """事件研究缓存（进程内共享，按(事件类型, 货币对)缓存结果）"""
+    return EventStudyCache()
+
+
+@st.cache_data(ttl=600)
+def get_typical_move(title, pair):
+    try:
+        return get_event_study().typical_move(title, pair)
+    except (OSError, KeyError, ValueError):
+        return None
 
-        return result_df, f"找到 {len(result_df)} 个美国高影响事件。"
 
-    except requests.exceptions.RequestException as e:
-        return pd.DataFrame(), f"网络错误: {e}"
-    except Exception as e:
-        return pd.DataFrame(), f"数据处理错误: {e}"
+@st.cache_data(ttl=600)
+def get_surprise_snapshot():
+    """由事件归档计算各事件最新标准化意外值和美国意外指数"""
+    archive = EventArchive().load()
+    if archive.empty:
+        return pd.DataFrame(), None
+    index = SurpriseIndex.from_archive(archive)
+    snapshot = index.snapshot()
+    return snapshot[snapshot['country'] == 'USD'], index.country_index.get('USD')
 
 
 # 主界面
 st.subheader("📊 本周美国高影响经济事件")
 
-# 获取数据
-events_df, message = fetch_and_filter_events()
+# 获取数据（共享数据的只读视图，本会话不复制）
+feed, message = fetch_and_filter_events()
+events_df = feed.events()
 
 st.info(message)
 
 if not events_df.empty:
+    display_df = feed.display()
+
     # 今天和明天
-    today = datetime.now(pytz.timezone('Asia/Shanghai')).date()
+    today = datetime.now(pytz.timezone(BEIJING_TZ)).date()
     tomorrow = today + timedelta(days=1)
 
     today_str = today.strftime('%Y-%m-%d')
@@ -126,11 +177,12 @@ if not events_df.empty:
     tab_titles = ["所有事件", f"今天 ({today_str})", f"明天 ({tomorrow_str})", "即将发生"]
     tabs = st.tabs(tab_titles)
 
-    with tabs[0]:  # 所有事件
-        st.dataframe(
-            events_df,
-            use_container_width=True,
-            hide_index=True,
+    with tabs[0]:  # 所有事件（服务端分页，只发送当前页）
+        paginated_dataframe(
+            display_df,
+            key='all_events',
+            data_key=feed.version,
+            search_cols=('事件',),
             column_config={
                 "日期": st.column_config.TextColumn(width="medium"),
                 "时间(北京)": st.column_config.TextColumn(width="small"),
@@ -141,7 +193,8 @@ if not events_df.empty:
         )
 
     with tabs[1]:  # 今天
-        today_events = events_df[events_df['日期'] == today_str]
+        today_mask = on_day(events_df['timestamp'], today, BEIJING_TZ)
+        today_events = feed.display(today_mask)
         if not today_events.empty:
             st.dataframe(today_events, use_container_width=True, hide_index=True)
             st.metric("今日高影响事件数", len(today_events))
@@ -149,7 +202,7 @@ if not events_df.empty:
             st.success("🎉 今天没有高影响经济事件！")
 
     with tabs[2]:  # 明天
-        tomorrow_events = events_df[events_df['日期'] == tomorrow_str]
+        tomorrow_events = feed.display(on_day(events_df['timestamp'], tomorrow, BEIJING_TZ))
         if not tomorrow_events.empty:
             st.dataframe(tomorrow_events, use_container_width=True, hide_index=True)
             st.metric("明日高影响事件数", len(tomorrow_events))
@@ -157,34 +210,20 @@ if not events_df.empty:
             st.info("明天没有高影响经济事件。")
 
     with tabs[3]:  # 即将发生
-        now = datetime.now(pytz.timezone('Asia/Shanghai'))
-        upcoming = []
-
-        for _, row in events_df.iterrows():
-            try:
-                event_time = datetime.strptime(
-                    f"{row['日期']} {row['时间(北京)']}",
-                    '%Y-%m-%d %H:%M'
-                ).replace(tzinfo=pytz.timezone('Asia/Shanghai'))
-
-                if event_time > now:
-                    time_diff = event_time - now
-                    hours = time_diff.total_seconds() / 3600
-
-                    if hours <= 24:  # 未来24小时内
-                        upcoming.append({
-                            **row.to_dict(),
-                            '倒计时': f"{int(hours)}小时{int((hours % 1) * 60)}分钟"
-                        })
-            except:
-                continue
-
-        if upcoming:
-            upcoming_df = pd.DataFrame(upcoming)
+        now = pd.Timestamp.now(tz='UTC')
+        # 未来24小时内
+        upcoming_mask = ((events_df['timestamp'] > now) &
+                         (events_df['timestamp'] <= now + pd.Timedelta(hours=24))).to_numpy()
+
+        if upcoming_mask.any():
+            hours = (events_df['timestamp'][upcoming_mask] - now).dt.total_seconds() / 3600
+            upcoming_df = feed.display(upcoming_mask)
+            upcoming_df['倒计时'] = (hours.astype(int).astype(str) + '小时' +
+                                  ((hours % 1) * 60).astype(int).astype(str) + '分钟')
             st.dataframe(upcoming_df, use_container_width=True, hide_index=True)
 
             # 显示最近的事件
-            next_event = upcoming[0]
+            next_event = upcoming_df.iloc[0]
             st.success(f"⏰ 下一个事件: **{next_event['事件']}** 于 {next_event['时间(北京)']} ({next_event['倒计时']}后)")
         else:
             st.info("未来24小时内没有即将发生的高影响事件。")
@@ -193,51 +232,91 @@ if not events_df.empty:
     st.markdown("### 📈 事件统计")
     col1, col2, col3 = st.columns(3)
 
+    cube = feed.cube
     with col1:
-        st.metric("总事件数", len(events_df))
+        st.metric("总事件数", cube.total())
 
     with col2:
-        today_count = len(events_df[events_df['日期'] == today_str])
+        today_count = int(today_mask.sum())
         st.metric("今日事件", today_count)
 
     with col3:
-        # 计算包含预测值的事件数
-        forecast_count = events_df['预测值'].notna().sum()
-        st.metric("含预测事件", forecast_count)
+        # 包含预测值的事件数
+        st.metric("含预测事件", cube.total('with_forecast'))
 
     # 按星期分布
     st.markdown("#### 📅 按星期分布")
-    weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    weekday_map = {
-        'Monday': '周一',
-        'Tuesday': '周二',
-        'Wednesday': '周三',
-        'Thursday': '周四',
-        'Friday': '周五',
-        'Saturday': '周六',
-        'Sunday': '周日'
-    }
-
-    if '星期' in events_df.columns:
-        # 转换为中文星期
-        events_df['星期中文'] = events_df['星期'].map(weekday_map)
-
-        # 按原始英文排序，但显示中文
-        events_df['星期_排序'] = pd.Categorical(
-            events_df['星期'],
-            categories=weekday_order,
-            ordered=True
+    # 北京时间星期几（0=周一）的计数取自立方体
+    weekday_counts = cube.marginal('weekday')
+    weekday_counts = weekday_counts[weekday_counts > 0]
+    weekday_index = pd.CategoricalIndex([WEEKDAY_NAMES[d] for d in weekday_counts.index],
+                                        categories=WEEKDAY_NAMES, ordered=True, name='星期中文')
+
+    # 显示条形图
+    st.bar_chart(pd.Series(weekday_counts.to_numpy(), index=weekday_index, name='数量'))
+
+    # 历史发布时段热力图（事件归档，所有国家，北京时间）
+    st.markdown("#### 🕐 历史发布时段热力图")
+    archive_cube = get_archive_cube()
+    if len(archive_cube):
+        col1, col2, col3 = st.columns([3, 2, 1])
+        with col1:
+            countries = st.multiselect("国家（不选为全部）", archive_cube.labels('country'),
+                                       default=['USD'] if 'USD' in archive_cube.labels('country') else [])
+        with col2:
+            impacts = st.multiselect("影响程度（不选为全部）", archive_cube.labels('impact'), default=['High'])
+        with col3:
+            span = st.selectbox("时间范围", list(HEATMAP_SPANS))
+
+        months = HEATMAP_SPANS[span]
+        slots = archive_cube.hour_of_week(country=countries or None, impact=impacts or None,
+                                          month=archive_cube.recent_months(months) if months else None)
+        st.altair_chart(hour_of_week_chart(slots), use_container_width=True)
+        busiest = slots.argsort()[::-1][:3]
+        busiest = [f"{WEEKDAY_NAMES[s // 24]} {s % 24:02d}:00（{slots[s]}个）" for s in busiest if slots[s] > 0]
+        st.caption(f"事件归档: 共 {len(archive_cube):,} 个事件，当前筛选 {int(slots.sum()):,} 个"
+                   + (f"；最密集时段: {'、'.join(busiest)}" if busiest else ""))
+    else:
+        st.caption("事件归档为空，刷新数据源后将自动累积历史事件。")
+
+    # 意外指数（实际值 vs 预测值）
+    st.markdown("#### 🎯 数据意外指数")
+    surprises, usd_index = get_surprise_snapshot()
+    if usd_index is not None:
+        st.metric("美国意外指数", f"{usd_index:+.2f}")
+    this_week = surprises[surprises['title'].isin(events_df['title'].astype(str))] if not surprises.empty else surprises
+    if not this_week.empty:
+        st.dataframe(
+            this_week[['title', 'surprise', 'surprise_z']].rename(
+                columns={'title': '事件', 'surprise': '上次意外值', 'surprise_z': '标准化意外(z)'}),
+            use_container_width=True,
+            hide_index=True
         )
-
-        weekday_counts = events_df.groupby(['星期_排序', '星期中文']).size().reset_index(name='数量')
-        weekday_counts = weekday_counts.sort_values('星期_排序')
-
-        # 显示条形图
-        st.bar_chart(weekday_counts.set_index('星期中文')['数量'])
+    else:
+        st.caption("事件归档中尚无可计算意外值的历史发布。")
+
+    # 历史事件反应（事件研究）
+    st.markdown("#### 📈 历史事件反应")
+    pair = st.selectbox("货币对", ['USDCNH', 'USDCNY', 'EURUSD', 'USDJPY'], index=0)
+    reaction_rows = []
+    for title in events_df['title'].astype(str).unique():
+        move = get_typical_move(title, pair)
+        if move:
+            reaction_rows.append({
+                '事件': title,
+                '样本数': move['samples'],
+                '15分钟平均波动(bps)': round(move['abs_mean_bps'], 1),
+                '15分钟中位收益(bps)': round(move['median_bps'], 1),
+                '15分钟已实现波动率(bps)': round(move['rv_mean_bps'], 1),
+            })
+    if reaction_rows:
+        st.dataframe(pd.DataFrame(reaction_rows), use_container_width=True, hide_index=True)
+    else:
+        st.caption(f"暂无 {pair} 的本地报价或历史事件归档，无法计算事件反应。")
 
     # 数据下载
     st.markdown("### 💾 数据下载")
-    csv_data = events_df.to_csv(index=False).encode('utf-8-sig')
+    csv_data = display_df.to_csv(index=False).encode('utf-8-sig')
 
     col1, col2 = st.columns(2)
     with col1:
@@ -251,7 +330,7 @@ if not events_df.empty:
 
     with col2:
         # JSON格式
-        json_data = events_df.to_json(orient='records', force_ascii=False, indent=2)
+        json_data = display_df.to_json(orient='records', force_ascii=False, indent=2)
         st.download_button(
             label="下载JSON文件",
             data=json_data,
@@ -262,7 +341,7 @@ if not events_df.empty:
 
     # 原始数据预览
     with st.expander("查看原始数据样本"):
-        st.dataframe(events_df.head(10), use_container_width=True, hide_index=True)
+        st.dataframe(display_df.head(10), use_container_width=True, hide_index=True)
 
 else:
     st.warning("当前没有找到符合条件的美国高影响经济事件。")
@@ -278,6 +357,9 @@ else:
     - 确认数据源URL是否有效
     """)
 
+# 调试面板（侧边栏）
+render_timing_panel()
+
 # 页脚
 st.markdown("---")
 st.caption("数据来源: https://nfs.faireconomy.media/ff_calendar_thisweek.json")
@@ -0,0 +1,149 @@
+import hashlib
+import inspect
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from factor_pipeline import content_hash
+
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'FX_CHART_CACHE_DIR',
+    os.path.join(tempfile.gettempdir(), 'fx_chart_cache')
+)
+
+# 中文字体回退列表（按服务器上常见字体排序）
+CJK_FONTS = ['SimHei', 'Microsoft YaHei', 'Noto Sans CJK SC', 'WenQuanYi Micro Hei',
+             'Arial Unicode MS', 'DejaVu Sans']
+
+FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+
+def figure_data(analyzer, scenarios=None):
+    """从分析器中提取绘图所需的全部输入（纯数据，可哈希、可跨进程传递）"""
+    if scenarios is None:
+        scenarios = analyzer.run_stages(['scenarios'])['scenarios']
+    return build_figure_data(analyzer.importance_ranking, analyzer.correlation_matrix, scenarios)
+
+
+def build_figure_data(importance, correlation_matrix, scenarios):
+    """由各阶段结果组装绘图输入"""
+    return {
+        'importance': dict(importance or {}),
+        'correlation_matrix': correlation_matrix,
+        'scenarios': {name: {'probability': s['probability']} for name, s in scenarios.items()},
+        'risk_matrix': {
+            'risks': ['货币政策风险', '经济数据风险', '地缘政治风险', '市场情绪风险'],
+            'impact': [8, 6, 9, 5],
+            'probability': [7, 8, 4, 6],
+        },
+    }
+
+
+def draw_factor_figure(data):
+    """绘制2×2因子分析图（面向对象API + Agg画布，不依赖pyplot全局状态）"""
+    from matplotlib import rc_context
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    with rc_context({'font.sans-serif': CJK_FONTS, 'axes.unicode_minus': False}):
+        fig = Figure(figsize=(15, 12))
+        FigureCanvasAgg(fig)
+        axes = fig.subplots(2, 2)
+
+        # 1. 因子重要性条形图
+        factors = list(data['importance'].keys())
+        scores = list(data['importance'].values())
+
+        axes[0, 0].barh(factors, scores, color='steelblue')
+        axes[0, 0].set_xlabel('重要性得分')
+        axes[0, 0].set_title('USD/CNY影响因子重要性排序')
+        axes[0, 0].invert_yaxis()
+
+        # 2. 相关性热力图
+        corr = data.get('correlation_matrix')
+        if corr is not None:
+            im = axes[0, 1].imshow(corr.values, cmap='coolwarm', vmin=-1, vmax=1)
+            axes[0, 1].set_title('因子相关性热力图')
+            axes[0, 1].set_xticks(range(len(corr.columns)))
+            axes[0, 1].set_xticklabels(corr.columns, rotation=45)
+            axes[0, 1].set_yticks(range(len(corr.index)))
+            axes[0, 1].set_yticklabels(corr.index)
+            fig.colorbar(im, ax=axes[0, 1])
+
+        # 3. 情景分析饼图
+        scenarios = data['scenarios']
+        labels = [k.replace('_scenario', '').replace('_', ' ').title()
+                  for k in scenarios.keys()]
+        sizes = [s['probability'] for s in scenarios.values()]
+        colors = ['#ff9999', '#66b3ff', '#99ff99']
+
+        axes[1, 0].pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%',
+                       startangle=90)
+        axes[1, 0].set_title('USD/CNY情景分析概率分布')
+
+        # 4. 风险矩阵
+        risk = data['risk_matrix']
+        axes[1, 1].scatter(risk['probability'], risk['impact'], s=200, alpha=0.6,
+                           c=range(len(risk['risks'])), cmap='viridis')
+        axes[1, 1].set_xlabel('发生概率 (1-10)')
+        axes[1, 1].set_ylabel('影响程度 (1-10)')
+        axes[1, 1].set_title('风险矩阵分析')
+        axes[1, 1].grid(True, alpha=0.3)
+
+        # 添加风险标签
+        for i, name in enumerate(risk['risks']):
+            axes[1, 1].annotate(name, (risk['probability'][i], risk['impact'][i]),
+                                xytext=(5, 5), textcoords='offset points')
+
+        fig.tight_layout()
+    return fig
+
+
+def _renderer_version():
+    """绘图代码指纹，修改绘图逻辑后旧缓存自动失效"""
+    return hashlib.sha256(inspect.getsource(draw_factor_figure).encode('utf-8')).hexdigest()[:12]
+
+
+def artifact_path(data, fmt='png', cache_dir=None):
+    """图表产物路径：按输入数据内容哈希命名"""
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的图片格式: {fmt}（可选: {', '.join(FORMATS)}）")
+    key = content_hash({k: content_hash(v) for k, v in sorted(data.items())})
+    name = f"factor_report-{_renderer_version()}-{key[:24]}.{fmt}"
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, name)
+
+
+def render_factor_report(data, fmt='png', cache_dir=None, dpi=100):
+    """渲染因子分析图为PNG/SVG文件；相同输入直接返回缓存产物"""
+    path = artifact_path(data, fmt, cache_dir)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fig = draw_factor_figure(data)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=f'.{fmt}')
+    with os.fdopen(fd, 'wb') as f:
+        fig.savefig(f, format=fmt, dpi=dpi)
+    os.replace(tmp_path, path)
+    return path
+
+
+def figure_bytes(data, fmt='png', cache_dir=None):
+    """读取图表字节（供Streamlit st.image / download_button 直接嵌入，缓存命中时不重绘）"""
+    with open(render_factor_report(data, fmt, cache_dir), 'rb') as f:
+        return f.read()
+
+
+def _render_task(args):
+    data, fmt, cache_dir = args
+    return render_factor_report(data, fmt, cache_dir)
+
+
+def render_many(datasets, fmt='png', cache_dir=None, max_workers=None):
+    """在多个工作进程中并行渲染多份因子报告，返回产物路径列表（顺序与输入一致）"""
+    tasks = [(data, fmt, cache_dir) for data in datasets]
+    if max_workers == 1 or len(tasks) <= 1:
+        return [_render_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_render_task, tasks))
@@ -0,0 +1,29 @@
+import streamlit as st
+import pandas as pd
+
+from instrumentation import REGISTRY
+
+
+SUMMARY_COLUMNS = ['count', 'errors', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms']
+
+
+def render_timing_panel(registry=REGISTRY, key='timing'):
+    """侧边栏调试面板：各埋点调用次数与p50/p95/p99延迟，可导出JSON/Prometheus文本"""
+    with st.sidebar.expander("⏱️ 性能计时", expanded=False):
+        summary = registry.summary()
+        if not summary:
+            st.caption("暂无埋点数据")
+            return
+
+        df = pd.DataFrame.from_dict(summary, orient='index')[SUMMARY_COLUMNS]
+        st.dataframe(df.round(2), use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("JSON", data=registry.to_json(), file_name="timings.json",
+                               mime="application/json", key=f"{key}_json")
+        with col2:
+            st.download_button("Prometheus", data=registry.to_prometheus(), file_name="timings.prom",
+                               mime="text/plain", key=f"{key}_prom")
+        if st.button("清空计时", key=f"{key}_reset"):
+            registry.reset()
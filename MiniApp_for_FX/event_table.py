@@ -0,0 +1,153 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# 重要性图标
+IMPORTANCE_ICONS = {
+    'very_high': '🔴',
+    'high': '🟠',
+    'medium': '🟡',
+    'low': '🟢'
+}
+
+# 事件类型图标
+CATEGORY_ICONS = {
+    'fed': '🏛️',
+    'nfp': '📊',
+    'cpi': '📈',
+    'earnings': '💰'
+}
+
+
+def _column(events_df, name, default):
+    """取列（列不存在时返回默认值列），缺失值填默认值"""
+    if name in events_df.columns:
+        col = events_df[name]
+        if isinstance(col.dtype, pd.CategoricalDtype) and default not in col.cat.categories:
+            col = col.cat.add_categories([default])
+        return col.fillna(default)
+    return pd.Series(default, index=events_df.index, dtype=object)
+
+
+def _lookup(values, mapping, default):
+    """按去重后的取值做映射再回填，重复值多时比逐行get快得多"""
+    codes, uniques = pd.factorize(values)
+    mapped = np.array([mapping.get(u, default) for u in uniques] + [default], dtype=object)
+    return mapped[codes]
+
+
+def _format_dates(dates, fmt):
+    """只格式化去重后的日期（事件日期大量重复，strftime是主要开销）"""
+    codes, uniques = pd.factorize(dates)
+    formatted = np.append(pd.DatetimeIndex(uniques).strftime(fmt).to_numpy(dtype=object), '')
+    return formatted[codes]
+
+
+def build_event_table(events_df, market_schedule=None):
+    """经济事件显示表（整列向量化构建）
+
+    market_schedule 为 pandas_market_calendars 的交易日程，索引为交易日；
+    为空或None时全部标记为非交易日。
+    """
+    dates = events_df['date']
+    importance = _column(events_df, 'importance', 'medium').astype(str)
+    category = _column(events_df, 'category', '')
+
+    if market_schedule is not None and hasattr(market_schedule, 'index') and len(market_schedule) > 0:
+        is_trading = dates.isin(market_schedule.index).to_numpy()
+    else:
+        is_trading = np.zeros(len(events_df), dtype=bool)
+
+    return pd.DataFrame({
+        '日期': _format_dates(dates, '%Y-%m-%d'),
+        '星期': _format_dates(dates, '%A'),
+        '事件': _lookup(category, CATEGORY_ICONS, '📅') + ' ' + events_df['event'].astype(str).to_numpy(),
+        '重要性': _lookup(importance, IMPORTANCE_ICONS, '⚪') + ' ' + importance.to_numpy(),
+        '交易日': np.where(is_trading, '✅', '❌'),
+        '描述': _column(events_df, 'description', '').to_numpy(),
+    }).reset_index(drop=True)
+
+
+def query_events(df, search='', search_cols=None, sort_by=None, ascending=True):
+    """服务端筛选与排序：关键字（不区分大小写，子串匹配）+ 单列稳定排序"""
+    if search:
+        cols = search_cols or [c for c in df.columns if pd.api.types.is_string_dtype(df[c])]
+        mask = np.zeros(len(df), dtype=bool)
+        for col in cols:
+            mask |= df[col].astype(str).str.contains(search, case=False, regex=False).to_numpy()
+        df = df[mask]
+    if sort_by:
+        df = df.sort_values(sort_by, ascending=ascending, kind='stable')
+    return df
+
+
+def page_slice(df, page, page_size):
+    """第page页（从1开始，越界时夹到有效范围）的切片，返回 (切片, 页码, 总页数)"""
+    n_pages = max(1, -(-len(df) // page_size))
+    page = min(max(1, int(page)), n_pages)
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size], page, n_pages
+
+
+def _build_event_table_iterrows(events_df, market_schedule):
+    """逐行构建（旧实现，仅用于基准对比）"""
+    display_data = []
+    for idx, event in events_df.iterrows():
+        is_trading = False
+        if hasattr(market_schedule, 'index'):
+            is_trading = event['date'] in market_schedule.index
+        importance_icon = IMPORTANCE_ICONS.get(event.get('importance', 'medium'), '⚪')
+        category_icon = CATEGORY_ICONS.get(event.get('category', ''), '📅')
+        display_data.append({
+            '日期': event['date'].strftime('%Y-%m-%d'),
+            '星期': event['date'].strftime('%A'),
+            '事件': f"{category_icon} {event['event']}",
+            '重要性': f"{importance_icon} {event.get('importance', 'medium')}",
+            '交易日': '✅' if is_trading else '❌',
+            '描述': event.get('description', '')
+        })
+    return pd.DataFrame(display_data)
+
+
+def _sample_events(n_rows, seed=0):
+    """模拟多年、多类别的事件表"""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range('2015-01-01', '2030-12-31', freq='D')
+    categories = np.array(list(CATEGORY_ICONS) + ['gdp', 'pmi'])
+    levels = np.array(list(IMPORTANCE_ICONS))
+    return pd.DataFrame({
+        'date': days[rng.integers(0, len(days), n_rows)],
+        'event': np.char.add('事件', rng.integers(0, 500, n_rows).astype(str)),
+        'importance': levels[rng.integers(0, len(levels), n_rows)],
+        'category': categories[rng.integers(0, len(categories), n_rows)],
+        'description': '',
+    }).sort_values('date').reset_index(drop=True)
+
+
+def benchmark(n_rows=100000, repeat=3):
+    """对比逐行与向量化构建的耗时"""
+    events = _sample_events(n_rows)
+    bdays = pd.bdate_range(events['date'].min(), events['date'].max())
+    schedule = pd.DataFrame({'market_open': bdays}, index=bdays)
+
+    fast = build_event_table(events, schedule)
+    slow = _build_event_table_iterrows(events, schedule)
+    pd.testing.assert_frame_equal(fast, slow, check_dtype=False)
+
+    vectorized = min(_timed(build_event_table, events, schedule) for _ in range(repeat))
+    iterrows = _timed(_build_event_table_iterrows, events, schedule)
+    print(f"行数: {n_rows:,}")
+    print(f"逐行 iterrows: {iterrows:.3f}s")
+    print(f"向量化:        {vectorized:.3f}s  (加速 {iterrows / vectorized:.0f}x)")
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    benchmark()
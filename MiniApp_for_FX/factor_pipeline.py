@@ -0,0 +1,199 @@
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'FX_FACTOR_CACHE_DIR',
+    os.path.join(tempfile.gettempdir(), 'fx_factor_cache')
+)
+
+
+def content_hash(obj):
+    """计算对象内容哈希（DataFrame/ndarray按数据内容，其余按pickle字节）"""
+    h = hashlib.sha256()
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        labels = list(obj.columns) if isinstance(obj, pd.DataFrame) else [obj.name]
+        h.update(pickle.dumps(labels))
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(str(obj.dtype).encode())
+        h.update(str(obj.shape).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    else:
+        h.update(pickle.dumps(obj, protocol=4))
+    return h.hexdigest()
+
+
+def _code_fingerprint(func):
+    """函数源码指纹，代码变化时缓存自动失效"""
+    target = getattr(func, '__func__', func)
+    try:
+        source = inspect.getsource(target)
+    except (OSError, TypeError):
+        source = getattr(target, '__qualname__', repr(target))
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+class Stage:
+    """流水线阶段：名称、计算函数、依赖阶段
+
+    计算函数以关键字参数接收各上游阶段的结果（参数名即阶段名）和 params，
+    阶段读取的全部输入都应声明为依赖，缓存键才能覆盖这些输入。
+    """
+
+    def __init__(self, name, func, deps=(), params=None, ttl=None, on_result=None, cache=True):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.params = params or {}
+        self.ttl = ttl  # 秒；None表示只要输入不变就永不过期
+        self.on_result = on_result  # 结果（无论来自缓存还是计算）回写到调用方的钩子，在协调线程中调用
+        self.cache = cache  # 输入来自外部状态（如调用方传入的数据）的阶段应关闭缓存
+
+
+class ReportPipeline:
+    """按依赖关系执行的报告流水线 - 磁盘内容哈希缓存 + 并行执行 + 分阶段计时
+
+    run 由锁串行化：多个线程（如多个Streamlit会话）共用同一流水线时依次执行，
+    阶段结果的回写（on_result）只在持锁的协调线程中进行。
+    """
+
+    def __init__(self, cache_dir=None, max_workers=4, use_cache=True, on_timing=None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_workers = max_workers
+        self.use_cache = use_cache
+        self.on_timing = on_timing
+        self.stages = {}
+        self.results = {}
+        self.hashes = {}
+        self.timings = []
+        self._lock = threading.RLock()
+
+    def add_stage(self, name, func, deps=(), params=None, ttl=None, on_result=None, cache=True):
+        """注册阶段"""
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"阶段 {name} 依赖未注册的阶段: {dep}")
+        self.stages[name] = Stage(name, func, deps, params, ttl, on_result, cache)
+        return self
+
+    def _closure(self, targets):
+        """目标阶段及其全部上游阶段"""
+        needed = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name in needed:
+                continue
+            if name not in self.stages:
+                raise KeyError(f"未知阶段: {name}")
+            needed.add(name)
+            stack.extend(self.stages[name].deps)
+        return needed
+
+    def _stage_key(self, stage):
+        """阶段缓存键 = 阶段名 + 代码指纹 + 参数 + 各上游输出的内容哈希"""
+        h = hashlib.sha256()
+        h.update(stage.name.encode('utf-8'))
+        h.update(_code_fingerprint(stage.func).encode('utf-8'))
+        h.update(content_hash(sorted(stage.params.items())).encode('utf-8'))
+        for dep in stage.deps:
+            h.update(self.hashes[dep].encode('utf-8'))
+        return h.hexdigest()
+
+    def _cache_path(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage.name}-{key[:24]}.pkl")
+
+    def _load(self, stage, key):
+        path = self._cache_path(stage, key)
+        if not os.path.exists(path):
+            return False, None
+        if stage.ttl is not None and time.time() - os.path.getmtime(path) > stage.ttl:
+            return False, None
+        try:
+            with open(path, 'rb') as f:
+                return True, pickle.load(f)
+        except Exception:
+            return False, None
+
+    def _save(self, stage, key, value):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._cache_path(stage, key)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=4)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"   ⚠️ 阶段 {stage.name} 缓存写入失败: {e}")
+
+    def _execute(self, stage):
+        """执行单个阶段（在工作线程中运行）"""
+        start = time.perf_counter()
+        key = self._stage_key(stage)
+        use_cache = self.use_cache and stage.cache
+        hit, value = (False, None)
+        if use_cache:
+            hit, value = self._load(stage, key)
+        if not hit:
+            inputs = {dep: self.results[dep] for dep in stage.deps}
+            value = stage.func(**inputs, **stage.params)
+            if use_cache:
+                self._save(stage, key, value)
+        elapsed = time.perf_counter() - start
+        return value, {'stage': stage.name, 'seconds': elapsed, 'cached': hit}
+
+    def run(self, targets=None):
+        """执行目标阶段（默认全部），互不依赖的阶段并行执行"""
+        with self._lock:
+            return self._run(targets)
+
+    def _run(self, targets):
+        needed = self._closure(targets or list(self.stages))
+        done = set()
+        running = {}
+        self.timings = []
+        pipeline_start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while len(done) < len(needed):
+                for name in needed:
+                    if name in done or name in running.values():
+                        continue
+                    if all(dep in done for dep in self.stages[name].deps):
+                        future = pool.submit(self._execute, self.stages[name])
+                        running[future] = name
+
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    value, timing = future.result()
+                    if self.stages[name].on_result is not None:
+                        self.stages[name].on_result(value)
+                    self.results[name] = value
+                    self.hashes[name] = content_hash(value)
+                    self.timings.append(timing)
+                    done.add(name)
+                    if self.on_timing is not None:
+                        self.on_timing(timing)
+
+        self.timings.append({'stage': 'total', 'seconds': time.perf_counter() - pipeline_start,
+                             'cached': False})
+        return {name: self.results[name] for name in needed}
+
+    def format_timings(self):
+        """格式化阶段耗时表"""
+        lines = []
+        for t in self.timings:
+            flag = ' (缓存)' if t['cached'] else ''
+            lines.append(f"  {t['stage']:<14} {t['seconds'] * 1000:8.1f} ms{flag}")
+        return "\n".join(lines)
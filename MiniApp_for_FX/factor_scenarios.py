@@ -0,0 +1,179 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+# 情景划分：按期末USDCNY所处区间归类（与原固定情景的目标区间一致）
+DEFAULT_BUCKETS = {
+    'bullish_usd_scenario': (7.25, np.inf),
+    'range_bound_scenario': (7.10, 7.25),
+    'bearish_usd_scenario': (-np.inf, 7.10),
+}
+
+
+def fit_factor_model(panel, target='usdcny'):
+    """在历史因子面板上拟合线性因子模型（OLS），并估计因子均值与协方差"""
+    factors = [c for c in panel.columns if c != target]
+    X = panel[factors].to_numpy(dtype=float)
+    y = panel[target].to_numpy(dtype=float)
+
+    design = np.column_stack([np.ones(len(X)), X])
+    coef, _, _, _ = np.linalg.lstsq(design, y, rcond=None)
+    resid = y - design @ coef
+    r2 = 1 - resid.var() / y.var() if y.var() > 0 else 0.0
+
+    return {
+        'factors': factors,
+        'intercept': float(coef[0]),
+        'beta': coef[1:],
+        'resid_std': float(resid.std(ddof=len(coef))),
+        'mean': X.mean(axis=0),
+        'cov': np.cov(X, rowvar=False),
+        'r2': float(r2),
+    }
+
+
+def _simulate_chunk(args):
+    """模拟一批路径（进程池工作函数，须为模块级函数）"""
+    (seed_seq, n_paths, horizon, spot, f0, mean, chol, beta, phi, idio_vol,
+     return_paths) = args
+    rng = np.random.default_rng(seed_seq)
+    k = len(f0)
+
+    # 因子服从离散OU过程：F_t - μ = φ(F_{t-1} - μ) + sqrt(1-φ²)·L·z_t
+    # 展开为 F_t - μ = φ^t(F_0 - μ) + φ^t·Σ_{s≤t} φ^{-s}·η_s，
+    # 用累积和一次性完成时间维度的递推（按路径、时间两个维度同时向量化）
+    z = rng.standard_normal((n_paths, horizon, k))
+    eta = (z @ chol.T) * np.sqrt(1.0 - phi ** 2)
+    steps = np.arange(1, horizon + 1)
+    decay = phi ** steps                                   # φ^t
+    acc = np.cumsum(eta / decay[None, :, None], axis=1)    # Σ φ^{-s}·η_s
+    dev = decay[None, :, None] * ((f0 - mean)[None, None, :] + acc)
+
+    # 价格 = 现价 + β·(F_t - F_0) + 特质误差
+    # resid_std 来自水平回归，特质误差是平稳的水平偏差而非随机游走：同样按OU过程
+    # e_t = φ·e_{t-1} + sqrt(1-φ²)·σ·ξ_t（e_0 = 0）演化，期末标准差不超过 σ
+    factor_move = (dev - (f0 - mean)[None, None, :]) @ beta
+    xi = rng.standard_normal((n_paths, horizon)) * (idio_vol * np.sqrt(1.0 - phi ** 2))
+    idio = decay[None, :] * np.cumsum(xi / decay[None, :], axis=1)
+    paths = spot + factor_move + idio
+
+    if return_paths:
+        return np.column_stack([np.full(n_paths, spot), paths])
+    return paths[:, -1]
+
+
+class ScenarioEngine:
+    """USDCNY蒙特卡洛情景引擎 - 基于拟合因子模型生成汇率路径"""
+
+    def __init__(self, model, spot, current_factors=None, horizon=63, half_life=120,
+                 idio_vol=None, seed=None):
+        self.model = model
+        self.spot = float(spot)
+        self.horizon = int(horizon)
+        self.seed = seed
+
+        self.mean = np.asarray(model['mean'], dtype=float)
+        self.f0 = self.mean.copy()
+        for i, name in enumerate(model['factors']):
+            if current_factors and current_factors.get(name) is not None:
+                self.f0[i] = float(current_factors[name])
+
+        # 因子协方差的Cholesky分解（加微小抖动保证正定）
+        cov = np.atleast_2d(model['cov'])
+        self.chol = np.linalg.cholesky(cov + np.eye(len(cov)) * 1e-12)
+        self.beta = np.asarray(model['beta'], dtype=float)
+        self.phi = 0.5 ** (1.0 / half_life)
+        self.idio_vol = model['resid_std'] if idio_vol is None else idio_vol  # 特质误差的平稳标准差
+
+        if self.phi ** -self.horizon > 1e8:
+            raise ValueError("半衰期相对模拟期限过短，累积和递推数值不稳定")
+
+    def simulate(self, n_paths=20000, n_workers=1, chunk_size=5000, return_paths=False):
+        """生成路径；返回期末价格数组（或完整路径矩阵）
+
+        按chunk_size固定切块并为每块派生独立种子，结果与进程数无关，
+        相同seed下完全可复现。
+        """
+        n_chunks = max(1, -(-n_paths // chunk_size))
+        seeds = np.random.SeedSequence(self.seed).spawn(n_chunks)
+        sizes = [chunk_size] * (n_chunks - 1) + [n_paths - chunk_size * (n_chunks - 1)]
+        tasks = [(seeds[i], sizes[i], self.horizon, self.spot, self.f0, self.mean,
+                  self.chol, self.beta, self.phi, self.idio_vol, return_paths)
+                 for i in range(n_chunks)]
+
+        if n_workers and n_workers > 1 and n_chunks > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                parts = list(pool.map(_simulate_chunk, tasks))
+        else:
+            parts = [_simulate_chunk(task) for task in tasks]
+
+        return np.concatenate(parts, axis=0)
+
+    def estimate_scenarios(self, terminal, buckets=None):
+        """由期末价格估计各情景概率与目标区间分布"""
+        buckets = buckets or DEFAULT_BUCKETS
+        terminal = np.asarray(terminal)
+        n = len(terminal)
+        results = {}
+
+        for name, (low, high) in buckets.items():
+            in_bucket = terminal[(terminal >= low) & (terminal < high)]
+            probability = 100.0 * len(in_bucket) / n if n else 0.0
+            if len(in_bucket) > 0:
+                q = np.percentile(in_bucket, [5, 25, 50, 75, 95])
+                target = f"{q[1]:.2f}-{q[3]:.2f}"
+            else:
+                q = np.full(5, np.nan)
+                target = 'N/A'
+            results[name] = {
+                'probability': round(probability, 1),
+                'usdcny_target': target,
+                'target_distribution': dict(zip(['p5', 'p25', 'p50', 'p75', 'p95'],
+                                                np.round(q, 4).tolist())),
+            }
+
+        return results
+
+    def run(self, n_paths=20000, n_workers=1, buckets=None):
+        """模拟并汇总情景"""
+        terminal = self.simulate(n_paths=n_paths, n_workers=n_workers)
+        return self.estimate_scenarios(terminal, buckets)
+
+
+def benchmark(model, spot, path_counts=(10000, 100000, 500000), n_workers=1, seed=42):
+    """路径生成速度基准：打印每秒路径数"""
+    engine = ScenarioEngine(model, spot, seed=seed)
+    print(f"蒙特卡洛基准 (期限 {engine.horizon} 步, {len(engine.beta)} 因子, 进程数 {n_workers})")
+    print("-" * 60)
+
+    results = []
+    for n_paths in path_counts:
+        start = time.perf_counter()
+        engine.simulate(n_paths=n_paths, n_workers=n_workers)
+        elapsed = time.perf_counter() - start
+        rate = n_paths / elapsed
+        results.append({'n_paths': n_paths, 'seconds': elapsed, 'paths_per_sec': rate})
+        print(f"  {n_paths:>9,d} 条路径: {elapsed:7.3f} 秒  ({rate:,.0f} 条/秒)")
+
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    import pandas as pd
+
+    # 简化的模拟因子面板（与因子分析器同分布的三个因子）
+    np.random.seed(42)
+    n = 100
+    panel = pd.DataFrame({
+        'interest_rate_diff': np.random.normal(2.5, 0.3, n),
+        'dxy_index': np.random.normal(104, 2, n),
+        'risk_appetite': np.random.uniform(0.3, 0.8, n),
+    })
+    panel['usdcny'] = (7.0 + 0.3 * panel['interest_rate_diff'] + 0.02 * panel['dxy_index']
+                       - 0.1 * panel['risk_appetite'] + np.random.normal(0, 0.01, n))
+
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    benchmark(fit_factor_model(panel), spot=7.1850, n_workers=workers)
@@ -0,0 +1,113 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from event_cube import EventCube
+from event_table import _format_dates
+
+
+# 显示表列（北京时间字符串在构建时一次生成）
+DISPLAY_COLUMNS = ['日期', '星期', '时间(北京)', '事件', '预测值', '前值']
+
+
+def _copy_on_write_enabled():
+    """pandas>=3 始终写时复制；2.x 需显式开启 mode.copy_on_write（'warn' 不算）"""
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return True
+    return pd.options.mode.copy_on_write is True
+
+
+# 只读视图依赖写时复制：否则会话内修改视图会改到所有会话共享的数据
+if not _copy_on_write_enabled():
+    raise ImportError("shared_feed 需要 pandas>=3，或在导入前设置 pd.set_option('mode.copy_on_write', True)")
+
+
+class SharedFeed:
+    """进程内共享的只读事件表：由 st.cache_resource 持有，所有会话共用同一份数据
+
+    派生列（当地日期/星期/时间字符串）与统计立方体在构建时计算一次。
+    events()/display() 返回写时复制（pandas Copy-on-Write）的视图：不复制数据，
+    会话内对视图的修改只复制被修改的列，共享数据不变。
+    """
+
+    def __init__(self, events, tz):
+        events = events.reset_index(drop=True)
+        local = events['timestamp'].dt.tz_convert(tz)
+        local_naive = local.dt.tz_localize(None)
+
+        self.tz = tz
+        self._events = events
+        self._display = pd.DataFrame({
+            '日期': _format_dates(local_naive.dt.normalize(), '%Y-%m-%d'),
+            '星期': _format_dates(local_naive.dt.normalize(), '%A'),
+            '时间(北京)': local_naive.dt.strftime('%H:%M').to_numpy(dtype=object),
+            '事件': events['title'].astype(str),
+            '预测值': events['forecast'],
+            '前值': events['previous'],
+        }, columns=DISPLAY_COLUMNS)
+        # 统计（总数、含预测数、按星期分布等）均从立方体读取
+        self.cube = EventCube(tz, key=None)  # 一次性构建，与显示表逐行对应，不去重
+        self.cube.add(events)
+        # 数据版本（供分页表格等按版本缓存，无需逐次哈希内容）
+        self.version = int(pd.util.hash_pandas_object(events[['timestamp']], index=False).sum()) if len(events) else 0
+        self.built_at = time.time()
+
+    def __len__(self):
+        return len(self._events)
+
+    @property
+    def empty(self):
+        return self._events.empty
+
+    def events(self, mask=None):
+        """事件表视图（mask为布尔数组时只取对应行）"""
+        return self._events.copy(deep=False) if mask is None else self._events[np.asarray(mask)]
+
+    def display(self, mask=None):
+        """显示表视图（mask为布尔数组时只取对应行）"""
+        return self._display.copy(deep=False) if mask is None else self._display[np.asarray(mask)]
+
+    def memory_usage(self):
+        """共享数据占用字节数（事件表 + 显示表）"""
+        return int(self._events.memory_usage(deep=True).sum() + self._display.memory_usage(deep=True).sum())
+
+
+def benchmark(n_events=20000, sessions=50):
+    """多会话：每个会话拿到 st.cache_data 式的深拷贝并追加星期列 vs 共享只读视图"""
+    import pickle
+    import tracemalloc
+
+    from event_schema import _sample_feed, to_event_frame
+
+    events = to_event_frame(_sample_feed(n_events))
+    feed = SharedFeed(events, 'Asia/Shanghai')
+
+    def copied_session():
+        df = pickle.loads(pickle.dumps(events))
+        local = df['timestamp'].dt.tz_convert('Asia/Shanghai')
+        df['星期中文'] = local.dt.dayofweek
+        df['星期_排序'] = local.dt.dayofweek
+        return df, df['星期中文'].value_counts()
+
+    def shared_session():
+        return feed.events(), feed.display(), feed.cube.marginal('weekday')
+
+    for name, session in [('深拷贝+派生列', copied_session), ('共享只读视图', shared_session)]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        held = [session() for _ in range(sessions)]
+        elapsed = time.perf_counter() - start
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name}: {sessions}个会话 {elapsed * 1e3:.0f} ms, 新增内存 {current / 1e6:.1f} MB")
+        del held
+    print(f"共享数据本身: {feed.memory_usage() / 1e6:.1f} MB（{n_events:,}行）")
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Calendar_BE'))
+    benchmark()
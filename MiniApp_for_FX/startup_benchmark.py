@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 被测脚本：名称 → (作为模块导入时的模块名, 导入代码)；脚本名含空格时按文件路径加载
+TARGETS = {
+    'MiniApp.py': ('MiniApp', "import MiniApp"),
+    'Factor Analysis.py': (None, "import importlib.util as u; "
+                                 "s = u.spec_from_file_location('factor_analysis', 'Factor Analysis.py'); "
+                                 "s.loader.exec_module(u.module_from_spec(s))"),
+}
+
+# 需要延迟导入的重型模块（出现在启动导入中即视为回退）
+HEAVY_MODULES = ['pandas_market_calendars', 'matplotlib', 'scipy']
+
+
+def import_profile(code, cwd=HERE):
+    """用 -X importtime 运行代码，返回 [(嵌套层级, 模块名, 累计耗时(微秒))]（按完成顺序）"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=cwd,
+                            stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, universal_newlines=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split(':', 1)[1].split('|')
+        # 缩进（每层2个空格）表示嵌套层级
+        depth = (len(name) - len(name.lstrip()) + 1) // 2
+        entries.append((depth, name.strip(), int(cumulative_us)))
+    return entries
+
+
+def startup_modules(entries, baseline, script_module=None):
+    """启动导入的主要模块：顶层导入（解释器自身启动的除外）；被测脚本本身展开为其直接导入"""
+    top, children = {}, {}
+    for depth, name, us in entries:
+        if depth == 2:
+            children[name] = us
+        elif depth == 1:
+            if name in baseline:
+                children = {}
+                continue
+            if name == script_module:
+                top.update(children)
+            else:
+                top[name] = us
+            children = {}
+    return top
+
+
+def benchmark(repeat=3, top=8):
+    """各脚本启动导入耗时（取多次最小值）、最重的模块及重型模块检查"""
+    baseline = {name for _, name, _ in import_profile('pass')}
+    for target, (script_module, code) in TARGETS.items():
+        runs = [import_profile(code) for _ in range(repeat)]
+        entries = min(runs, key=lambda e: sum(us for depth, name, us in e if depth == 1 and name not in baseline))
+        total_ms = sum(us for depth, name, us in entries if depth == 1 and name not in baseline) / 1e3
+        modules = {name for _, name, _ in entries}
+
+        print(f"\n=== {target} ===")
+        print(f"启动导入总耗时: {total_ms:.0f} ms")
+        ranked = sorted(startup_modules(entries, baseline, script_module).items(), key=lambda kv: -kv[1])
+        for name, us in ranked[:top]:
+            print(f"  {name:<40s} {us / 1e3:8.1f} ms")
+
+        loaded = [m for m in HEAVY_MODULES if m in modules]
+        if loaded:
+            print(f"  ⚠️ 启动时导入了重型模块: {', '.join(loaded)}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,55 @@
+import streamlit as st
+import pandas as pd
+
+from event_table import page_slice, query_events
+
+
+# 每页行数选项
+PAGE_SIZES = [25, 50, 100, 200]
+# 表格行高（像素），用于按当前页行数设置表格高度
+ROW_HEIGHT = 35
+
+
+@st.cache_data(ttl=600, max_entries=64)
+def _query(_df, data_key, search, search_cols, sort_by, ascending):
+    """筛选/排序结果按(数据版本, 查询条件)缓存；_df不参与哈希，由data_key标识数据版本"""
+    return query_events(_df, search, list(search_cols) if search_cols else None, sort_by, ascending)
+
+
+def paginated_dataframe(df, key, data_key=None, search_cols=None, page_size=50, **dataframe_kwargs):
+    """分页表格：筛选、排序在服务端的缓存数据上完成，只把当前页发送到浏览器
+
+    key: 控件键前缀（同一页面多个表格需不同）
+    data_key: 数据版本标识，未提供时按内容哈希
+    """
+    if data_key is None:
+        data_key = int(pd.util.hash_pandas_object(df, index=False).sum())
+
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    with col1:
+        search = st.text_input("🔍 搜索", key=f"{key}_search", placeholder="输入关键字筛选")
+    with col2:
+        sort_by = st.selectbox("排序", ['默认'] + list(df.columns), key=f"{key}_sort")
+    with col3:
+        order = st.selectbox("顺序", ['升序', '降序'], key=f"{key}_order")
+    with col4:
+        size = st.selectbox("每页", PAGE_SIZES, index=PAGE_SIZES.index(page_size) if page_size in PAGE_SIZES else 1,
+                            key=f"{key}_size")
+
+    result = _query(df, data_key, search.strip(), tuple(search_cols or ()),
+                    None if sort_by == '默认' else sort_by, order == '升序')
+
+    n_pages = max(1, -(-len(result) // size))
+    page = st.number_input(f"页码（共 {n_pages} 页）", min_value=1, max_value=n_pages, value=1, step=1,
+                           key=f"{key}_page")
+    view, page, n_pages = page_slice(result, page, size)
+
+    dataframe_kwargs.setdefault('hide_index', True)
+    dataframe_kwargs.setdefault('use_container_width', True)
+    dataframe_kwargs.setdefault('height', min(len(view) + 1, 16) * ROW_HEIGHT + 3)
+    st.dataframe(view, **dataframe_kwargs)
+
+    start = (page - 1) * size
+    st.caption(f"显示第 {start + 1 if len(view) else 0}-{start + len(view)} 条，"
+               f"共 {len(result):,} 条（总计 {len(df):,} 条）")
+    return view
@@ -0,0 +1,382 @@
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# 指标参数
+MA_SHORT = 20
+MA_LONG = 50
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+BOLL_WINDOW = 20
+BOLL_STD = 2.0
+PIVOT_WINDOW = 10
+# 支撑/阻力只取最近的枢轴点个数（批量与流式相同，流式每个tick的开销与历史长度无关）
+MAX_PIVOTS = 100
+N_LEVELS = 3
+
+# EWM分块闭式递推的块长：β^-B 保持在数量级可控范围内
+_EWM_BLOCK = 64
+
+
+# =========== 向量化内核 ===========
+
+def sma(prices, window):
+    """简单移动平均（累积和实现，前window-1个为NaN）"""
+    x = np.asarray(prices, dtype=float)
+    out = np.full(len(x), np.nan)
+    if len(x) < window:
+        return out
+    csum = np.cumsum(np.concatenate([[0.0], x - x[0]]))
+    out[window - 1:] = (csum[window:] - csum[:-window]) / window + x[0]
+    return out
+
+
+def rolling_std(prices, window):
+    """滚动标准差（总体标准差，累积和实现）"""
+    x = np.asarray(prices, dtype=float)
+    out = np.full(len(x), np.nan)
+    if len(x) < window:
+        return out
+    # 以首值为参照平移，减少平方和相减的精度损失
+    d = x - x[0]
+    s1 = np.cumsum(np.concatenate([[0.0], d]))
+    s2 = np.cumsum(np.concatenate([[0.0], d * d]))
+    mean = (s1[window:] - s1[:-window]) / window
+    var = (s2[window:] - s2[:-window]) / window - mean * mean
+    out[window - 1:] = np.sqrt(np.maximum(var, 0.0))
+    return out
+
+
+def ewm(values, alpha):
+    """指数加权递推 y_t = (1-α)·y_{t-1} + α·x_t，y_0 = x_0
+
+    与 pandas ewm(adjust=False) 一致。块内用闭式
+    y_j = β^j·y_0 + α·β^j·Σ β^{-s}·x_s 以累积和一次算完，块间传递末值。
+    """
+    x = np.asarray(values, dtype=float)
+    n = len(x)
+    out = np.empty(n)
+    if n == 0:
+        return out
+    beta = 1.0 - alpha
+    out[0] = x[0]
+    powers = beta ** np.arange(1, _EWM_BLOCK + 1)
+    prev = x[0]
+    for start in range(1, n, _EWM_BLOCK):
+        block = x[start:start + _EWM_BLOCK]
+        p = powers[:len(block)]
+        out[start:start + len(block)] = p * (prev + alpha * np.cumsum(block / p))
+        prev = out[start + len(block) - 1]
+    return out
+
+
+def ema(prices, span):
+    """指数移动平均"""
+    return ewm(prices, 2.0 / (span + 1))
+
+
+def rsi(prices, period=RSI_PERIOD):
+    """RSI（Wilder平滑，α = 1/period）"""
+    x = np.asarray(prices, dtype=float)
+    out = np.full(len(x), np.nan)
+    if len(x) <= period:
+        return out
+    delta = np.diff(x)
+    gain = ewm(np.maximum(delta, 0.0), 1.0 / period)
+    loss = ewm(np.maximum(-delta, 0.0), 1.0 / period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = gain / loss
+        values = np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + rs))
+    out[1:] = values
+    out[:period] = np.nan
+    return out
+
+
+def macd(prices, fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL):
+    """MACD线、信号线、柱状图"""
+    line = ema(prices, fast) - ema(prices, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(prices, window=BOLL_WINDOW, n_std=BOLL_STD):
+    """布林带：上轨、中轨、下轨"""
+    middle = sma(prices, window)
+    std = rolling_std(prices, window)
+    return middle + n_std * std, middle, middle - n_std * std
+
+
+def rolling_extrema(prices, window):
+    """居中滚动极值（窗口 2*window+1），边缘为NaN"""
+    x = np.asarray(prices, dtype=float)
+    lo = np.full(len(x), np.nan)
+    hi = np.full(len(x), np.nan)
+    size = 2 * window + 1
+    if len(x) < size:
+        return lo, hi
+    view = sliding_window_view(x, size)
+    lo[window:len(x) - window] = view.min(axis=1)
+    hi[window:len(x) - window] = view.max(axis=1)
+    return lo, hi
+
+
+def _nearest_levels(pivots, current, below, n_levels, tolerance):
+    """从枢轴点中挑选距当前价最近的若干个（去除过于接近的重复价位）"""
+    pivots = np.asarray(pivots, dtype=float)
+    if below:
+        candidates = np.sort(pivots[pivots < current])[::-1]
+    else:
+        candidates = np.sort(pivots[pivots > current])
+    levels = []
+    for level in candidates:
+        if all(abs(level - kept) > tolerance for kept in levels):
+            levels.append(round(float(level), 4))
+        if len(levels) >= n_levels:
+            break
+    return levels
+
+
+def support_resistance(prices, window=PIVOT_WINDOW, n_levels=N_LEVELS, tolerance=0.002, max_pivots=MAX_PIVOTS):
+    """支撑/阻力位：最近 max_pivots 个枢轴低点/高点（居中滚动极值处）中距当前价最近的价位"""
+    x = np.asarray(prices, dtype=float)
+    lo, hi = rolling_extrema(x, window)
+    current = x[-1]
+    support = _nearest_levels(x[x == lo][-max_pivots:], current, True, n_levels, tolerance)
+    resistance = _nearest_levels(x[x == hi][-max_pivots:], current, False, n_levels, tolerance)
+    return support, resistance
+
+
+def _trend(price, ma_short, ma_long):
+    if price > ma_short > ma_long:
+        return 'uptrend'
+    if price < ma_short < ma_long:
+        return 'downtrend'
+    return 'sideways'
+
+
+def _rsi_signal(value):
+    if value >= 70:
+        return 'overbought'
+    if value >= 55:
+        return 'neutral_bullish'
+    if value > 45:
+        return 'neutral'
+    if value > 30:
+        return 'neutral_bearish'
+    return 'oversold'
+
+
+def _volume_trend(volumes):
+    if volumes is None or len(volumes) < MA_SHORT:
+        return {'current': 'unknown', 'avg_ratio': None}
+    v = np.asarray(volumes, dtype=float)
+    ratio = float(v[-5:].mean() / v[-MA_SHORT:].mean()) if v[-MA_SHORT:].mean() > 0 else None
+    if ratio is None:
+        return {'current': 'unknown', 'avg_ratio': None}
+    return {'current': 'increasing' if ratio > 1 else 'decreasing', 'avg_ratio': round(ratio, 2)}
+
+
+def compute_indicators(prices, volumes=None):
+    """由价格序列一次性计算全部技术因子，输出与 fetch_technical_factors 相同的结构"""
+    x = np.asarray(prices, dtype=float)
+    if len(x) < MA_LONG:
+        raise ValueError(f"价格序列长度不足（至少需要{MA_LONG}个数据点）")
+
+    ma20 = sma(x, MA_SHORT)[-1]
+    ma50 = sma(x, MA_LONG)[-1]
+    rsi_value = rsi(x)[-1]
+    macd_line, signal_line, hist = macd(x)
+    upper, middle, lower = bollinger(x)
+    band_width = upper - lower
+    support, resistance = support_resistance(x)
+
+    return {
+        'usdcny_price': {'current': round(float(x[-1]), 4), 'ma20': round(float(ma20), 4),
+                         'ma50': round(float(ma50), 4), 'trend': _trend(x[-1], ma20, ma50)},
+        'rsi_14': {'value': round(float(rsi_value), 1), 'signal': _rsi_signal(rsi_value),
+                   'overbought': bool(rsi_value >= 70)},
+        'macd': {'value': round(float(macd_line[-1]), 4), 'signal': round(float(signal_line[-1]), 4),
+                 'histogram': round(float(hist[-1]), 4),
+                 'trend': 'bullish' if hist[-1] > 0 else 'bearish'},
+        'bollinger_bands': {'upper': round(float(upper[-1]), 4), 'middle': round(float(middle[-1]), 4),
+                            'lower': round(float(lower[-1]), 4),
+                            'width': 'expanding' if band_width[-1] > band_width[-6] else 'contracting'},
+        'support_levels': support,
+        'resistance_levels': resistance,
+        'volume_trend': _volume_trend(volumes),
+    }
+
+
+# =========== 流式更新 ===========
+
+class _RollingWindow:
+    """定长窗口的滑动和/平方和（O(1)更新）"""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.ref = None
+        self.s1 = 0.0
+        self.s2 = 0.0
+
+    def push(self, value):
+        if self.ref is None:
+            self.ref = value
+        d = value - self.ref
+        if len(self.values) == self.window:
+            old = self.values[0] - self.ref
+            self.s1 -= old
+            self.s2 -= old * old
+        self.values.append(value)
+        self.s1 += d
+        self.s2 += d * d
+
+    @property
+    def full(self):
+        return len(self.values) == self.window
+
+    def mean(self):
+        return self.s1 / len(self.values) + self.ref
+
+    def std(self):
+        n = len(self.values)
+        m = self.s1 / n
+        return np.sqrt(max(self.s2 / n - m * m, 0.0))
+
+
+class _MonotonicExtrema:
+    """单调队列维护的滑动窗口最小/最大值（均摊O(1)）"""
+
+    def __init__(self, window):
+        self.window = window
+        self.min_q = deque()
+        self.max_q = deque()
+
+    def push(self, t, value):
+        while self.min_q and self.min_q[-1][1] >= value:
+            self.min_q.pop()
+        while self.max_q and self.max_q[-1][1] <= value:
+            self.max_q.pop()
+        self.min_q.append((t, value))
+        self.max_q.append((t, value))
+        while self.min_q[0][0] <= t - self.window:
+            self.min_q.popleft()
+        while self.max_q[0][0] <= t - self.window:
+            self.max_q.popleft()
+
+    def argmin(self):
+        return self.min_q[0]
+
+    def argmax(self):
+        return self.max_q[0]
+
+
+class StreamingIndicators:
+    """逐笔（tick）更新的技术指标：每次 update 为O(1)（均摊），结果与 compute_indicators 一致
+
+    支撑/阻力只保留最近 MAX_PIVOTS 个枢轴点（与批量计算相同的上限），snapshot 的开销同样与历史长度无关。
+    """
+
+    def __init__(self):
+        self.t = -1
+        self.price = None
+        self.ma_short = _RollingWindow(MA_SHORT)
+        self.ma_long = _RollingWindow(MA_LONG)
+        self.boll = _RollingWindow(BOLL_WINDOW)
+        self.ema_fast = None
+        self.ema_slow = None
+        self.macd_signal = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self.band_widths = deque(maxlen=6)
+        self.extrema = _MonotonicExtrema(2 * PIVOT_WINDOW + 1)
+        self.pivot_lows = deque(maxlen=MAX_PIVOTS)
+        self.pivot_highs = deque(maxlen=MAX_PIVOTS)
+        self.recent = deque(maxlen=PIVOT_WINDOW + 1)
+        self.volumes = deque(maxlen=MA_SHORT)
+
+    @classmethod
+    def from_history(cls, prices, volumes=None):
+        """用历史序列预热"""
+        stream = cls()
+        for i, price in enumerate(prices):
+            stream.update(price, None if volumes is None else volumes[i])
+        return stream
+
+    @staticmethod
+    def _ewm_step(prev, value, alpha):
+        return value if prev is None else prev + alpha * (value - prev)
+
+    def update(self, price, volume=None):
+        """推进一个tick"""
+        price = float(price)
+        self.t += 1
+
+        if self.price is not None:
+            delta = price - self.price
+            alpha = 1.0 / RSI_PERIOD
+            self.avg_gain = self._ewm_step(self.avg_gain, max(delta, 0.0), alpha)
+            self.avg_loss = self._ewm_step(self.avg_loss, max(-delta, 0.0), alpha)
+        self.price = price
+
+        self.ma_short.push(price)
+        self.ma_long.push(price)
+        self.boll.push(price)
+
+        self.ema_fast = self._ewm_step(self.ema_fast, price, 2.0 / (MACD_FAST + 1))
+        self.ema_slow = self._ewm_step(self.ema_slow, price, 2.0 / (MACD_SLOW + 1))
+        self.macd_signal = self._ewm_step(self.macd_signal, self.ema_fast - self.ema_slow,
+                                          2.0 / (MACD_SIGNAL + 1))
+
+        if self.boll.full:
+            self.band_widths.append(2 * BOLL_STD * self.boll.std())
+
+        # 窗口中心点若为窗口极值，则确认为枢轴点
+        self.extrema.push(self.t, price)
+        self.recent.append(price)
+        center = self.t - PIVOT_WINDOW
+        if center >= PIVOT_WINDOW:
+            if self.extrema.argmin()[1] == self.recent[0]:
+                self.pivot_lows.append(self.recent[0])
+            if self.extrema.argmax()[1] == self.recent[0]:
+                self.pivot_highs.append(self.recent[0])
+
+        if volume is not None:
+            self.volumes.append(float(volume))
+
+    def snapshot(self):
+        """当前指标，结构与 compute_indicators 相同"""
+        if not self.ma_long.full:
+            raise ValueError(f"尚未累积足够的数据点（至少需要{MA_LONG}个）")
+
+        price = self.price
+        ma20 = self.ma_short.mean()
+        ma50 = self.ma_long.mean()
+        if self.avg_loss == 0:
+            rsi_value = 100.0
+        else:
+            rsi_value = 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+        macd_line = self.ema_fast - self.ema_slow
+        hist = macd_line - self.macd_signal
+        middle = self.boll.mean()
+        half_width = BOLL_STD * self.boll.std()
+        widths = self.band_widths
+
+        return {
+            'usdcny_price': {'current': round(price, 4), 'ma20': round(ma20, 4),
+                             'ma50': round(ma50, 4), 'trend': _trend(price, ma20, ma50)},
+            'rsi_14': {'value': round(rsi_value, 1), 'signal': _rsi_signal(rsi_value),
+                       'overbought': bool(rsi_value >= 70)},
+            'macd': {'value': round(macd_line, 4), 'signal': round(self.macd_signal, 4),
+                     'histogram': round(hist, 4), 'trend': 'bullish' if hist > 0 else 'bearish'},
+            'bollinger_bands': {'upper': round(middle + half_width, 4), 'middle': round(middle, 4),
+                                'lower': round(middle - half_width, 4),
+                                'width': 'expanding' if widths[-1] > widths[0] else 'contracting'},
+            'support_levels': _nearest_levels(list(self.pivot_lows), price, True, N_LEVELS, 0.002),
+            'resistance_levels': _nearest_levels(list(self.pivot_highs), price, False, N_LEVELS, 0.002),
+            'volume_trend': _volume_trend(list(self.volumes) if len(self.volumes) else None),
+        }
@@ -0,0 +1,153 @@
+"""
+性能基准测试（pytest-benchmark）
+
+运行（不保存结果）:
+    pytest benchmarks
+在本机保存基线（保存在 benchmarks/.benchmarks，结果与机器相关，不纳入版本库）:
+    pytest benchmarks --benchmark-save=baseline
+与本机上一次保存的结果对比（均值回退超过10%即失败）:
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+与指定基线对比:
+    pytest benchmarks --benchmark-compare=0001
+
+所有数据均为固定随机种子生成的离线合成数据，网络请求已替换为本地桩。
+"""
+import importlib.util
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [os.path.join(ROOT, 'MiniApp_for_FX'), os.path.join(ROOT, 'Calendar_BE')]
+
+# 基准结果保存目录（与运行时的工作目录无关）
+BENCHMARK_STORAGE = os.path.join(HERE, '.benchmarks')
+
+SEED = 20240101
+
+# 合成数据规模
+FEED_EVENTS = 20000
+FACTOR_PERIODS = 5000
+FACTOR_COUNT = 30
+
+FEED_COUNTRIES = ['USD', 'EUR', 'GBP', 'JPY', 'CNY', 'AUD', 'CAD', 'CHF', 'NZD']
+FEED_IMPACTS = ['High', 'Medium', 'Low', 'Holiday', 'Non-Economic']
+FEED_TITLES = ['CPI m/m', 'Core CPI m/m', 'PPI m/m', 'Non-Farm Employment Change', 'Unemployment Rate',
+               'Retail Sales m/m', 'GDP q/q', 'FOMC Statement', 'Federal Funds Rate', 'ISM Manufacturing PMI',
+               'ISM Services PMI', 'Unemployment Claims', 'Building Permits', 'Trade Balance',
+               'Consumer Confidence', 'Prelim UoM Consumer Sentiment', 'Core PCE Price Index m/m',
+               'Main Refinancing Rate', 'BOJ Policy Rate', 'Official Bank Rate', 'Bank Holiday']
+
+
+def pytest_configure(config):
+    if config.getoption('benchmark_storage', None) == 'file://./.benchmarks':
+        config.option.benchmark_storage = 'file://' + BENCHMARK_STORAGE
+
+
+def make_feed_records(n=FEED_EVENTS, seed=SEED):
+    """与 ff_calendar_thisweek.json 同结构的事件记录（纽约时间ISO字符串，约一年跨度）"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2024-01-01 00:00', tz='America/New_York')
+    minutes = np.sort(rng.integers(0, 366 * 24 * 4, n)) * 15
+    stamps = (start + pd.to_timedelta(minutes, unit='min')).strftime('%Y-%m-%dT%H:%M:%S%z')
+    # 偏移量格式与数据源一致（-04:00）
+    stamps = [s[:-2] + ':' + s[-2:] for s in stamps]
+    values = np.round(rng.normal(0.3, 0.5, (2, n)), 1)
+    has_forecast = rng.random(n) < 0.8
+    return [{
+        'title': FEED_TITLES[t],
+        'country': FEED_COUNTRIES[c],
+        'date': stamp,
+        'impact': FEED_IMPACTS[i],
+        'forecast': f"{f}%" if ok else '',
+        'previous': f"{p}%",
+    } for t, c, i, stamp, f, p, ok in zip(rng.integers(0, len(FEED_TITLES), n),
+                                          rng.integers(0, len(FEED_COUNTRIES), n),
+                                          rng.integers(0, len(FEED_IMPACTS), n),
+                                          stamps, values[0], values[1], has_forecast)]
+
+
+class _FeedResponse:
+    """requests.get 的本地替身：每次调用都重新解析JSON文本，与真实请求的处理量一致"""
+
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.text)
+
+
+@pytest.fixture(scope='session')
+def feed_file(tmp_path_factory):
+    """大体量离线数据源JSON文件"""
+    path = tmp_path_factory.mktemp('feed') / 'ff_calendar.json'
+    path.write_text(json.dumps(make_feed_records()), encoding='utf-8')
+    return path
+
+
+@pytest.fixture(scope='session')
+def offline_feed(feed_file, tmp_path_factory):
+    """将 requests.get 替换为读取离线文件，事件归档写入临时目录"""
+    import requests
+    import event_archive
+
+    text = feed_file.read_text(encoding='utf-8')
+    patcher = pytest.MonkeyPatch()
+    patcher.setattr(requests, 'get', lambda url, timeout=None, **kwargs: _FeedResponse(text))
+    patcher.setattr(event_archive, 'DEFAULT_ARCHIVE_PATH',
+                    str(tmp_path_factory.mktemp('archive') / 'event_archive.csv'))
+    yield text
+    patcher.undo()
+
+
+@pytest.fixture(scope='session')
+def miniapp2(offline_feed):
+    """以模块方式加载 MiniApp2 脚本（无Streamlit运行时，页面调用为空操作）"""
+    return importlib.import_module('MiniApp2')
+
+
+@pytest.fixture(scope='session')
+def miniapp():
+    return importlib.import_module('MiniApp')
+
+
+@pytest.fixture(scope='session')
+def calendar_module():
+    return importlib.import_module('Calendar')
+
+
+@pytest.fixture(scope='session')
+def factor_panel():
+    """大体量因子面板：FACTOR_COUNT个相关因子 + USDCNY"""
+    rng = np.random.default_rng(SEED)
+    common = rng.standard_normal((FACTOR_PERIODS, 1))
+    loadings = rng.uniform(-1, 1, FACTOR_COUNT)
+    factors = common * loadings + rng.standard_normal((FACTOR_PERIODS, FACTOR_COUNT))
+    panel = pd.DataFrame(np.cumsum(factors, axis=0) * 0.01,
+                         index=pd.bdate_range('2005-01-03', periods=FACTOR_PERIODS),
+                         columns=[f'factor_{i:02d}' for i in range(FACTOR_COUNT)])
+    panel['usdcny'] = 7.0 + panel.iloc[:, :5].sum(axis=1) * 0.1 + rng.normal(0, 0.01, FACTOR_PERIODS)
+    return panel
+
+
+@pytest.fixture(scope='session')
+def factor_analyzer(factor_panel, tmp_path_factory):
+    """加载 Factor Analysis.py（文件名含空格），分析器直接使用合成面板"""
+    spec = importlib.util.spec_from_file_location(
+        'factor_analysis', os.path.join(ROOT, 'MiniApp_for_FX', 'Factor Analysis.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    analyzer = module.USDCNYFactorAnalyzer(cache_dir=str(tmp_path_factory.mktemp('factor_cache')),
+                                           use_cache=False)
+    analyzer.factor_panel = factor_panel
+    return analyzer
@@ -0,0 +1,73 @@
+import pytest
+
+
+MARKETS = ['NYSE', 'LSE', 'XHKG', 'JPX']
+
+# (起始日, 结束日)：一个月 / 一年 / 五年
+DATE_RANGES = [('2024-06-01', '2024-06-30'), ('2024-01-01', '2024-12-31'), ('2020-01-01', '2024-12-31')]
+
+RANGE_IDS = ['1m', '1y', '5y']
+
+
+@pytest.mark.parametrize('market', MARKETS)
+@pytest.mark.parametrize('date_range', DATE_RANGES, ids=RANGE_IDS)
+def test_get_market_events(benchmark, calendar_module, market, date_range):
+    result = benchmark(calendar_module.get_market_events, market, *date_range)
+    assert result is not None
+
+
+@pytest.mark.parametrize('market', MARKETS)
+@pytest.mark.parametrize('date_range', DATE_RANGES, ids=RANGE_IDS)
+def test_get_holidays_fixed(benchmark, calendar_module, market, date_range):
+    import pandas_market_calendars as mcal
+
+    calendar = mcal.get_calendar(market)
+    benchmark(calendar_module.get_holidays_fixed, calendar, *date_range)
+
+
+@pytest.mark.parametrize('market', MARKETS)
+@pytest.mark.parametrize('check_date', ['2024-12-25', '2024-07-01'], ids=['holiday', 'weekday'])
+def test_check_trading_day_simple(benchmark, calendar_module, market, check_date):
+    assert benchmark(calendar_module.check_trading_day_simple, market, check_date) is not None
+
+
+@pytest.mark.parametrize('market', MARKETS)
+def test_get_market_calendar_simple(benchmark, calendar_module, market):
+    assert benchmark(calendar_module.get_market_calendar_simple, market, 3) is not None
+
+
+@pytest.mark.parametrize('market', MARKETS)
+@pytest.mark.parametrize('n', [10, 60])
+def test_get_next_n_trading_days(benchmark, calendar_module, market, n):
+    days = benchmark(calendar_module.get_next_n_trading_days, market, n, '2024-01-02')
+    assert len(days) == n
+
+
+@pytest.mark.parametrize('date_range', [('2024-01-01', '2024-03-31'), ('2024-01-01', '2024-12-31')],
+                         ids=['1q', '1y'])
+def test_get_all_economic_events(benchmark, miniapp, date_range):
+    calendar = miniapp.EconomicCalendar()
+    events = benchmark(calendar.get_all_economic_events, *date_range)
+    assert not events.empty
+
+
+def test_event_timestamps(benchmark, miniapp):
+    """事件发布时刻（UTC）；分类类别列中各类别发布时间互不相同（映射一一对应）时同样可用"""
+    events = miniapp.EconomicCalendar().get_all_economic_events('2024-01-01', '2024-12-31')
+    events = events[events['category'].isin(['fed', 'cpi'])]
+    events = events.assign(category=events['category'].cat.remove_unused_categories())
+    stamps = benchmark(miniapp.event_timestamps, events)
+    assert len(stamps) == len(events) and stamps.notna().all()
+
+
+def test_schedule_cache_far_query(benchmark):
+    """远离已覆盖区间的查询只计算查询本身，结果与直接计算一致"""
+    from fx_calendar import get_calendar
+    from schedule_cache import ScheduleCache
+
+    cache = ScheduleCache()
+    cache.schedule('NYSE', '2024-01-01', '2024-06-30')
+    computed = cache.stats['computed_days']
+    schedule = benchmark(cache.schedule, 'NYSE', '2038-06-01', '2038-06-03')
+    assert cache.stats['computed_days'] - computed == 3
+    assert schedule.index.equals(get_calendar('NYSE').schedule(start_date='2038-06-01', end_date='2038-06-03').index)
@@ -0,0 +1,76 @@
+import pytest
+
+
+@pytest.mark.parametrize('window', [None, 250], ids=['full', 'w250'])
+@pytest.mark.parametrize('lag', [0, 5])
+def test_calculate_factor_correlations(benchmark, factor_analyzer, factor_panel, window, lag):
+    matrix = benchmark(factor_analyzer.calculate_factor_correlations, window=window, lag=lag)
+    assert matrix.shape == (factor_panel.shape[1], factor_panel.shape[1])
+
+
+def test_calculate_factor_correlations_subset(benchmark, factor_analyzer, factor_panel):
+    factors = list(factor_panel.columns[:8])
+    matrix = benchmark(factor_analyzer.calculate_factor_correlations, factors=factors)
+    assert list(matrix.columns) == factors + ['usdcny']
+
+
+def test_on_tick_report(benchmark, factor_analyzer, tmp_path):
+    """逐笔更新技术因子；之后生成的报告使用包含tick的价格序列"""
+    analyzer = type(factor_analyzer)(cache_dir=str(tmp_path), use_cache=False)
+    technical = benchmark.pedantic(analyzer.on_tick, args=(7.40,), rounds=100)
+    assert technical['usdcny_price']['current'] == 7.40
+
+    analyzer.create_comprehensive_report()
+    assert analyzer.factors_data['technical']['usdcny_price']['current'] == 7.40
+    assert analyzer.price_series[-1] == 7.40
+
+
+def test_streaming_matches_batch(benchmark):
+    """流式预热3000点后的指标（含最近 MAX_PIVOTS 个枢轴点给出的支撑/阻力）与一次性计算一致"""
+    import numpy as np
+
+    from technical_indicators import StreamingIndicators, compute_indicators
+
+    rng = np.random.default_rng(7)
+    prices = 7.0 * np.exp(np.cumsum(rng.normal(0, 0.002, 3000)))
+    stream = benchmark(StreamingIndicators.from_history, prices)
+    assert stream.snapshot() == compute_indicators(prices)
+
+
+def test_pipeline_concurrent_runs(benchmark, factor_analyzer, tmp_path):
+    """多个线程共用同一分析器执行流水线：依次执行，结果一致，不改动全局随机状态"""
+    import threading
+
+    import numpy as np
+
+    analyzer = type(factor_analyzer)(cache_dir=str(tmp_path), use_cache=False)
+    state = np.random.get_state()[1].copy()
+
+    def concurrent_runs():
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(analyzer.run_stages(['regimes', 'correlations'])))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    results = benchmark.pedantic(concurrent_runs, rounds=3)
+    assert len(results) == 4
+    assert all(r['correlations'].equals(results[0]['correlations']) for r in results)
+    assert analyzer.correlation_matrix.equals(results[0]['correlations'])
+    assert (np.random.get_state()[1] == state).all()
+
+
+def test_scenario_idiosyncratic_spread(benchmark, factor_panel):
+    """特质误差为平稳水平偏差：因子不变时期末价格标准差不超过回归残差标准差（不随期限按√T放大）"""
+    import numpy as np
+
+    from factor_scenarios import ScenarioEngine, fit_factor_model
+
+    model = fit_factor_model(factor_panel.iloc[:, [0, 1, -1]])
+    model['beta'] = np.zeros_like(model['beta'])
+    engine = ScenarioEngine(model, 7.185, horizon=252, seed=0)
+    terminal = benchmark(engine.simulate, n_paths=20000)
+    assert terminal.std() <= model['resid_std'] * 1.02
@@ -0,0 +1,118 @@
+def test_fetch_and_filter_events(benchmark, miniapp2):
+    """数据源处理全流程：JSON解析 → 规范化 → 归档 → 美国高影响筛选 → 共享表构建（绕过st.cache_resource）"""
+    fetch = miniapp2.fetch_and_filter_events.__wrapped__.__wrapped__
+    feed, message = benchmark(fetch)
+    assert not feed.empty, message
+    assert set(feed.events()['country'].astype(str)) == {'USD'}
+
+
+def test_shared_feed(benchmark, miniapp2):
+    """共享表构建：北京时间显示列、星期计数一次生成"""
+    from shared_feed import SharedFeed
+
+    feed, _ = miniapp2.fetch_and_filter_events.__wrapped__.__wrapped__()
+    events = feed.events()
+    shared = benchmark(SharedFeed, events, miniapp2.BEIJING_TZ)
+    assert len(shared.display()) == len(events)
+
+
+def test_shared_feed_session_view(benchmark, miniapp2):
+    """每个会话每次重跑取视图的开销（不复制数据）"""
+    feed, _ = miniapp2.fetch_and_filter_events.__wrapped__.__wrapped__()
+    events, display = benchmark(lambda: (feed.events(), feed.display()))
+    assert len(events) == len(display) == len(feed)
+
+
+def test_normalize_feed(benchmark, offline_feed):
+    import json
+
+    from event_archive import normalize_feed
+
+    records = json.loads(offline_feed)
+    events = benchmark(normalize_feed, records)
+    assert len(events) == len(records)
+
+
+def test_event_cube_stats(benchmark, miniapp2):
+    """统计面板：总数、含预测数、按星期分布、星期×小时热力图均取自立方体"""
+    feed, _ = miniapp2.fetch_and_filter_events.__wrapped__.__wrapped__()
+    cube = feed.cube
+
+    def stats():
+        return (cube.total(), cube.total('with_forecast'), cube.marginal('weekday'),
+                cube.table('weekday', 'hour'))
+
+    total, _, weekday, heatmap = benchmark(stats)
+    assert total == len(feed) == weekday.sum() == heatmap.to_numpy().sum()
+
+
+def test_hour_of_week_heatmap(benchmark):
+    """多年归档（20万事件）上的168时段热力图：立方体切片求和，与事件数无关"""
+    from event_cube import HOUR_OF_WEEK_SLOTS, EventCube
+    from event_schema import _sample_feed, to_event_frame
+
+    cube = EventCube('Asia/Shanghai')
+    cube.add(to_event_frame(_sample_feed(200_000, seed=1)))
+    slots = benchmark(cube.hour_of_week, country=['USD', 'EUR'], impact='High', month=cube.recent_months(36))
+    assert slots.shape == (HOUR_OF_WEEK_SLOTS,) and 0 < slots.sum() < len(cube)
+
+
+def test_event_study_cache(benchmark, tmp_path):
+    """事件研究缓存：报价修订后指纹变化重新计算；没有报价时返回空表"""
+    import numpy as np
+    import pandas as pd
+
+    from event_archive import EventArchive
+    from event_schema import to_event_frame
+    from event_study import EventStudyCache
+
+    stamps = pd.date_range('2024-01-10 13:30', periods=12, freq='30D', tz='UTC')
+    archive = EventArchive(str(tmp_path / 'archive.csv'))
+    archive.append(to_event_frame(pd.DataFrame({
+        'timestamp': stamps, 'title': 'CPI m/m', 'country': 'USD', 'impact': 'High',
+        'forecast': '0.3%', 'previous': '0.2%', 'actual': '0.4%'})))
+
+    minutes = pd.DatetimeIndex(np.concatenate([pd.date_range(t - pd.Timedelta(minutes=60), periods=180, freq='min')
+                                               for t in stamps]))
+    prices = 1.10 + np.random.default_rng(0).normal(0, 1e-4, len(minutes)).cumsum()
+    pd.DataFrame({'timestamp': minutes, 'price': prices}).to_csv(tmp_path / 'EURUSD.csv', index=False)
+    pd.DataFrame({'timestamp': [], 'price': []}).to_csv(tmp_path / 'USDJPY.csv', index=False)
+
+    def study():
+        cache = EventStudyCache(cache_dir=str(tmp_path / 'cache'), archive=archive, price_dir=str(tmp_path))
+        return cache.study('CPI', 'EURUSD')
+
+    before = benchmark(study)
+    assert before['reactions']['ret_15m_bps'].notna().all()
+
+    # 修订一个事件后的报价（数量与最后时间不变）
+    prices[minutes.get_loc(stamps[0] + pd.Timedelta(minutes=15))] += 0.01
+    pd.DataFrame({'timestamp': minutes, 'price': prices}).to_csv(tmp_path / 'EURUSD.csv', index=False)
+    after = study()
+    assert after['reactions']['ret_15m_bps'].iloc[0] != before['reactions']['ret_15m_bps'].iloc[0]
+
+    empty = EventStudyCache(cache_dir=str(tmp_path / 'cache'), archive=archive, price_dir=str(tmp_path))
+    assert empty.study('CPI', 'USDJPY')['reactions'].empty
+
+
+def test_event_cube_concurrent_add(benchmark):
+    """多个线程同时加入同一批事件：每个事件只计一次"""
+    import threading
+
+    from event_archive import ARCHIVE_KEY
+    from event_cube import EventCube
+    from event_schema import _sample_feed, to_event_frame
+
+    events = to_event_frame(_sample_feed(20000, seed=2))
+
+    def concurrent_add():
+        cube = EventCube('Asia/Shanghai')
+        threads = [threading.Thread(target=cube.add, args=(events,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return cube
+
+    cube = benchmark(concurrent_add)
+    assert len(cube) == len(events.drop_duplicates(subset=ARCHIVE_KEY))
@@ -0,0 +1,12 @@
+"""
+行为测试（普通 pytest，不计时）:
+    pytest tests
+
+性能基准见 benchmarks/。
+"""
+import os
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'MiniApp_for_FX'), os.path.join(ROOT, 'Calendar_BE')]
@@ -0,0 +1,87 @@
+import pandas as pd
+
+from alert_scheduler import MAX_ATTEMPTS, RETRY_DELAY, AlertScheduler, StubReceiver, Subscription
+from event_schema import to_event_frame
+
+
+NOW = pd.Timestamp('2024-06-10 12:00', tz='UTC').value
+MINUTE = 60 * 10 ** 9
+
+
+def make_events(minutes_ahead, country='USD', impact='High'):
+    """距 NOW 若干分钟后发生的事件（标题为 E<分钟数>）"""
+    return to_event_frame(pd.DataFrame({
+        'timestamp': [pd.Timestamp(NOW + m * MINUTE, tz='UTC') for m in minutes_ahead],
+        'title': [f'E{m}' for m in minutes_ahead],
+        'country': country, 'impact': impact,
+        'forecast': '0.3%', 'previous': '0.2%', 'actual': None,
+    }))
+
+
+def titles(scheduler, alerts):
+    return [scheduler._events[key]['title'] for _, key, _ in alerts]
+
+
+def test_plan_and_due_in_fire_time_order():
+    scheduler = AlertScheduler([Subscription('a', 'http://127.0.0.1:9/hook', lead_minutes=15)], clock=lambda: NOW)
+    # 已发生的事件不提醒；提前量已过但尚未发生的立即到期
+    assert scheduler.plan(make_events([120, 30, -10, 5, 60])) == 4
+
+    assert titles(scheduler, scheduler.due(NOW)) == ['E5']
+    assert scheduler.due(NOW + 10 * MINUTE) == []
+    assert scheduler.next_fire_time() == NOW + 15 * MINUTE
+    assert titles(scheduler, scheduler.due(NOW + 200 * MINUTE)) == ['E30', 'E60', 'E120']
+    assert len(scheduler) == 0
+
+
+def test_replan_skips_sent_alerts():
+    events = make_events([30, 60, 90])
+    with StubReceiver() as receiver:
+        scheduler = AlertScheduler([Subscription('a', f'{receiver.url}/hook', lead_minutes=15)], clock=lambda: NOW)
+        scheduler.plan(events)
+        assert scheduler.run_once(NOW + 50 * MINUTE) == 2
+
+        # 数据源刷新：已发送的两条不再入堆，新增事件正常规划
+        assert scheduler.plan(pd.concat([events, make_events([120])]), now=NOW + 50 * MINUTE) == 2
+        assert scheduler.run_once(NOW + 200 * MINUTE) == 2
+        assert receiver.alerts() == 4
+        assert sorted(a['title'] for _, body in receiver.received for a in body['alerts']) == \
+            ['E120', 'E30', 'E60', 'E90']
+
+
+def test_failed_delivery_retries_with_backoff_then_drops():
+    with StubReceiver(fail_paths={'/fail'}) as receiver:
+        scheduler = AlertScheduler([Subscription('a', f'{receiver.url}/fail', lead_minutes=15)], clock=lambda: NOW)
+        scheduler.plan(make_events([60]))
+        now = NOW + 45 * MINUTE
+
+        for attempt in range(MAX_ATTEMPTS):
+            alerts = scheduler.due(now)
+            assert [a[2] for a in alerts] == [attempt]
+            assert scheduler.deliver(alerts, now) == 0
+            if attempt + 1 < MAX_ATTEMPTS:
+                # 第k次重试延迟 RETRY_DELAY * 2**k 秒
+                assert scheduler.next_fire_time() == now + RETRY_DELAY * 2 ** attempt * 10 ** 9
+                now = scheduler.next_fire_time()
+
+        assert len(scheduler) == 0
+        assert scheduler.stats['retries'] == MAX_ATTEMPTS - 1
+        assert scheduler.stats['dropped'] == 1
+        assert receiver.alerts() == 0
+
+
+def test_add_and_remove_subscription():
+    scheduler = AlertScheduler([Subscription('usd', 'http://127.0.0.1:9/usd', countries=['USD'])], clock=lambda: NOW)
+    # 未规划前新增订阅不入堆
+    assert scheduler.add_subscription(Subscription('early', 'http://127.0.0.1:9/early')) == 0
+    scheduler.remove_subscription('early')
+
+    events = pd.concat([make_events([60, 90]), make_events([120], country='EUR')])
+    assert scheduler.plan(events) == 2
+    assert scheduler.add_subscription(Subscription('eur', 'http://127.0.0.1:9/eur', countries=['EUR'])) == 1
+    assert len(scheduler) == 3
+
+    assert scheduler.remove_subscription('usd')
+    assert not scheduler.remove_subscription('usd')
+    due = scheduler.due(NOW + 200 * MINUTE)
+    assert [(sub_id, scheduler._events[key]['title']) for sub_id, key, _ in due] == [('eur', 'E120')]
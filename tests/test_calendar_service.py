@@ -0,0 +1,13 @@
+import json
+
+from calendar_service import CalendarService
+
+
+def test_batch_rejects_malformed_items():
+    """批量请求中格式错误的项逐项返回400，其余项正常处理"""
+    service = CalendarService()
+    status, body = service.handle_batch({'requests': ['x', {'path': 3}, {'path': '/nope', 'params': [1]},
+                                                      {'path': '/nope'}]})
+    assert status == 200
+    statuses = [item['status'] for item in json.loads(body)['results']]
+    assert statuses == [400, 400, 400, 404]
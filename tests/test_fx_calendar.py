@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from fx_calendar import FXCalendar, get_calendar
+
+
+@pytest.fixture(scope='module')
+def cal():
+    return get_calendar('FX')
+
+
+def ny(ts):
+    return pd.Timestamp(ts, tz='America/New_York')
+
+
+def test_new_year_and_christmas_closed(cal):
+    days = cal.schedule('2024-12-20', '2025-01-03').index.strftime('%Y-%m-%d').tolist()
+    assert '2024-12-25' not in days
+    assert '2025-01-01' not in days
+    assert days == ['2024-12-20', '2024-12-23', '2024-12-24', '2024-12-26', '2024-12-27',
+                    '2024-12-30', '2024-12-31', '2025-01-02', '2025-01-03']
+    # 休市日整日不开盘（前一交易日13:00提前收盘后直到次日时段开盘前）
+    assert not cal.is_open(ny('2024-12-25 10:00'))
+    assert not cal.is_open(ny('2025-01-01 10:00'))
+
+
+def test_early_close_at_1300_new_york(cal):
+    sched = cal.schedule('2024-12-20', '2025-01-03')
+    early = cal.early_closes(sched)
+    assert early.index.strftime('%Y-%m-%d').tolist() == ['2024-12-24', '2024-12-31']
+    for close in early['market_close']:
+        assert close.tz_convert('America/New_York').strftime('%H:%M') == '13:00'
+    assert cal.is_open(ny('2024-12-24 12:59'))
+    assert not cal.is_open(ny('2024-12-24 13:00'))
+    # 普通交易日17:00收盘
+    close = sched.loc['2024-12-23', 'market_close'].tz_convert('America/New_York')
+    assert close.strftime('%H:%M') == '17:00'
+
+
+def test_sunday_1700_open_boundary(cal):
+    # 2024-06-09 为周日：周一交易日的时段从周日17:00（纽约）开始
+    assert not cal.is_open(ny('2024-06-08 12:00'))
+    assert not cal.is_open(ny('2024-06-09 16:59:59'))
+    assert cal.is_open(ny('2024-06-09 17:00'))
+    # 周五17:00收盘
+    assert cal.is_open(ny('2024-06-07 16:59:59'))
+    assert not cal.is_open(ny('2024-06-07 17:00'))
+    # 夏令时/冬令时下均按纽约时间17:00
+    assert cal.schedule('2024-06-10', '2024-06-10')['market_open'].iloc[0] == pd.Timestamp('2024-06-09 21:00', tz='UTC')
+    assert cal.schedule('2024-01-08', '2024-01-08')['market_open'].iloc[0] == pd.Timestamp('2024-01-07 22:00', tz='UTC')
+
+
+def test_out_of_range_consistent_with_schedule():
+    cal = FXCalendar('2024-01-01', '2024-12-31')
+    # 范围外与 schedule 的现算结果一致，而不是静默返回False或不足n个
+    assert cal.is_open(ny('2025-06-11 10:00'))
+    assert not cal.is_open(ny('2025-06-14 10:00'))
+    assert cal.is_open(ny('2023-06-14 10:00'))
+    sessions = cal.next_sessions('2024-12-30', 5)
+    assert sessions.strftime('%Y-%m-%d').tolist() == ['2024-12-30', '2024-12-31', '2025-01-02',
+                                                     '2025-01-03', '2025-01-06']
+    expected = cal.schedule('2025-06-02', '2025-06-30').index[:10]
+    assert cal.next_sessions('2025-06-01', 10).equals(expected)
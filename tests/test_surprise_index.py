@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from surprise_index import SurpriseIndex, compute_surprises, parse_values
+
+
+def test_parse_values_suffixes():
+    values, units = parse_values(['3.2%', '-0.5%', '215K', '1.2B', '0.8M', '2T', '42'])
+    np.testing.assert_allclose(values, [3.2, -0.5, 215e3, 1.2e9, 0.8e6, 2e12, 42.0])
+    assert units.tolist() == ['%', '%', 'K', 'B', 'M', 'T', '']
+
+
+def test_parse_values_bounds_commas_and_case():
+    values, units = parse_values(['<0.1%', '>5', '1,234.5K', '12,345', ' 7 k ', '+1.5'])
+    np.testing.assert_allclose(values, [0.1, 5.0, 1234.5e3, 12345.0, 7e3, 1.5])
+    assert units.tolist() == ['%', '', 'K', '', 'K', '']
+
+
+def test_parse_values_missing_and_unparseable():
+    values, units = parse_values([None, np.nan, '', 'n/a', '3.2%', None])
+    assert values.isna().tolist() == [True, True, True, True, False, True]
+    assert values.iloc[4] == 3.2
+    assert units.tolist() == ['', '', '', '', '%', '']
+
+
+def test_incremental_zscore_matches_batch():
+    # 意外值量级大、波动小（如以"K"为单位的非农），累计平方和会严重损失精度
+    rng = np.random.default_rng(0)
+    n = 400
+    forecast = 1e6 + rng.normal(0, 1, n)
+    actual = forecast + 1e5 + rng.normal(0, 1, n)
+    events = pd.DataFrame({
+        'timestamp': pd.date_range('2000-01-01', periods=n, freq='W'),
+        'country': 'US', 'title': 'NFP',
+        'actual': [f"{v:.4f}" for v in actual],
+        'forecast': [f"{v:.4f}" for v in forecast],
+        'previous': '',
+    })
+    batch = compute_surprises(events)['surprise_z'].to_numpy()
+
+    index = SurpriseIndex()
+    incremental = np.array([index.update('US', 'NFP', a, f)
+                            for a, f in zip(events['actual'], events['forecast'])])
+    np.testing.assert_allclose(incremental, batch, rtol=1e-6, equal_nan=True)
+    assert np.isfinite(batch[5:]).all()
+
+
+def test_constant_surprises_have_no_zscore():
+    index = SurpriseIndex()
+    z = [index.update('US', 'CPI', '0.3%', '0.2%') for _ in range(10)]
+    assert np.isnan(z).all()
@@ -0,0 +1,40 @@
+import io
+
+import numpy as np
+import pytest
+
+from trading_days import HOLIDAY, INVALID, OUT_OF_RANGE, TRADING, WEEKEND, TradingDayChecker
+
+
+@pytest.fixture(scope='module')
+def checker():
+    return TradingDayChecker()
+
+
+def test_reason_codes(checker):
+    dates = ['2024-07-03', '2024-07-06', '2024-07-04', '1990-07-05', '2999-01-04', 'not-a-date', '']
+    is_trading, reasons = checker.check(dates, 'NYSE')
+    assert reasons.tolist() == [TRADING, WEEKEND, HOLIDAY, OUT_OF_RANGE, OUT_OF_RANGE, INVALID, INVALID]
+    assert is_trading.tolist() == [True, False, False, False, False, False, False]
+
+
+def test_weekend_takes_precedence_over_holiday(checker):
+    # 2021-12-25 为周六（圣诞节）：判定为周末而非假日
+    _, reasons = checker.check(['2021-12-25', '2021-12-24'], 'NYSE')
+    assert reasons.tolist() == [WEEKEND, HOLIDAY]
+
+
+def test_per_row_markets(checker):
+    # 7月4日：纽约休市、伦敦交易；12月25日外汇休市
+    dates = ['2024-07-04', '2024-07-04', '2024-12-25', '2024-12-24']
+    _, reasons = checker.check(dates, ['NYSE', 'LSE', 'FX', 'FX'])
+    assert reasons.tolist() == [HOLIDAY, TRADING, HOLIDAY, TRADING]
+    with pytest.raises(ValueError):
+        checker.check(dates, ['NYSE', 'LSE'])
+
+
+def test_stream_reason_labels(checker):
+    text = "NYSE,2024-07-03\nNYSE,2024-07-06\n\nNYSE,2024-07-04\nNYSE,1990-07-05\nNYSE,bad\n"
+    frames = list(checker.stream(io.StringIO(text), chunk_size=2))
+    reasons = np.concatenate([f['reason'].to_numpy() for f in frames]).tolist()
+    assert reasons == ['trading', 'weekend', 'holiday', 'out_of_range', 'invalid']
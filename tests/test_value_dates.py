@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from value_dates import ValueDateEngine, add_months, parse_tenor
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return ValueDateEngine()
+
+
+def value_date(engine, trade_date, pair, tenor='SPOT'):
+    return str(engine.value_dates(trade_date, pair, tenor)[0])
+
+
+def test_spot_skips_usd_holiday_on_t_plus_1(engine):
+    # 7月4日（美元假日）为T+1：交割天数按欧元日历数，T+2 = 7月5日
+    assert value_date(engine, '2024-07-03', 'EURUSD') == '2024-07-05'
+    # 美元假日落在T+2：顺延至下一个结算日
+    assert value_date(engine, '2024-07-02', 'EURUSD') == '2024-07-05'
+
+
+def test_month_end_rule(engine):
+    # 即期4月30日为当月最后营业日 → 1M 取5月最后营业日，而不是5月30日
+    assert value_date(engine, '2024-04-26', 'EURUSD') == '2024-04-30'
+    assert value_date(engine, '2024-04-26', 'EURUSD', '1M') == '2024-05-31'
+    # 即期2月29日 → 3月最后营业日（3月29日耶稣受难日、31日周日）
+    assert value_date(engine, '2024-02-27', 'EURUSD', '1M') == '2024-03-28'
+
+
+def test_modified_following_rolls_back_across_month_end(engine):
+    # 即期5月30日 + 1M = 6月30日（周日）：顺延会跨入7月，按修正后续回退到6月28日
+    assert value_date(engine, '2024-05-28', 'EURUSD') == '2024-05-30'
+    assert value_date(engine, '2024-05-28', 'EURUSD', '1M') == '2024-06-28'
+
+
+def test_usdcad_is_t_plus_1(engine):
+    assert value_date(engine, '2024-06-10', 'USDCAD') == '2024-06-11'
+    # T+1 为加拿大国庆日（7月1日）
+    assert value_date(engine, '2024-06-28', 'USD/CAD') == '2024-07-02'
+
+
+def test_batch_matches_single_rows(engine):
+    trade_dates = np.array(['2024-07-03', '2024-04-26', '2024-05-28', '2024-06-28'], dtype='datetime64[D]')
+    pairs = ['EURUSD', 'EURUSD', 'EURUSD', 'USDCAD']
+    tenors = ['SPOT', '1M', '1M', 'SPOT']
+    batch = engine.value_dates(trade_dates, pairs, tenors)
+    assert [str(d) for d in batch] == ['2024-07-05', '2024-05-31', '2024-06-28', '2024-07-02']
+
+
+def test_tenors_and_add_months():
+    assert parse_tenor('spot') == (0, 0)
+    assert parse_tenor('2W') == (0, 14)
+    assert parse_tenor('1Y') == (12, 0)
+    with pytest.raises(ValueError):
+        parse_tenor('3X')
+    assert str(add_months(np.array(['2024-01-31'], dtype='datetime64[D]'), 1)[0]) == '2024-02-29'
+
+
+def test_invalid_inputs(engine):
+    with pytest.raises(ValueError):
+        engine.value_dates('2024-06-10', 'EURUS', 'SPOT')
+    with pytest.raises(ValueError):
+        engine.value_dates('1990-01-02', 'EURUSD', 'SPOT')